@@ -0,0 +1,264 @@
+"""Deterministic generator of synthetic hOCR documents
+
+The documents mimic the structure and title properties of common OCR
+engines, so the hot paths of the parser see realistic input:
+- tesseract: ocr_page > ocr_carea > ocr_par > ocr_line > ocrx_word, with
+  x_wconf on words and baseline, x_size etc. on lines
+- abbyy: like tesseract, but with x_font/x_fsize on lines and one
+  ocrx_cinfo element per character carrying x_bboxes and x_conf
+- ocropus: ocr_page > ocr_line > ocrx_word without areas and paragraphs,
+  with x_bboxes and x_confs of all characters on the words
+
+The same arguments always produce the same document.
+
+    python -m benchmarks.generate book.hocr --pages 500 --flavour abbyy
+"""
+
+from typing import Iterator, List
+import argparse
+import random
+
+FLAVOURS = ("tesseract", "abbyy", "ocropus")
+
+_WORDS = (
+    "the quick brown fox jumps over lazy dog and then some more words of "
+    "varying length appear on every line like optical character recognition "
+    "results hOCR document parser benchmark Ünïcödé naïve café €100 1984"
+).split()
+
+_SYSTEMS = {
+    "tesseract": "tesseract 4.1.1",
+    "abbyy": "ABBYY FineReader Engine 12",
+    "ocropus": "ocropus 0.7",
+}
+
+_CAPABILITIES = {
+    "tesseract": "ocr_page ocr_carea ocr_par ocr_line ocrx_word ocrp_wconf",
+    "abbyy": "ocr_page ocr_carea ocr_par ocr_line ocrx_word ocrx_cinfo",
+    "ocropus": "ocr_page ocr_line ocrx_word",
+}
+
+PAGE_WIDTH = 2480
+PAGE_HEIGHT = 3508
+CHAR_WIDTH = 20
+LINE_HEIGHT = 48
+
+
+class _Generator:
+    def __init__(
+        self,
+        pages: int,
+        lines: int,
+        words: int,
+        flavour: str,
+        properties: bool,
+        seed: int,
+    ):
+        if flavour not in FLAVOURS:
+            raise ValueError(f"unknown flavour {flavour!r}, use one of {FLAVOURS}")
+
+        self.pages = pages
+        self.lines = lines
+        self.words = words
+        self.flavour = flavour
+        self.properties = properties
+        self.random = random.Random(seed)
+
+    def title(self, *parts: str) -> str:
+        # the bbox is always written, the other properties only if enabled
+        parts = parts if self.properties else parts[:1]
+        return "; ".join(p for p in parts if p)
+
+    def chunks(self) -> Iterator[str]:
+        yield (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 Transitional//EN"\n'
+            '    "http://www.w3.org/TR/xhtml1/DTD/xhtml1-transitional.dtd">\n'
+            '<html xmlns="http://www.w3.org/1999/xhtml" xml:lang="en" lang="en">\n'
+            " <head>\n"
+            "  <title></title>\n"
+            '  <meta http-equiv="Content-Type" content="text/html;charset=utf-8" />\n'
+            f"  <meta name='ocr-system' content='{_SYSTEMS[self.flavour]}' />\n"
+            "  <meta name='ocr-capabilities' "
+            f"content='{_CAPABILITIES[self.flavour]}' />\n"
+            f"  <meta name='ocr-number-of-pages' content='{self.pages}' />\n"
+            " </head>\n"
+            " <body>\n"
+        )
+        for number in range(self.pages):
+            yield from self.page(number)
+        yield " </body>\n</html>\n"
+
+    def page(self, number: int) -> Iterator[str]:
+        n = number + 1
+        title = self.title(
+            f"bbox 0 0 {PAGE_WIDTH} {PAGE_HEIGHT}",
+            f'image "scans/page_{n:05d}.png"',
+            f"ppageno {number}",
+            "scan_res 300 300",
+        )
+        yield f"  <div class='ocr_page' id='page_{n}' title='{title}'>\n"
+
+        if self.flavour == "ocropus":
+            for line in range(self.lines):
+                yield from self.line(n, line, 1)
+        else:
+            # two areas with one paragraph each, splitting the lines
+            half = (self.lines + 1) // 2
+            for area, (first, last) in enumerate(((0, half), (half, self.lines))):
+                if first >= last:
+                    continue
+                y1, y2 = self.line_top(first), self.line_top(last - 1) + LINE_HEIGHT
+                bbox = f"bbox 100 {y1} {PAGE_WIDTH - 100} {y2}"
+                a = f"{n}_{area + 1}"
+                yield f"   <div class='ocr_carea' id='block_{a}' title='{bbox}'>\n"
+                yield (
+                    f"    <p class='ocr_par' id='par_{a}' lang='eng' "
+                    f"title='{bbox}'>\n"
+                )
+                for line in range(first, last):
+                    yield from self.line(n, line, area + 1)
+                yield "    </p>\n   </div>\n"
+
+        yield "  </div>\n"
+
+    @staticmethod
+    def line_top(line: int) -> int:
+        return 150 + line * (LINE_HEIGHT + 12)
+
+    def line(self, page: int, line: int, area: int) -> Iterator[str]:
+        rng = self.random
+        words: List[str] = [rng.choice(_WORDS) for _ in range(self.words)]
+        y1 = self.line_top(line)
+        y2 = y1 + LINE_HEIGHT
+        x = 100
+        boxes = []
+        for word in words:
+            width = len(word) * CHAR_WIDTH
+            boxes.append((x, y1 + rng.randint(0, 6), x + width, y2 - rng.randint(0, 6)))
+            x += width + CHAR_WIDTH
+
+        title = self.title(
+            f"bbox 100 {y1} {x} {y2}",
+            f"baseline {rng.randint(-20, 20) / 1000} -{rng.randint(5, 12)}",
+            f"x_size {LINE_HEIGHT - 8}",
+            "x_descenders 10",
+            "x_ascenders 12",
+            "x_font Times; x_fsize 10" if self.flavour == "abbyy" else "",
+        )
+        line_id = f"line_{page}_{line + 1}"
+        yield f"     <span class='ocr_line' id='{line_id}' title='{title}'>"
+
+        for i, (word, box) in enumerate(zip(words, boxes)):
+            yield self.word(f"word_{page}_{line + 1}_{i + 1}", word, box)
+            yield " "
+        yield "</span>\n"
+
+    def word(self, word_id: str, word: str, box: tuple) -> str:
+        rng = self.random
+        x1, y1, x2, y2 = box
+        bbox = f"bbox {x1} {y1} {x2} {y2}"
+        text = word.replace("&", "&amp;").replace("<", "&lt;")
+        confidences = [rng.randint(300, 1000) / 10 for _ in word]
+        wconf = f"x_wconf {round(sum(confidences) / len(confidences))}"
+
+        if self.flavour == "tesseract" or not self.properties:
+            title = self.title(bbox, wconf)
+            return (
+                f"<span class='ocrx_word' id='{word_id}' title='{title}'>{text}</span>"
+            )
+
+        chars = [
+            (x1 + k * CHAR_WIDTH, y1, x1 + (k + 1) * CHAR_WIDTH, y2)
+            for k in range(len(word))
+        ]
+        if self.flavour == "ocropus":
+            x_bboxes = "x_bboxes " + " ".join(" ".join(map(str, c)) for c in chars)
+            x_confs = "x_confs " + " ".join(map(str, confidences))
+            title = self.title(bbox, x_bboxes, x_confs)
+            return (
+                f"<span class='ocrx_word' id='{word_id}' title='{title}'>{text}</span>"
+            )
+
+        # abbyy: one element per character
+        cinfo = "".join(
+            "<span class='ocrx_cinfo' title='x_bboxes {} {} {} {}; x_conf {}'>{}</span>".format(
+                *c, conf, char.replace("&", "&amp;").replace("<", "&lt;")
+            )
+            for c, conf, char in zip(chars, confidences, word)
+        )
+        title = self.title(bbox, wconf)
+        return f"<span class='ocrx_word' id='{word_id}' title='{title}'>{cinfo}</span>"
+
+
+def generate(
+    pages: int = 10,
+    lines: int = 40,
+    words: int = 10,
+    flavour: str = "tesseract",
+    properties: bool = True,
+    seed: int = 0,
+) -> str:
+    """Returns a synthetic hOCR document
+
+    :param pages: (optional) number of pages. Default is 10.
+    :param lines: (optional) number of lines per page. Default is 40.
+    :param words: (optional) number of words per line. Default is 10.
+    :param flavour: (optional) one of FLAVOURS. Default is tesseract.
+    :param properties: (optional) False to write only the bbox of elements.
+        Default is True.
+    :param seed: (optional) seed of the random words, boxes and confidences
+    :return: the document as str
+    :raises ValueError: If flavour is unknown
+    """
+    generator = _Generator(pages, lines, words, flavour, properties, seed)
+    return "".join(generator.chunks())
+
+
+def write(
+    filename: str,
+    pages: int = 10,
+    lines: int = 40,
+    words: int = 10,
+    flavour: str = "tesseract",
+    properties: bool = True,
+    seed: int = 0,
+) -> int:
+    """Writes a synthetic document to filename, see generate
+
+    The document is written in chunks, so large documents don't have to fit
+    into memory as str.
+
+    :return: number of bytes written
+    """
+    generator = _Generator(pages, lines, words, flavour, properties, seed)
+    size = 0
+    with open(filename, "wb") as f:
+        for chunk in generator.chunks():
+            size += f.write(chunk.encode("utf-8"))
+    return size
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("filename", help="output file")
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--lines", type=int, default=40, help="lines per page")
+    parser.add_argument("--words", type=int, default=10, help="words per line")
+    parser.add_argument("--flavour", choices=FLAVOURS, default="tesseract")
+    parser.add_argument(
+        "--no-properties",
+        dest="properties",
+        action="store_false",
+        help="only write bbox properties",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    options = dict(vars(args))
+    size = write(options.pop("filename"), **options)
+    print(f"{args.filename}: {size} bytes")
+
+
+if __name__ == "__main__":
+    main()
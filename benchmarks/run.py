@@ -0,0 +1,316 @@
+"""Times the hot paths of hocr-parser on synthetic documents
+
+For every flavour and size (see generate), a document is generated into a
+temporary directory and each benchmark is run `repeat` times. Every run
+gets a freshly parsed document, so values cached in the DocumentCache never
+leak from one run into the next. The setup of a run isn't timed.
+
+Results are written as JSON: metadata about the environment and one record
+per benchmark, flavour and size with the best, median and mean time in
+seconds and the peak memory allocated by Python objects during one extra
+run (measured with tracemalloc, so memory allocated by libxml2 isn't
+included; max_rss_bytes in the metadata covers the whole process).
+
+    python -m benchmarks --output results.json
+    python -m benchmarks --compare results.json
+
+With --compare, the best times are compared to an earlier result file and
+the exit status is 1 if any benchmark got slower than the tolerance allows.
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import argparse
+import io
+import json
+import os
+import platform
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import lxml.etree
+
+from hocr_parser import HOCRDocument, HOCRNode
+from hocr_parser.export import to_alto, to_json
+
+from .generate import FLAVOURS, write
+
+SIZES = (1, 10, 50)
+
+# setup functions get the path of the document and return the timed function
+Setup = Callable[[str], Callable[[], Any]]
+
+
+def _parse(path: str) -> Callable[[], Any]:
+    return lambda: HOCRDocument(path)
+
+
+def _open(path: str) -> Tuple[HOCRDocument, HOCRNode]:
+    doc = HOCRDocument(path)
+    assert doc.body is not None
+    return doc, doc.body
+
+
+def _keeping(doc: HOCRDocument, func: Callable[[], Any]) -> Callable[[], Any]:
+    """Returns func, keeping doc alive as long as the result is referenced
+
+    Nodes lose their DocumentCache when their document is collected, so
+    timing them without the document would only measure the uncached path.
+    """
+    return lambda: (doc, func())[1]
+
+
+def _ocr_text(path: str) -> Callable[[], Any]:
+    doc, body = _open(path)
+    return _keeping(doc, lambda: body.ocr_text)
+
+
+def _words(path: str) -> Callable[[], Any]:
+    doc, body = _open(path)
+    return _keeping(doc, lambda: body.words)
+
+
+def _bbox(path: str) -> Callable[[], Any]:
+    doc, body = _open(path)
+    words = body.words
+    return _keeping(doc, lambda: [w.bbox for w in words])
+
+
+def _bbox_cached(path: str) -> Callable[[], Any]:
+    doc, body = _open(path)
+    words = body.words
+    for w in words:
+        _ = w.bbox
+    return _keeping(doc, lambda: [w.bbox for w in words])
+
+
+def _confidence(path: str) -> Callable[[], Any]:
+    doc, body = _open(path)
+    words = body.words
+    return _keeping(doc, lambda: [w.confidence for w in words])
+
+
+def _eq(path: str) -> Callable[[], Any]:
+    (doc_a, a), (doc_b, b) = _open(path), _open(path)
+    return _keeping(doc_a, _keeping(doc_b, lambda: a == b))
+
+
+def _to_json(path: str) -> Callable[[], Any]:
+    return lambda: to_json(path, io.StringIO())
+
+
+def _to_alto(path: str) -> Callable[[], Any]:
+    return lambda: to_alto(path, io.BytesIO())
+
+
+BENCHMARKS: Dict[str, Setup] = {
+    "parse": _parse,
+    "ocr_text": _ocr_text,
+    "words": _words,
+    "bbox": _bbox,
+    "bbox_cached": _bbox_cached,
+    "confidence": _confidence,
+    "eq": _eq,
+    "to_json": _to_json,
+    "to_alto": _to_alto,
+}
+
+
+def measure(setup: Setup, path: str, repeat: int) -> Dict[str, Any]:
+    """Runs one benchmark and returns its timings and peak memory"""
+    times = []
+    for _ in range(repeat):
+        func = setup(path)
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+        del func
+
+    func = setup(path)
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "best": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.mean(times),
+        "repeat": repeat,
+        "peak_python_bytes": peak,
+    }
+
+
+def metadata() -> Dict[str, Any]:
+    # ru_maxrss is in KiB on Linux and in bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform != "darwin":
+        max_rss *= 1024
+
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "lxml": ".".join(map(str, lxml.etree.LXML_VERSION)),
+        "libxml2": ".".join(map(str, lxml.etree.LIBXML_VERSION)),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "max_rss_bytes": max_rss,
+    }
+
+
+def run(
+    sizes: Tuple[int, ...] = SIZES,
+    flavours: Tuple[str, ...] = FLAVOURS,
+    names: Optional[List[str]] = None,
+    repeat: int = 5,
+    lines: int = 40,
+    words: int = 10,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """Runs the benchmarks and returns the result document
+
+    :param sizes: (optional) numbers of pages of the generated documents
+    :param flavours: (optional) flavours of the generated documents
+    :param names: (optional) names of the benchmarks to run. Default is all.
+    :param repeat: (optional) number of timed runs of each benchmark
+    :param lines: (optional) lines per page
+    :param words: (optional) words per line
+    :param progress: (optional) called with every record when it's done
+    :return: dict with "metadata" and "results"
+    """
+    names = names or list(BENCHMARKS)
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for flavour in flavours:
+            for pages in sizes:
+                path = os.path.join(directory, f"{flavour}_{pages}.hocr")
+                size = write(path, pages, lines, words, flavour)
+                for name in names:
+                    record = {
+                        "benchmark": name,
+                        "flavour": flavour,
+                        "pages": pages,
+                        "words": pages * lines * words,
+                        "bytes": size,
+                    }
+                    record.update(measure(BENCHMARKS[name], path, repeat))
+                    results.append(record)
+                    if progress is not None:
+                        progress(record)
+
+    return {"metadata": metadata(), "results": results}
+
+
+def compare(
+    results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float
+) -> List[str]:
+    """Returns a message for every benchmark slower than in baseline
+
+    :param results: result document of run
+    :param baseline: earlier result document
+    :param tolerance: allowed slowdown of the best time, e.g. 0.2 for 20%
+    :return: list of messages, empty if nothing regressed
+    """
+
+    def key(record: Dict[str, Any]) -> Tuple[str, str, int]:
+        return record["benchmark"], record["flavour"], record["pages"]
+
+    before = {key(r): r for r in baseline["results"]}
+    regressions = []
+    for record in results["results"]:
+        old = before.get(key(record))
+        if old is None or old["best"] <= 0:
+            continue
+        ratio = record["best"] / old["best"]
+        if ratio > 1 + tolerance:
+            name, flavour, pages = key(record)
+            regressions.append(
+                f"{name} ({flavour}, {pages} pages): "
+                f"{old['best']:.6f}s -> {record['best']:.6f}s ({ratio:.2f}x)"
+            )
+
+    return regressions
+
+
+def _print_record(record: Dict[str, Any]) -> None:
+    print(
+        f"{record['benchmark']:<12} {record['flavour']:<10} "
+        f"{record['pages']:>5} pages  best {record['best'] * 1000:10.3f} ms  "
+        f"median {record['median'] * 1000:10.3f} ms  "
+        f"peak {record['peak_python_bytes'] / 1024:10.1f} KiB",
+        file=sys.stderr,
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        type=lambda s: tuple(int(v) for v in s.split(",")),
+        default=SIZES,
+        help="comma separated numbers of pages, default %(default)s",
+    )
+    parser.add_argument(
+        "--flavours",
+        type=lambda s: tuple(s.split(",")),
+        default=FLAVOURS,
+        help="comma separated flavours, default all",
+    )
+    parser.add_argument(
+        "--benchmarks",
+        type=lambda s: s.split(","),
+        default=None,
+        help=f"comma separated benchmarks, default all: {','.join(BENCHMARKS)}",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--lines", type=int, default=40, help="lines per page")
+    parser.add_argument("--words", type=int, default=10, help="words per line")
+    parser.add_argument("--output", help="JSON file for the results, default stdout")
+    parser.add_argument("--compare", help="JSON file of an earlier run")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="allowed slowdown for --compare, default %(default)s",
+    )
+    args = parser.parse_args(argv)
+
+    for flavour in args.flavours:
+        if flavour not in FLAVOURS:
+            parser.error(f"unknown flavour {flavour}")
+    for name in args.benchmarks or []:
+        if name not in BENCHMARKS:
+            parser.error(f"unknown benchmark {name}")
+
+    results = run(
+        args.sizes,
+        args.flavours,
+        args.benchmarks,
+        args.repeat,
+        args.lines,
+        args.words,
+        progress=_print_record,
+    )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for message in regressions:
+            print("slower:", message, file=sys.stderr)
+        if regressions:
+            return 1
+
+    return 0
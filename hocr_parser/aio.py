@@ -0,0 +1,143 @@
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Optional
+import asyncio
+import os
+import weakref
+
+from .hocr_document import HOCRDocument
+from .hocr_node import HOCRNode
+
+# marks the end of the page generator; StopIteration can't cross a future
+_DONE = object()
+
+
+class Loader:
+    """Loads HOCRDocuments for asyncio code without blocking the event loop
+
+    Reading and parsing a file happens in a thread pool with a fixed number
+    of threads. lxml releases the GIL while parsing, so several documents are
+    parsed in parallel. Trees can't be moved between processes, which rules
+    out a process pool.
+
+    Additionally, the number of jobs submitted to the thread pool at the
+    same time is limited per event loop. Coroutines waiting for a free slot
+    don't hold any resources, so many documents can be requested at once
+    without queuing their file contents in memory.
+
+    >>> loader = Loader(max_workers=4)
+    >>> documents = await asyncio.gather(*(loader.open(p) for p in paths))
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, limit: Optional[int] = None):
+        """Creates a new loader with its own thread pool
+
+        :param max_workers: (optional) number of threads. Default is the
+            number of CPUs + 4, but at most 32.
+        :param limit: (optional) maximum number of jobs submitted to the
+            pool at the same time. Default is the number of threads.
+        """
+        # same default as ThreadPoolExecutor in Python 3.8+
+        max_workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="hocr-parser"
+        )
+        self.limit = limit or max_workers
+        self._semaphores: "weakref.WeakKeyDictionary[Any, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        # semaphores belong to the loop they are first used in
+        loop = asyncio.get_event_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.limit)
+        return semaphore
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Runs func(*args) in the thread pool, respecting the limit
+
+        :return: the return value of func
+        """
+        return await self._run(self.executor, func, *args)
+
+    async def _run(
+        self, executor: Executor, func: Callable[..., Any], *args: Any
+    ) -> Any:
+        async with self._semaphore():
+            loop = asyncio.get_event_loop()
+            return await loop.run_in_executor(executor, func, *args)
+
+    async def open(
+        self, filename: str, encoding: str = "utf-8", **parser_options: bool
+    ) -> HOCRDocument:
+        """Reads and parses the HOCR file `filename` in the thread pool
+
+        :param filename: Filename of the input HOCR document
+        :param encoding: (optional) Encoding of the document. Default is utf-8.
+        :param parser_options: (optional) see HOCRDocument.__init__
+        :return: HOCRDocument
+        :raises EncodingError: see HOCRDocument.__init__
+        :raises EmptyDocumentException: see HOCRDocument.__init__
+        """
+        # reading and parsing in one job, so at most `limit` files are held
+        # in memory at the same time
+        return await self.run(
+            lambda: HOCRDocument(filename, encoding, **parser_options)
+        )
+
+    async def iterpages(
+        self, filename: str, encoding: str = "utf-8", **parser_options: bool
+    ) -> AsyncIterator[HOCRNode]:
+        """Parses the file incrementally and yields its pages asynchronously
+
+        This is the asynchronous version of HOCRDocument.iterpages; the same
+        rules about keeping references to yielded pages apply. The file is
+        parsed in the thread pool up to the end of the next page whenever a
+        page is requested, so the first page is available as soon as it has
+        been parsed. The parser never runs while the caller works with the
+        current page.
+
+        libxml2 doesn't allow continuing a parse in another thread, so each
+        iteration gets a thread of its own instead of using the thread pool.
+        It still counts towards the limit of the loader while parsing.
+
+        >>> async for page in loader.iterpages("book.hocr"):
+        ...     await response.write(page.ocr_text)
+
+        :param filename: Filename of the input HOCR document
+        :param encoding: (optional) Encoding of the document. Default is utf-8.
+        :param parser_options: (optional) see HOCRDocument.__init__
+        :raises EncodingError: see HOCRDocument.iterpages
+        :raises EmptyDocumentException: see HOCRDocument.iterpages
+        """
+        pages = HOCRDocument.iterpages(filename, encoding, **parser_options)
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="hocr-parser")
+        try:
+            while True:
+                page = await self._run(executor, next, pages, _DONE)
+                if page is _DONE:
+                    break
+                yield page
+        finally:
+            # closes the file; also frees the tree if the caller stops early
+            await self._run(executor, pages.close)
+            executor.shutdown(wait=False)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Shuts down the thread pool, see ThreadPoolExecutor.shutdown"""
+        self.executor.shutdown(wait=wait)
+
+
+_default_loader: Optional[Loader] = None
+
+
+def default_loader() -> Loader:
+    """Returns the loader used by HOCRDocument.aopen and aiterpages
+
+    It's created on first use with the default number of threads.
+    """
+    global _default_loader
+    if _default_loader is None:
+        _default_loader = Loader()
+    return _default_loader
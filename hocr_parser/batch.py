@@ -0,0 +1,191 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Type
+import glob
+import os
+
+from .exceptions import EmptyDocumentException, EncodingError, MalformedOCRException
+from .hocr_document import HOCRDocument
+
+# exceptions that are collected per file instead of aborting the batch
+ERRORS: Tuple[Type[BaseException], ...] = (
+    EncodingError,
+    EmptyDocumentException,
+    MalformedOCRException,
+    OSError,
+)
+
+# files are grouped into chunks of about this size, see chunk_paths
+CHUNK_BYTES = 8 << 20
+
+
+class BatchResult:
+    """Result of processing one file
+
+    Either value is the return value of the extraction function, or error is
+    the exception raised while parsing or extracting.
+    """
+
+    def __init__(
+        self, path: str, value: Any = None, error: Optional[BaseException] = None
+    ):
+        self.path = path
+        self.value = value
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        """Returns True if the file was processed without error"""
+        return self.error is None
+
+    def __repr__(self):
+        if self.ok:
+            return f"BatchResult({self.path!r}, value={self.value!r})"
+        return f"BatchResult({self.path!r}, error={self.error!r})"
+
+
+def expand_paths(paths: Iterable[str]) -> List[str]:
+    """Expands glob patterns in paths
+
+    Patterns are expanded with glob, "**" matches any number of directories.
+    The matches of each pattern are sorted. Paths without glob characters are
+    kept as they are, even if they don't exist, so that the error is reported
+    for them.
+
+    :param paths: file names and glob patterns
+    :return: list of file names, without duplicates
+    """
+    expanded: Dict[str, None] = {}
+    for path in paths:
+        if glob.has_magic(path):
+            for match in sorted(glob.iglob(path, recursive=True)):
+                expanded[match] = None
+        else:
+            expanded[path] = None
+
+    return list(expanded)
+
+
+def chunk_paths(paths: List[str], chunk_bytes: int) -> List[List[str]]:
+    """Groups consecutive paths into chunks of about chunk_bytes in total
+
+    Sending each file to a worker separately costs more than parsing small
+    files, while large chunks of big files keep workers idle at the end of
+    the batch. Files are therefore added to a chunk until its total size
+    reaches chunk_bytes; files of at least that size get a chunk of their own.
+
+    :param paths: file names
+    :param chunk_bytes: target size of the chunks
+    :return: list of chunks, in the order of paths
+    """
+    chunks: List[List[str]] = []
+    chunk: List[str] = []
+    size = 0
+
+    for path in paths:
+        try:
+            file_size = os.path.getsize(path)
+        except OSError:
+            # the worker reports the error
+            file_size = 0
+
+        if chunk and size + file_size > chunk_bytes:
+            chunks.append(chunk)
+            chunk, size = [], 0
+
+        chunk.append(path)
+        size += file_size
+
+    if chunk:
+        chunks.append(chunk)
+
+    return chunks
+
+
+def _process_chunk(
+    paths: List[str],
+    extract: Callable[[HOCRDocument], Any],
+    encoding: str,
+    errors: Tuple[Type[BaseException], ...],
+    parser_options: Dict[str, bool],
+) -> List[BatchResult]:
+    results = []
+    for path in paths:
+        try:
+            document = HOCRDocument(path, encoding, **parser_options)
+            results.append(BatchResult(path, value=extract(document)))
+        except errors as e:
+            results.append(BatchResult(path, error=e))
+
+    return results
+
+
+def process(
+    paths: Iterable[str],
+    extract: Callable[[HOCRDocument], Any],
+    ordered: bool = True,
+    encoding: str = "utf-8",
+    max_workers: Optional[int] = None,
+    chunk_bytes: Optional[int] = None,
+    errors: Tuple[Type[BaseException], ...] = ERRORS,
+    **parser_options: bool,
+) -> Iterator[BatchResult]:
+    """Parses files in a process pool and applies extract to each document
+
+    The files are split into chunks (see chunk_paths), which are processed by
+    a ProcessPoolExecutor. Results are yielded as soon as they are available:
+    in the order of the paths if ordered is True, otherwise in the order in
+    which the chunks complete.
+
+    Exceptions of the types in errors, raised while parsing a file or by
+    extract, are stored in the result of the file and the batch continues.
+    Any other exception aborts the batch and is raised by the iterator.
+
+    The documents are parsed in the worker processes and handed to extract
+    there. lxml trees can't be pickled, so only the return values of extract
+    are sent back.
+
+    >>> def word_count(document):
+    ...     return len(document.body.words)
+    >>> for result in batch.process(["scans/**/*.hocr"], word_count):
+    ...     print(result.path, result.value if result.ok else result.error)
+
+    :param paths: file names and glob patterns, see expand_paths
+    :param extract: function called with the HOCRDocument of each file in
+        the worker process. It, and its return value, must be picklable, so
+        it has to be defined at module level.
+    :param ordered: (optional) yield the results in the order of the paths.
+        Default is True.
+    :param encoding: (optional) Encoding of the files. Default is utf-8.
+    :param max_workers: (optional) number of worker processes. Default is the
+        number of CPUs. With 0, all files are processed in this process.
+    :param chunk_bytes: (optional) target size of the chunks sent to the
+        workers. Default is CHUNK_BYTES, reduced for small batches so that
+        every worker gets several chunks.
+    :param errors: (optional) exception types that are collected per file.
+        Default is ERRORS.
+    :param parser_options: (optional) see HOCRDocument.__init__
+    :return: iterator over one BatchResult per file
+    """
+    files = expand_paths(paths)
+    args = (extract, encoding, errors, parser_options)
+
+    if max_workers == 0:
+        for path in files:
+            yield from _process_chunk([path], *args)
+        return
+
+    workers = max_workers or os.cpu_count() or 1
+    if chunk_bytes is None:
+        total = sum(os.path.getsize(f) for f in files if os.path.isfile(f))
+        chunk_bytes = max(min(CHUNK_BYTES, total // (workers * 4)), 1)
+
+    chunks = chunk_paths(files, chunk_bytes)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_process_chunk, chunk, *args) for chunk in chunks]
+        try:
+            for future in futures if ordered else as_completed(futures):
+                yield from future.result()
+        finally:
+            # don't start the remaining chunks if the iteration is aborted
+            for future in futures:
+                future.cancel()
@@ -1,11 +1,31 @@
-from typing import Optional, Sequence, Tuple
+from typing import Iterable, Optional, Tuple
+
+_new = object.__new__
+_setattr = object.__setattr__
 
 
 class BBox:
+    """Immutable bounding box in XYXY format
+
+    BBox instances are hashable and can't be modified after creation. The
+    attributes are stored in slots, so instances don't carry a __dict__.
+    """
+
+    __slots__ = ("x1", "y1", "x2", "y2")
+
+    # declared for type checkers; the values are set with object.__setattr__
+    x1: int
+    y1: int
+    x2: int
+    y2: int
+
     def __init__(self, x: Tuple[int, int, int, int]):
         """
         Creates a new bbox from given tuple x containing four integer values.
 
+        The argument is validated; use BBox.from_ints to skip validation for
+        values that are known to be ints.
+
         :param x: tuple with four integer values representing the upper left
             and lower right corner of the bbox (in order XYXY)
         :raises TypeError: f the argument x has no length
@@ -30,10 +50,43 @@ class BBox:
             raise ValueError("Values are not integers.")
 
         # all OK, save values
-        self.x1 = x[0]
-        self.y1 = x[1]
-        self.x2 = x[2]
-        self.y2 = x[3]
+        _setattr(self, "x1", x[0])
+        _setattr(self, "y1", x[1])
+        _setattr(self, "x2", x[2])
+        _setattr(self, "y2", x[3])
+
+    @classmethod
+    def from_ints(cls, x1: int, y1: int, x2: int, y2: int) -> "BBox":
+        """Creates a new bbox from four ints without validating them
+
+        Meant for callers that have already parsed the coordinates, e.g.
+        HOCRNode.bbox. Use the regular constructor for any other input.
+
+        :param x1: x coordinate of the upper left corner
+        :param y1: y coordinate of the upper left corner
+        :param x2: x coordinate of the lower right corner
+        :param y2: y coordinate of the lower right corner
+        :return: BBox instance
+        """
+        bbox = _new(cls)
+        _setattr(bbox, "x1", x1)
+        _setattr(bbox, "y1", y1)
+        _setattr(bbox, "x2", x2)
+        _setattr(bbox, "y2", y2)
+        return bbox
+
+    def __setattr__(self, name: str, value: object):
+        raise AttributeError("BBox is immutable")
+
+    def __delattr__(self, name: str):
+        raise AttributeError("BBox is immutable")
+
+    def __reduce__(self):
+        # the default for slotted classes would restore the state by setattr
+        return (type(self), ((self.x1, self.y1, self.x2, self.y2),))
+
+    def __hash__(self):
+        return hash((self.x1, self.y1, self.x2, self.y2))
 
     def __repr__(self):
         return "BBox(({}, {}, {}, {}))".format(self.x1, self.y1, self.x2, self.y2)
@@ -62,23 +115,46 @@ class BBox:
     def height(self) -> int:
         return self.y2 - self.y1
 
+    def relative_to(self, parent: "BBox") -> "BBox":
+        """Returns the box relative to the upper left corner of parent
+
+        See HOCRNode.rel_bbox; BBoxArray.relative_to does the same for many
+        boxes at once.
+
+        :param parent: box whose upper left corner becomes the origin
+        :return: new BBox
+        """
+        x, y = parent.x1, parent.y1
+        return BBox.from_ints(self.x1 - x, self.y1 - y, self.x2 - x, self.y2 - y)
+
     @staticmethod
-    def max_bbox(boxes: Sequence["BBox"]) -> Optional["BBox"]:
+    def max_bbox(boxes: Iterable["BBox"]) -> Optional["BBox"]:
         """Returns the maximum (outer) BBox for a given list of BBoxes
 
         In other words, calculates a new, possibly bigger BBox that contains
-        all boxes passed to this function.
+        all boxes passed to this function. The boxes are only iterated once,
+        so any iterable (e.g. a generator) can be passed.
 
-        :param boxes: Sequence of BBox instances
+        For large numbers of boxes, see BBoxArray.union.
+
+        :param boxes: Iterable of BBox instances
         :return: BBox, or None if the input list is empty
         """
-        if len(boxes) == 0:
+        iterator = iter(boxes)
+        first = next(iterator, None)
+        if first is None:
             return None
 
         # looking for smallest x1, y1 and largest x2, y2
-        x1 = min([b.x1 for b in boxes])
-        y1 = min([b.y1 for b in boxes])
-        x2 = max([b.x2 for b in boxes])
-        y2 = max([b.y2 for b in boxes])
-
-        return BBox((x1, y1, x2, y2))
+        x1, y1, x2, y2 = first.x1, first.y1, first.x2, first.y2
+        for b in iterator:
+            if b.x1 < x1:
+                x1 = b.x1
+            if b.y1 < y1:
+                y1 = b.y1
+            if b.x2 > x2:
+                x2 = b.x2
+            if b.y2 > y2:
+                y2 = b.y2
+
+        return BBox.from_ints(x1, y1, x2, y2)
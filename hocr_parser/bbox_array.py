@@ -0,0 +1,259 @@
+from array import array
+from typing import Any, Iterable, Iterator, List, Optional, Union
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    raise ImportError("BBoxArray requires NumPy: pip install numpy")
+
+from .bbox import BBox
+from .text import get_ocr_class
+
+
+class BBoxArray:
+    """Collection of bounding boxes backed by an N×4 integer array
+
+    The boxes are stored in XYXY format in the int64 NumPy array `boxes`, one
+    row per box. All operations work on the whole array at once, so they run
+    in NumPy instead of looping over BBox objects in Python.
+
+    Operations that return boxes (translate, scale, relative_to, ...) return
+    new BBoxArray instances; the array of an instance is never modified.
+
+    Requires NumPy, which is not installed with hocr-parser by default.
+    """
+
+    def __init__(self, boxes: Any = ()):
+        """Creates a new BBoxArray from an array-like with four values per box
+
+        :param boxes: (optional) anything NumPy can convert to an array of
+            shape (N, 4), e.g. a list of 4-tuples. Default is no boxes.
+        :raises ValueError: If boxes can't be converted to shape (N, 4)
+        """
+        boxes = numpy.asarray(boxes, dtype=numpy.int64)
+        if boxes.size == 0:
+            boxes = boxes.reshape(0, 4)
+        if boxes.ndim != 2 or boxes.shape[1] != 4:
+            raise ValueError("boxes must have the shape (N, 4)")
+
+        self.boxes = boxes
+
+    @classmethod
+    def from_bboxes(cls, bboxes: Iterable[BBox]) -> "BBoxArray":
+        """Creates a new BBoxArray from BBox instances"""
+        values = array("q")
+        for b in bboxes:
+            values.extend((b.x1, b.y1, b.x2, b.y2))
+
+        return cls(numpy.frombuffer(values, dtype=numpy.int64).reshape(-1, 4))
+
+    @classmethod
+    def from_node(cls, node: Any, ocr_class: Optional[str] = None) -> "BBoxArray":
+        """Collects the boxes of all elements in the subtree of node
+
+        Elements without a bbox are skipped. The node itself is included.
+
+        :param node: HOCRNode whose subtree is searched
+        :param ocr_class: (optional) only collect boxes of elements with this
+            ocr class, e.g. "ocrx_word"
+        :return: BBoxArray with the boxes in document order
+        """
+        values = array("q")
+        for element in node.iter():
+            if element.get("title") is None:
+                continue
+            if ocr_class is not None and get_ocr_class(element) != ocr_class:
+                continue
+
+            bbox = element._parse_bbox(element._properties)
+            if bbox is not None:
+                values.extend((bbox.x1, bbox.y1, bbox.x2, bbox.y2))
+
+        return cls(numpy.frombuffer(values, dtype=numpy.int64).reshape(-1, 4))
+
+    @classmethod
+    def from_document(
+        cls, document: Any, ocr_class: Optional[str] = None
+    ) -> "BBoxArray":
+        """Collects the boxes of all elements in the body of a HOCRDocument
+
+        :param document: HOCRDocument
+        :param ocr_class: (optional) see from_node
+        :return: BBoxArray, empty if the document has no body
+        """
+        if document.body is None:
+            return cls()
+
+        return cls.from_node(document.body, ocr_class=ocr_class)
+
+    def __len__(self) -> int:
+        return len(self.boxes)
+
+    def __getitem__(self, index: int) -> BBox:
+        x1, y1, x2, y2 = self.boxes[index].tolist()
+        return BBox.from_ints(x1, y1, x2, y2)
+
+    def __iter__(self) -> Iterator[BBox]:
+        return iter(self.to_bboxes())
+
+    def __repr__(self):
+        return f"BBoxArray({self.boxes.tolist()})"
+
+    def to_bboxes(self) -> List[BBox]:
+        """Returns the boxes as list of BBox instances"""
+        return [BBox.from_ints(*row) for row in self.boxes.tolist()]
+
+    @property
+    def x1(self) -> Any:
+        return self.boxes[:, 0]
+
+    @property
+    def y1(self) -> Any:
+        return self.boxes[:, 1]
+
+    @property
+    def x2(self) -> Any:
+        return self.boxes[:, 2]
+
+    @property
+    def y2(self) -> Any:
+        return self.boxes[:, 3]
+
+    @property
+    def width(self) -> Any:
+        return self.x2 - self.x1
+
+    @property
+    def height(self) -> Any:
+        return self.y2 - self.y1
+
+    def area(self) -> Any:
+        """Returns the area of every box; inverted boxes have an area of 0"""
+        width = numpy.clip(self.width, 0, None)
+        height = numpy.clip(self.height, 0, None)
+        return width * height
+
+    def union(self) -> Optional[BBox]:
+        """Returns the smallest BBox containing all boxes, like BBox.max_bbox
+
+        :return: BBox, or None if the array is empty
+        """
+        if len(self) == 0:
+            return None
+
+        x1, y1 = self.boxes[:, :2].min(axis=0).tolist()
+        x2, y2 = self.boxes[:, 2:].max(axis=0).tolist()
+        return BBox.from_ints(x1, y1, x2, y2)
+
+    def intersection(self) -> Optional[BBox]:
+        """Returns the area covered by all boxes
+
+        :return: BBox, or None if the array is empty or the boxes don't have
+            a common area
+        """
+        if len(self) == 0:
+            return None
+
+        x1, y1 = self.boxes[:, :2].max(axis=0).tolist()
+        x2, y2 = self.boxes[:, 2:].min(axis=0).tolist()
+        if x1 > x2 or y1 > y2:
+            return None
+
+        return BBox.from_ints(x1, y1, x2, y2)
+
+    def _intersection_areas(self, other: "BBoxArray") -> Any:
+        a, b = self.boxes[:, None, :], other.boxes[None, :, :]
+        x1 = numpy.maximum(a[..., 0], b[..., 0])
+        y1 = numpy.maximum(a[..., 1], b[..., 1])
+        width = numpy.minimum(a[..., 2], b[..., 2]) - x1
+        height = numpy.minimum(a[..., 3], b[..., 3]) - y1
+        return numpy.clip(width, 0, None) * numpy.clip(height, 0, None)
+
+    def iou(self, other: Optional["BBoxArray"] = None) -> Any:
+        """Returns the matrix of intersection over union values
+
+        :param other: (optional) boxes to compare with. Default is self.
+        :return: float array of shape (len(self), len(other)); entry [i, j]
+            is the IoU of box i of self and box j of other. Pairs with a union
+            area of 0 have an IoU of 0.
+        """
+        other = self if other is None else other
+        intersection = self._intersection_areas(other)
+        union = self.area()[:, None] + other.area()[None, :] - intersection
+
+        result = numpy.zeros(intersection.shape, dtype=numpy.float64)
+        numpy.divide(intersection, union, out=result, where=union > 0)
+        return result
+
+    def contains(self, other: Union["BBoxArray", BBox]) -> Any:
+        """Tests which boxes of self contain which boxes of other
+
+        Boxes on the border count as contained.
+
+        :param other: BBoxArray, or a single BBox
+        :return: bool array of shape (len(self), len(other)), or of shape
+            (len(self),) if other is a single BBox
+        """
+        if isinstance(other, BBox):
+            single = BBoxArray([(other.x1, other.y1, other.x2, other.y2)])
+            return self.contains(single)[:, 0]
+
+        a, b = self.boxes[:, None, :], other.boxes[None, :, :]
+        return (
+            (a[..., 0] <= b[..., 0])
+            & (a[..., 1] <= b[..., 1])
+            & (a[..., 2] >= b[..., 2])
+            & (a[..., 3] >= b[..., 3])
+        )
+
+    def within(self, bbox: BBox) -> Any:
+        """Tests which boxes lie completely inside of bbox
+
+        :param bbox: the outer BBox
+        :return: bool array of shape (len(self),)
+        """
+        return (
+            (self.x1 >= bbox.x1)
+            & (self.y1 >= bbox.y1)
+            & (self.x2 <= bbox.x2)
+            & (self.y2 <= bbox.y2)
+        )
+
+    def contains_point(self, x: int, y: int) -> Any:
+        """Tests which boxes contain the point (x, y), borders included
+
+        :return: bool array of shape (len(self),)
+        """
+        return (self.x1 <= x) & (self.y1 <= y) & (self.x2 >= x) & (self.y2 >= y)
+
+    def translate(self, dx: int, dy: int) -> "BBoxArray":
+        """Returns the boxes moved by dx and dy"""
+        return BBoxArray(self.boxes + numpy.array([dx, dy, dx, dy]))
+
+    def scale(self, sx: float, sy: Optional[float] = None) -> "BBoxArray":
+        """Returns the boxes with all coordinates scaled and rounded to ints
+
+        :param sx: factor for the x coordinates
+        :param sy: (optional) factor for the y coordinates. Default is sx.
+        """
+        sy = sx if sy is None else sy
+        scaled = self.boxes * numpy.array([sx, sy, sx, sy])
+        return BBoxArray(numpy.rint(scaled))
+
+    def relative_to(self, parents: Union["BBoxArray", BBox]) -> "BBoxArray":
+        """Returns the boxes relative to the upper left corner of parents
+
+        This is the vectorized version of HOCRNode.rel_bbox.
+
+        :param parents: a single BBox all boxes are relative to, or a
+            BBoxArray of the same length with one parent box per box
+        :raises ValueError: If parents has a different length than self
+        """
+        if isinstance(parents, BBox):
+            offset = numpy.array([parents.x1, parents.y1])
+        else:
+            if len(parents) != len(self):
+                raise ValueError("parents must have the same length")
+            offset = parents.boxes[:, :2]
+
+        return BBoxArray(self.boxes - numpy.tile(offset, 2))
@@ -0,0 +1,84 @@
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional
+
+import lxml.etree
+
+
+class ClassIndex:
+    """Index of the elements of a tree by ocr class and id
+
+    The index is built in a single pass over the tree. It stores all elements
+    in document order together with the end of their subtree, and for every
+    class name starting with "ocr" the (sorted) positions of the elements
+    having that class. The elements of a class within the subtree of any
+    element are therefore one slice of that list, found by binary search.
+
+    The index is a snapshot of the tree: it isn't updated when elements are
+    added, moved or removed. HOCRNode.set drops the index of the tree when
+    the class or id attribute is changed; after other structural changes it
+    has to be rebuilt (see HOCRDocument.build_index).
+    """
+
+    def __init__(self, root: lxml.etree._Element):
+        """Builds the index for the subtree of root
+
+        :param root: root element of the indexed tree
+        """
+        # all elements in document order, which also keeps their proxies and
+        # thereby their ids alive
+        self.elements: List[Any] = []
+        # position after the last descendant of the element at each position
+        self.ends: List[int] = []
+        # maps ocr class -> positions of the elements with that class
+        self.classes: Dict[str, List[int]] = {}
+        # maps id -> first element with that id
+        self.ids: Dict[str, Any] = {}
+        self._positions: Dict[int, int] = {}
+
+        stack: List[int] = []
+        for event, element in lxml.etree.iterwalk(root, events=("start", "end")):
+            if event == "end":
+                self.ends[stack.pop()] = len(self.elements)
+                continue
+
+            position = len(self.elements)
+            self.elements.append(element)
+            self.ends.append(position + 1)
+            self._positions[id(element)] = position
+            stack.append(position)
+
+            # dict.fromkeys drops duplicate class names, keeping the order
+            for class_ in dict.fromkeys((element.get("class") or "").split()):
+                if class_.startswith("ocr"):
+                    self.classes.setdefault(class_, []).append(position)
+
+            element_id = element.get("id")
+            if element_id is not None and element_id not in self.ids:
+                self.ids[element_id] = element
+
+    def __len__(self) -> int:
+        """Returns the number of indexed elements"""
+        return len(self.elements)
+
+    def find_class(self, node: Any, class_name: str) -> Optional[List[Any]]:
+        """Returns the elements with class_name in the subtree of node
+
+        Like lxml's find_class, node itself is included if it has the class.
+
+        :param node: element of the indexed tree
+        :param class_name: class name starting with "ocr", e.g. "ocrx_word"
+        :return: list of elements in document order, or None if the node
+            isn't part of the index or the class name isn't indexed
+        """
+        position = self._positions.get(id(node))
+        if position is None or not class_name.startswith("ocr"):
+            return None
+
+        positions = self.classes.get(class_name, [])
+        start = bisect_left(positions, position)
+        end = bisect_left(positions, self.ends[position], start)
+        return [self.elements[p] for p in positions[start:end]]
+
+    def get_element_by_id(self, element_id: str) -> Optional[Any]:
+        """Returns the first element with the given id, or None"""
+        return self.ids.get(element_id)
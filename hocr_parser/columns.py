@@ -0,0 +1,306 @@
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import sys
+
+from .text import START, TEXT, get_ocr_class, iter_text_events
+
+# Numeric codes for the ocr_class column. 0 is used for all ocr classes not
+# listed here. New classes must only ever be appended to keep codes stable.
+OCR_CLASSES = (
+    "ocr_page",
+    "ocr_carea",
+    "ocr_par",
+    "ocr_line",
+    "ocrx_word",
+    "ocr_header",
+    "ocr_footer",
+    "ocr_caption",
+    "ocr_textfloat",
+    "ocr_separator",
+    "ocr_photo",
+    "ocr_image",
+    "ocr_linedrawing",
+    "ocr_math",
+    "ocr_chem",
+    "ocr_table",
+    "ocr_float",
+    "ocr_dropcap",
+    "ocr_glyph",
+    "ocr_cinfo",
+    "ocrx_cinfo",
+    "ocrx_block",
+    "ocrx_line",
+    "ocr_document",
+    "ocr_title",
+    "ocr_author",
+    "ocr_abstract",
+    "ocr_part",
+    "ocr_chapter",
+    "ocr_section",
+    "ocr_subsection",
+    "ocr_subsubsection",
+    "ocr_blockquote",
+    "ocr_display",
+    "ocr_noise",
+)
+OCR_CLASS_CODES: Dict[str, int] = {name: i for i, name in enumerate(OCR_CLASSES, 1)}
+
+# classes whose running index is stored for every row
+_STRUCTURE = {
+    "ocr_page": "page",
+    "ocr_carea": "carea",
+    "ocr_par": "par",
+    "ocr_line": "line",
+}
+
+
+def columns_to_numpy(
+    columns: Dict[str, array], specs: Tuple[Tuple[str, str], ...], length: int
+) -> Any:
+    """Copies columns of equal length into a NumPy structured array
+
+    Requires NumPy, which is not installed with hocr-parser by default.
+
+    :param columns: dict mapping column names to array.arrays
+    :param specs: (name, typecode) of the columns in field order
+    :param length: number of values of every column
+    :return: numpy.ndarray with one record per row
+    """
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("to_numpy requires NumPy: pip install numpy")
+
+    dtype = numpy.dtype([(name, numpy.dtype(typecode)) for name, typecode in specs])
+    records = numpy.empty(length, dtype=dtype)
+    if length > 0:
+        for name, _ in specs:
+            records[name] = numpy.frombuffer(columns[name], dtype=dtype[name])
+
+    return records
+
+
+class Columns:
+    """Column-oriented table of the ocr elements of a tree
+
+    Every element with an ocr class becomes one row, in document order. The
+    values of each column are stored in one contiguous array.array:
+    - x1, y1, x2, y2: bbox of the element, -1 if the element has no bbox
+    - confidence: HOCRNode.confidence, NaN if the element has none
+    - page, carea, par, line: index of the ocr_page, ocr_carea, ocr_par and
+      ocr_line element containing the row (or being the row), counted in
+      document order, or -1 if there is none
+    - parent: row index of the closest ancestor with an ocr class, or -1
+    - ocr_class: code of the ocr class, see OCR_CLASS_CODES (0 for unknown)
+    - text_start, text_end: span of the element's ocr_text in `text`
+
+    The ids of the elements are kept in the list `ids`, and `text` holds the
+    ocr_text of the whole tree, so text[text_start[i]:text_end[i]] is the
+    ocr_text of row i.
+    """
+
+    COLUMNS: Tuple[Tuple[str, str], ...] = (
+        ("x1", "q"),
+        ("y1", "q"),
+        ("x2", "q"),
+        ("y2", "q"),
+        ("confidence", "d"),
+        ("page", "q"),
+        ("carea", "q"),
+        ("par", "q"),
+        ("line", "q"),
+        ("parent", "q"),
+        ("ocr_class", "B"),
+        ("text_start", "q"),
+        ("text_end", "q"),
+    )
+
+    MAGIC = b"HOCRCOL\x01"
+
+    def __init__(self):
+        self.columns: Dict[str, array] = {
+            name: array(typecode) for name, typecode in self.COLUMNS
+        }
+        self.ids: List[Optional[str]] = []
+        self.text = ""
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, name: str) -> array:
+        return self.columns[name]
+
+    def text_of(self, row: int) -> str:
+        """Returns the ocr_text of the element in the given row"""
+        start = self.columns["text_start"][row]
+        end = self.columns["text_end"][row]
+        return self.text[start:end]
+
+    @classmethod
+    def from_node(cls, node: Any) -> "Columns":
+        """Builds the table for the subtree of node in a single pass
+
+        Titles are parsed directly; values cached in the DocumentCache are
+        neither used nor added.
+
+        :param node: root HOCRNode of the subtree
+        :return: Columns instance
+        """
+        table = cls()
+        columns = table.columns
+        x1, y1, x2, y2 = columns["x1"], columns["y1"], columns["x2"], columns["y2"]
+        confidence = columns["confidence"]
+        parent = columns["parent"]
+        ocr_class = columns["ocr_class"]
+        text_start, text_end = columns["text_start"], columns["text_end"]
+        structure = {name: columns[name] for name in _STRUCTURE.values()}
+
+        # running counters and stacks of open indices of the structure classes
+        counters = {name: -1 for name in _STRUCTURE.values()}
+        open_indices: Dict[str, List[int]] = {name: [] for name in _STRUCTURE.values()}
+        # stack of (element, row) of open ocr elements
+        rows: List[Tuple[Any, int]] = []
+
+        chunks = []
+        for event in iter_text_events(node):
+            kind = event[0]
+            if kind is TEXT:
+                chunks.append(event[1])
+
+            elif kind is START:
+                element = event[1]
+                class_ = get_ocr_class(element)
+                if class_ is None:
+                    continue
+
+                row = len(table.ids)
+                properties = element._parse_properties()
+                bbox = element._parse_bbox(properties)
+                if bbox is None:
+                    x1.append(-1)
+                    y1.append(-1)
+                    x2.append(-1)
+                    y2.append(-1)
+                else:
+                    x1.append(bbox.x1)
+                    y1.append(bbox.y1)
+                    x2.append(bbox.x2)
+                    y2.append(bbox.y2)
+                conf = element._parse_confidence(properties)
+                confidence.append(float("nan") if conf is None else conf)
+
+                name = _STRUCTURE.get(class_)
+                if name is not None:
+                    counters[name] += 1
+                    open_indices[name].append(counters[name])
+                for key, indices in open_indices.items():
+                    structure[key].append(indices[-1] if indices else -1)
+
+                parent.append(rows[-1][1] if rows else -1)
+                ocr_class.append(OCR_CLASS_CODES.get(class_, 0))
+                text_start.append(0)
+                text_end.append(0)
+                table.ids.append(element.get("id"))
+                rows.append((element, row))
+
+            elif rows and rows[-1][0] is event[1]:
+                # END of an ocr element
+                _, row = rows.pop()
+                text_start[row] = event[2]
+                text_end[row] = event[3]
+
+                name = _STRUCTURE.get(get_ocr_class(event[1]) or "")
+                if name is not None:
+                    open_indices[name].pop()
+
+        table.text = "".join(chunks)
+        return table
+
+    def to_bytes(self) -> bytes:
+        """Serialises the table to a compact binary format
+
+        The format starts with MAGIC and the length of a JSON header, which
+        lists the row count, the byte order and the columns with their sizes.
+        The raw column arrays, the ids (as JSON list) and the utf-8 encoded
+        text follow the header.
+
+        :return: the serialised table, see from_bytes
+        """
+        blobs = [self.columns[name].tobytes() for name, _ in self.COLUMNS]
+        ids = json.dumps(self.ids).encode("utf-8")
+        text = self.text.encode("utf-8", "surrogatepass")
+        header = {
+            "rows": len(self),
+            "byteorder": sys.byteorder,
+            "columns": [
+                [name, typecode, len(blob)]
+                for (name, typecode), blob in zip(self.COLUMNS, blobs)
+            ],
+            "ids": len(ids),
+            "text": len(text),
+        }
+        encoded = json.dumps(header).encode("utf-8")
+
+        parts = [self.MAGIC, len(encoded).to_bytes(4, "little"), encoded]
+        parts.extend(blobs)
+        parts.append(ids)
+        parts.append(text)
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Columns":
+        """Restores a table serialised with to_bytes
+
+        :param data: the serialised table
+        :return: Columns instance
+        :raises ValueError: If data isn't a valid serialised table
+        """
+        if not data.startswith(cls.MAGIC):
+            raise ValueError("not a serialised column table")
+
+        position = len(cls.MAGIC)
+
+        def take(size: int) -> bytes:
+            nonlocal position
+            start, end = position, position + size
+            if end > len(data):
+                raise ValueError("serialised column table is truncated")
+            position = end
+            return data[start:end]
+
+        try:
+            length = int.from_bytes(take(4), "little")
+            header = json.loads(take(length).decode("utf-8"))
+            expected = [[name, typecode] for name, typecode in cls.COLUMNS]
+            if [column[:2] for column in header["columns"]] != expected:
+                raise ValueError("columns of the serialised table don't match")
+
+            table = cls()
+            for name, _, size in header["columns"]:
+                column = table.columns[name]
+                column.frombytes(take(size))
+                if header["byteorder"] != sys.byteorder:
+                    column.byteswap()
+                if len(column) != header["rows"]:
+                    raise ValueError("invalid length of column " + name)
+
+            table.ids = json.loads(take(header["ids"]).decode("utf-8"))
+            table.text = take(header["text"]).decode("utf-8", "surrogatepass")
+        except (KeyError, TypeError, UnicodeDecodeError) as e:
+            raise ValueError(f"invalid serialised column table: {e}")
+
+        if position != len(data) or len(table.ids) != header["rows"]:
+            raise ValueError("invalid serialised column table")
+
+        return table
+
+    def to_numpy(self) -> Any:
+        """Returns the columns as NumPy structured array
+
+        The field names and types are the same as the ones of the columns.
+        Requires NumPy, which is not installed with hocr-parser by default.
+
+        :return: numpy.ndarray with one record per row
+        """
+        return columns_to_numpy(self.columns, self.COLUMNS, len(self))
@@ -0,0 +1,115 @@
+from typing import Any, Dict, List, Optional, Tuple
+import hashlib
+import re
+
+import lxml.etree
+
+# same normalisation as lxml.doctestcompare.norm_whitespace
+_WHITESPACE = re.compile(r"[ \t\n][ \t\n]+")
+
+
+def _norm(text: Optional[str]) -> str:
+    """Collapses repeated whitespace and strips text, like the output checker"""
+    if not text:
+        return ""
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def _tag(element: lxml.etree._Element) -> str:
+    """Returns the tag, with markers for comments and processing instructions"""
+    tag = element.tag
+    if tag is lxml.etree.Comment:
+        return "<!--"
+    if tag is lxml.etree.ProcessingInstruction:
+        return "<?"
+    return str(tag)
+
+
+def _attributes(element: lxml.etree._Element) -> Dict[str, str]:
+    if isinstance(element.tag, str):
+        return dict(element.attrib)
+    return {}
+
+
+def nodes_equal(a: lxml.etree._Element, b: lxml.etree._Element) -> bool:
+    """Compares two subtrees with the rules of LHTMLOutputChecker
+
+    Both trees are walked side by side, without serialising and re-parsing
+    them. Two elements are equal if
+    - they have the same tag,
+    - their text and tail are equal after collapsing repeated whitespace and
+      stripping it (so whitespace between tags is ignored),
+    - they have the same attributes with the same values, in any order,
+    - and they have the same number of children, which are pairwise equal.
+
+    Unlike in doctests, "..." is compared literally and isn't a wildcard.
+
+    :param a: root of the first subtree
+    :param b: root of the second subtree
+    :return: True if the subtrees are equivalent
+    """
+    stack: List[Tuple[Any, Any]] = [(a, b)]
+    while stack:
+        a, b = stack.pop()
+        if a is b:
+            continue
+        if a.tag != b.tag or len(a) != len(b):
+            return False
+        if _norm(a.text) != _norm(b.text) or _norm(a.tail) != _norm(b.tail):
+            return False
+        if _attributes(a) != _attributes(b):
+            return False
+        stack.extend(zip(a, b))
+
+    return True
+
+
+def fingerprints(node: lxml.etree._Element) -> Dict[int, Tuple[Any, bytes]]:
+    """Computes the structural fingerprints of node and all its descendants
+
+    The fingerprint of an element is a BLAKE2b digest over everything
+    nodes_equal compares: the tag, the normalised text and tail, the sorted
+    attributes and the fingerprints of the children. Equal subtrees therefore
+    have equal fingerprints, and different fingerprints mean the subtrees are
+    different. Digests are stable across processes and lxml versions.
+
+    The tree is walked once, bottom-up, so computing the fingerprints of all
+    subtrees takes O(n).
+
+    :param node: root of the subtree
+    :return: dict mapping id(element) -> (element, digest) for all elements
+        of the subtree, including comments
+    """
+    result: Dict[int, Tuple[Any, bytes]] = {}
+    # digests of the children of the open elements
+    children: List[List[bytes]] = []
+
+    events = ("start", "end", "comment", "pi")
+    for event, element in lxml.etree.iterwalk(node, events=events):
+        if event == "start":
+            children.append([])
+            continue
+
+        digest = hashlib.blake2b(digest_size=16)
+        attributes = _attributes(element)
+        parts = [_tag(element), _norm(element.text), _norm(element.tail)]
+        parts.append(str(len(attributes)))
+        for name, value in sorted(attributes.items()):
+            parts.append(name)
+            parts.append(value)
+        for part in parts:
+            # prefix the length so that the concatenation is unambiguous
+            data = part.encode("utf-8", "surrogatepass")
+            digest.update(len(data).to_bytes(8, "little"))
+            digest.update(data)
+
+        if event == "end":
+            for child in children.pop():
+                digest.update(child)
+
+        fingerprint: bytes = digest.digest()
+        result[id(element)] = (element, fingerprint)
+        if children:
+            children[-1].append(fingerprint)
+
+    return result
@@ -0,0 +1,239 @@
+from typing import Any, List, Optional, Tuple
+import hashlib
+import os
+import tempfile
+
+from .bbox import BBox
+from .columns import Columns
+from .hocr_document import HOCRDocument
+from .text import get_ocr_class
+
+SUFFIX = ".hocrcache"
+
+
+class CachedDocument:
+    """Extracted model of a HOCR file, loaded from a DiskCache
+
+    All data of the column table (class, bbox, confidence, structure, ids and
+    text of every ocr element, see Columns) is available without parsing the
+    file. The file is only parsed when the HOCRNode tree is needed, e.g. for
+    raw HTML access through document or element.
+    """
+
+    def __init__(
+        self, filename: str, columns: Columns, encoding: str, **parser_options: bool
+    ):
+        self.filename = filename
+        self.columns = columns
+        self.encoding = encoding
+        self.parser_options = parser_options
+        self._document: Optional[Any] = None
+        self._elements: Optional[List[Any]] = None
+
+    def __len__(self) -> int:
+        """Returns the number of ocr elements"""
+        return len(self.columns)
+
+    @property
+    def ocr_text(self) -> str:
+        """Returns the ocr_text of the document body"""
+        return self.columns.text
+
+    def bbox(self, row: int) -> Optional[BBox]:
+        """Returns the bbox of the element in the given row, or None"""
+        x1, y1 = self.columns["x1"][row], self.columns["y1"][row]
+        x2, y2 = self.columns["x2"][row], self.columns["y2"][row]
+        if x1 == y1 == x2 == y2 == -1:
+            return None
+        return BBox.from_ints(x1, y1, x2, y2)
+
+    def to_numpy(self) -> Tuple[Any, str]:
+        """Same as HOCRDocument.to_numpy, but without parsing the file"""
+        return self.columns.to_numpy(), self.columns.text
+
+    @property
+    def document(self) -> Any:
+        """Returns the HOCRDocument of the file, parsing it on first access"""
+        if self._document is None:
+            self._document = HOCRDocument(
+                self.filename, self.encoding, **self.parser_options
+            )
+        return self._document
+
+    def element(self, row: int) -> Any:
+        """Returns the HOCRNode of the given row, parsing the file if needed
+
+        :param row: row of the column table
+        :return: HOCRNode
+        """
+        if self._elements is None:
+            body = self.document.body
+            elements = body.iter() if body is not None else []
+            self._elements = [e for e in elements if get_ocr_class(e) is not None]
+        return self._elements[row]
+
+
+class DiskCache:
+    """Opt-in persistent cache of the column tables of HOCR files
+
+    Reopening a file that is unchanged since it was cached loads its column
+    table (see Columns.to_bytes) from the cache directory instead of parsing
+    the file and its title attributes.
+
+    >>> cache = DiskCache("~/.cache/hocr-parser", max_size=512 << 20)
+    >>> document = cache.open("book.hocr")
+    >>> document.ocr_text, document.columns["confidence"]
+
+    Entries are keyed by the real path, size and modification time of the
+    file, or, with key="content", by a hash of the file content, which also
+    finds copies and moved files but has to read the file.
+
+    The total size of the cache files is bounded by max_size. When it's
+    exceeded, the least recently used entries are removed. Use is tracked
+    with the modification time of the cache files.
+    """
+
+    def __init__(self, directory: str, max_size: int = 256 << 20, key: str = "stat"):
+        """Creates a new cache in directory, which is created if needed
+
+        :param directory: directory for the cache files
+        :param max_size: (optional) maximum total size of the cache files in
+            bytes. Default is 256 MiB.
+        :param key: (optional) "stat" or "content", see DiskCache
+        :raises ValueError: If key is invalid
+        """
+        if key not in ("stat", "content"):
+            raise ValueError("key must be 'stat' or 'content'")
+
+        self.directory = os.path.expanduser(directory)
+        self.max_size = max_size
+        self.key = key
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, filename: str, encoding: str) -> str:
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(encoding.encode("utf-8") + b"\0")
+        if self.key == "content":
+            with open(filename, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(chunk)
+        else:
+            stat = os.stat(filename)
+            path = os.path.realpath(filename)
+            digest.update(f"{path}\0{stat.st_size}\0{stat.st_mtime_ns}".encode())
+
+        return os.path.join(self.directory, digest.hexdigest() + SUFFIX)
+
+    def get(self, filename: str, encoding: str = "utf-8") -> Optional[Columns]:
+        """Returns the cached column table of a file
+
+        :param filename: Filename of the HOCR document
+        :param encoding: (optional) Encoding of the document. Default is utf-8.
+        :return: Columns, or None if the file isn't cached
+        """
+        path = self._path(filename, encoding)
+        try:
+            with open(path, "rb") as f:
+                columns = Columns.from_bytes(f.read())
+        except OSError:
+            return None
+        except ValueError:
+            # broken entry, e.g. written by an incompatible version
+            self._remove(path)
+            return None
+
+        # mark the entry as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return columns
+
+    def put(self, filename: str, columns: Columns, encoding: str = "utf-8") -> None:
+        """Stores the column table of a file and evicts old entries if needed
+
+        The entry is written to a temporary file first, so readers never see
+        partially written entries.
+
+        :param filename: Filename of the HOCR document
+        :param columns: column table of the document
+        :param encoding: (optional) Encoding of the document. Default is utf-8.
+        """
+        path = self._path(filename, encoding)
+        fd, temp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(columns.to_bytes())
+            os.replace(temp, path)
+        except BaseException:
+            self._remove(temp)
+            raise
+
+        self.evict()
+
+    def open(
+        self, filename: str, encoding: str = "utf-8", **parser_options: bool
+    ) -> CachedDocument:
+        """Returns the model of a file, from the cache or by parsing the file
+
+        On a cache miss, the file is parsed and its column table stored. The
+        parsed HOCRDocument is kept in the returned CachedDocument, so it isn't
+        parsed a second time for raw HTML access.
+
+        :param filename: Filename of the HOCR document
+        :param encoding: (optional) Encoding of the document. Default is utf-8.
+        :param parser_options: (optional) see HOCRDocument.__init__
+        :return: CachedDocument
+        :raises EncodingError: see HOCRDocument.__init__
+        :raises EmptyDocumentException: see HOCRDocument.__init__
+        """
+        columns = self.get(filename, encoding)
+        if columns is not None:
+            return CachedDocument(filename, columns, encoding, **parser_options)
+
+        document = HOCRDocument(filename, encoding, **parser_options)
+        columns = document.to_columns()
+        self.put(filename, columns, encoding)
+
+        cached = CachedDocument(filename, columns, encoding, **parser_options)
+        cached._document = document
+        return cached
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not entry.name.endswith(SUFFIX):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def size(self) -> int:
+        """Returns the total size of the cache files in bytes"""
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self) -> None:
+        """Removes the least recently used entries until max_size is kept"""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_size:
+                break
+            self._remove(path)
+            total -= size
+
+    def clear(self) -> None:
+        """Removes all entries"""
+        for _, _, path in self._entries():
+            self._remove(path)
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
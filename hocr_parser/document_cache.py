@@ -0,0 +1,145 @@
+from typing import Any, Callable, Dict, FrozenSet, Optional, TypeVar
+import weakref
+
+import lxml.etree
+
+T = TypeVar("T")
+
+# maps id(root element) -> DocumentCache of that tree. Values are weak, so an
+# entry disappears as soon as the owner (usually a HOCRDocument) drops its cache
+_caches: "weakref.WeakValueDictionary[int, DocumentCache]" = (
+    weakref.WeakValueDictionary()
+)
+
+
+class DocumentCache:
+    """Cache for data derived from the elements of one document tree
+
+    lxml creates element proxies (the HOCRNode instances) on demand and throws
+    them away as soon as they aren't referenced anymore. HOCRNode can therefore
+    not keep any state of its own between two accesses. Instead, derived values
+    (like the parsed title properties) are stored here, keyed by the id of the
+    element proxy. The cache holds a reference to each element it stores values
+    for, which keeps the proxy, and thereby its id, alive.
+
+    The cache is registered under the root element of the tree, so any node of
+    the tree can find it with DocumentCache.of(node). The owner of the cache
+    has to keep a reference to it; once the cache is garbage collected, nodes
+    of the tree fall back to computing their values on every access.
+
+    Cached values are not updated automatically when the tree changes. Use
+    invalidate() after modifying an element (HOCRNode.set does this for the
+    title attribute).
+    """
+
+    def __init__(self, root: lxml.etree._Element):
+        """Creates a new cache for the tree with the root element `root`
+
+        :param root: root element of the tree
+        """
+        self.root = root
+        self._elements: Dict[int, lxml.etree._Element] = {}
+        self._values: Dict[int, Dict[str, Any]] = {}
+        # optional ClassIndex of the tree, see HOCRDocument.build_index
+        self.class_index: Optional[Any] = None
+        # ocr classes the accessors may rely on, see
+        # HOCRDocument.trust_capabilities; None to search for all classes
+        self.capabilities: Optional[FrozenSet[str]] = None
+        # modified pages (or the root), see mark_dirty; kept on invalidate
+        self.dirty: Dict[int, lxml.etree._Element] = {}
+
+        _caches[id(root)] = self
+
+    @staticmethod
+    def of(element: lxml.etree._Element) -> Optional["DocumentCache"]:
+        """Returns the cache registered for the tree of `element`
+
+        :param element: any element of a tree
+        :return: DocumentCache, or None if no cache exists for the tree
+        """
+        return _caches.get(id(element.getroottree().getroot()))
+
+    def get(
+        self, element: lxml.etree._Element, key: str, compute: Callable[..., T]
+    ) -> T:
+        """Returns the cached value `key` of element, computing it if needed
+
+        :param element: element the value belongs to
+        :param key: name of the value
+        :param compute: function that is called with element as its only
+            argument if the value isn't cached yet. Exceptions raised by this
+            function are propagated and nothing is cached.
+        :return: the (possibly newly computed) value
+        """
+        values = self._values.get(id(element))
+        if values is not None:
+            try:
+                return values[key]
+            except KeyError:
+                pass
+
+        value = compute(element)
+        self.put(element, key, value)
+        return value
+
+    def peek(self, element: lxml.etree._Element, key: str) -> Optional[Any]:
+        """Returns the cached value `key` of element without computing it
+
+        :param element: element the value belongs to
+        :param key: name of the value
+        :return: the cached value, or None if there is none
+        """
+        values = self._values.get(id(element))
+        if values is None:
+            return None
+        return values.get(key)
+
+    def put(self, element: lxml.etree._Element, key: str, value: Any) -> None:
+        """Stores value as the cached value `key` of element
+
+        :param element: element the value belongs to
+        :param key: name of the value
+        :param value: value to store
+        """
+        values = self._values.get(id(element))
+        if values is None:
+            self._elements[id(element)] = element
+            values = self._values[id(element)] = {}
+        values[key] = value
+
+    def discard(self, element: lxml.etree._Element, key: str) -> None:
+        """Drops the cached value `key` of element, if there is one
+
+        :param element: element the value belongs to
+        :param key: name of the value
+        """
+        values = self._values.get(id(element))
+        if values is not None:
+            values.pop(key, None)
+
+    def mark_dirty(self, element: lxml.etree._Element) -> None:
+        """Records element (a page or the root) as modified, see HOCRNode.mark_dirty
+
+        :param element: the modified page, or the root if the modification
+            isn't confined to a page
+        """
+        self.dirty[id(element)] = element
+
+    def invalidate(self, element: Optional[lxml.etree._Element] = None) -> None:
+        """Drops cached values of element, or of all elements if None
+
+        Invalidating all elements also drops the class index.
+
+        :param element: (optional) element whose values should be removed
+        """
+        if element is None:
+            self._elements.clear()
+            self._values.clear()
+            self.class_index = None
+        else:
+            self._elements.pop(id(element), None)
+            self._values.pop(id(element), None)
+
+    def __len__(self) -> int:
+        """Returns the number of elements values are cached for"""
+        return len(self._values)
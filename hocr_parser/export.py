@@ -0,0 +1,457 @@
+"""Converters from hOCR to ALTO XML, PAGE XML and JSON
+
+All converters work page by page: if the source is a filename, the pages
+are parsed with HOCRDocument.iterpages, converted and written before the
+next page is read, so memory usage doesn't grow with the size of the
+document. An open HOCRDocument can be converted as well.
+
+The structure is mapped to the levels all three formats share:
+- pages (ocr_page)
+- blocks: ocr_carea (or ocrx_block) elements. Lines that aren't inside a
+  block, e.g. all lines of OCRopus output, are grouped into implicit blocks
+  whose bbox is the union of the bboxes of their lines.
+- lines: elements with one of LINE_CLASSES
+- words: ocrx_word elements with their text, bbox and confidence. A line
+  without words is converted into a single word with the text of the line.
+"""
+
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+import itertools
+import json
+import os
+import time
+
+import lxml.etree
+
+from .bbox import BBox
+from .hocr_document import HOCRDocument
+from .hocr_node import HOCRNode
+from .metadata import Metadata
+from .text import get_ocr_class
+
+BLOCK_CLASSES = frozenset(("ocr_carea", "ocrx_block"))
+LINE_CLASSES = frozenset(
+    (
+        "ocr_line",
+        "ocrx_line",
+        "ocr_header",
+        "ocr_footer",
+        "ocr_caption",
+        "ocr_textfloat",
+    )
+)
+
+ALTO_NS = "http://www.loc.gov/standards/alto/ns-v4#"
+PAGE_NS = "http://schema.primaresearch.org/PAGE/gts/pagecontent/2019-07-15"
+
+Source = Union[str, HOCRDocument]
+# (block element or None, lines) of a page
+Block = Tuple[Optional[HOCRNode], List[HOCRNode]]
+
+
+def _open_source(source: Source, encoding: str) -> Tuple[Metadata, Iterator[HOCRNode]]:
+    if isinstance(source, HOCRDocument):
+        pages = source.body.pages if source.body is not None else []
+        return source.metadata, iter(pages)
+
+    return Metadata.from_file(source, encoding), HOCRDocument.iterpages(
+        source, encoding
+    )
+
+
+def _blocks(page: HOCRNode) -> List[Block]:
+    """Groups the lines of page by their closest block ancestor"""
+    blocks: List[Block] = []
+    current: Any = page
+    for element in page.iter():
+        if get_ocr_class(element) not in LINE_CLASSES:
+            continue
+
+        block = None
+        for ancestor in element.iterancestors():
+            if ancestor is page:
+                break
+            if get_ocr_class(ancestor) in BLOCK_CLASSES:
+                block = ancestor
+                break
+
+        # lines of a block are contiguous, so comparing with the last block
+        # is enough; lines outside of blocks form implicit blocks
+        if not blocks or block is not current:
+            blocks.append((block, []))
+            current = block
+        blocks[-1][1].append(element)
+
+    return blocks
+
+
+def _read(element: HOCRNode) -> Tuple[Optional[BBox], Optional[float]]:
+    """Returns bbox and confidence of an element without the DocumentCache
+
+    Every element is read exactly once while converting, so caching the
+    values would only add overhead.
+    """
+    properties = element._parse_properties()
+    return HOCRNode._parse_bbox(properties), HOCRNode._parse_confidence(properties)
+
+
+def _words(line: HOCRNode) -> List[Tuple[Optional[str], str, Optional[BBox], Any]]:
+    """Returns (id, text, bbox, confidence) of the words of a line"""
+    words = line.words
+    if not words:
+        text = line.ocr_text
+        return [(None, text, line.bbox, None)] if text else []
+
+    result = []
+    for word in words:
+        # words without children, e.g. all words of Tesseract, are the
+        # common case and don't need a tree walk for their text
+        text = (word.text or "").strip() if len(word) == 0 else word.ocr_text
+        result.append((word.get("id"), text, *_read(word)))
+    return result
+
+
+def _block_bbox(block: Optional[HOCRNode], lines: List[HOCRNode]) -> Optional[BBox]:
+    if block is not None:
+        return block.bbox
+    return BBox.max_bbox(b for b in (line.bbox for line in lines) if b is not None)
+
+
+class _Ids:
+    """Ids of a page's elements, generated for elements without one"""
+
+    def __init__(self, number: int):
+        self.number = number
+        self.counts: Dict[str, int] = {}
+
+    def __call__(self, element: Optional[HOCRNode], prefix: str) -> str:
+        count = self.counts[prefix] = self.counts.get(prefix, 0) + 1
+        element_id = element.get("id") if element is not None else None
+        return element_id or f"{prefix}_{self.number}_{count}"
+
+
+def page_to_dict(page: HOCRNode) -> Dict[str, Any]:
+    """Converts a page into the compact JSON structure of to_json
+
+    Values that are missing in the hOCR (e.g. the id, bbox or confidence)
+    are left out; bboxes are [x1, y1, x2, y2] lists.
+
+    :param page: ocr_page HOCRNode
+    :return: dict of the page with its blocks, lines and words
+    """
+
+    def with_bbox(values: Dict[str, Any], bbox: Optional[BBox]) -> Dict[str, Any]:
+        if values["id"] is None:
+            del values["id"]
+        if bbox is not None:
+            values["bbox"] = [bbox.x1, bbox.y1, bbox.x2, bbox.y2]
+        return values
+
+    properties = page.typed_properties if page.get("title") else {}
+    result = with_bbox({"id": page.get("id")}, properties.get("bbox"))
+    for name in ("image", "ppageno"):
+        if name in properties:
+            result[name] = properties[name]
+
+    blocks = []
+    for block, lines in _blocks(page):
+        block_lines = []
+        for line in lines:
+            words = []
+            for word_id, text, bbox, confidence in _words(line):
+                word = with_bbox({"id": word_id, "text": text}, bbox)
+                if confidence is not None:
+                    word["confidence"] = confidence
+                words.append(word)
+            line_id = line.get("id")
+            block_lines.append(with_bbox({"id": line_id, "words": words}, line.bbox))
+        block_id = block.get("id") if block is not None else None
+        block_bbox = _block_bbox(block, lines)
+        blocks.append(with_bbox({"id": block_id, "lines": block_lines}, block_bbox))
+    result["blocks"] = blocks
+
+    return result
+
+
+def to_json(source: Source, output: Any, encoding: str = "utf-8") -> int:
+    """Writes a document as JSON, one page at a time
+
+    The JSON object has "metadata" (system, capabilities, langs, scripts and
+    number_of_pages of the head) and "pages", a list of the pages as
+    returned by page_to_dict. Every page is serialized and written on its
+    own line as soon as it has been parsed.
+
+    >>> to_json("book.hocr", "book.json")
+
+    :param source: filename of a HOCR document, or a HOCRDocument
+    :param output: filename or file-like object accepting str
+    :param encoding: (optional) Encoding of the source file. Default is utf-8.
+    :return: number of pages written
+    """
+    metadata, pages = _open_source(source, encoding)
+    head = {
+        "system": metadata.system,
+        "capabilities": metadata.capabilities,
+        "langs": metadata.langs,
+        "scripts": metadata.scripts,
+        "number_of_pages": metadata.number_of_pages,
+    }
+
+    if isinstance(output, str):
+        with open(output, "w", encoding="utf-8") as f:
+            return _write_json(f, head, pages)
+    return _write_json(output, head, pages)
+
+
+def _write_json(f: Any, head: Dict[str, Any], pages: Iterator[HOCRNode]) -> int:
+    def dumps(value: Any) -> str:
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+    f.write('{"metadata":' + dumps(head) + ',"pages":[')
+    count = 0
+    for page in pages:
+        f.write(",\n" if count else "\n")
+        f.write(dumps(page_to_dict(page)))
+        count += 1
+    f.write("\n]}\n")
+    return count
+
+
+def _alto_position(element: Any, bbox: Optional[BBox]) -> None:
+    if bbox is not None:
+        element.set("HPOS", str(bbox.x1))
+        element.set("VPOS", str(bbox.y1))
+        element.set("WIDTH", str(bbox.width))
+        element.set("HEIGHT", str(bbox.height))
+
+
+def page_to_alto(page: HOCRNode, number: int = 1) -> lxml.etree._Element:
+    """Converts a page into an ALTO v4 Page element
+
+    Confidences are converted to the range 0 to 1 of the WC attribute.
+
+    :param page: ocr_page HOCRNode
+    :param number: (optional) number of the page in the document, starting
+        at 1, used for ids the page lacks and for PHYSICAL_IMG_NR if the page
+        has no ppageno
+    :return: Page element in the ALTO namespace
+    """
+    E = lxml.etree.Element
+    SubElement = lxml.etree.SubElement
+    ids = _Ids(number)
+
+    properties = page.typed_properties if page.get("title") else {}
+    bbox = properties.get("bbox")
+    ppageno = properties.get("ppageno")
+    physical = ppageno + 1 if isinstance(ppageno, int) else number
+    alto_page = E(
+        f"{{{ALTO_NS}}}Page",
+        nsmap={None: ALTO_NS},
+        ID=ids(page, "page"),
+        PHYSICAL_IMG_NR=str(physical),
+        WIDTH=str(bbox.width if bbox is not None else 0),
+        HEIGHT=str(bbox.height if bbox is not None else 0),
+    )
+    space = SubElement(alto_page, f"{{{ALTO_NS}}}PrintSpace")
+    _alto_position(space, bbox)
+
+    for block, lines in _blocks(page):
+        text_block = SubElement(
+            space, f"{{{ALTO_NS}}}TextBlock", ID=ids(block, "block")
+        )
+        _alto_position(text_block, _block_bbox(block, lines))
+        for line in lines:
+            text_line = SubElement(
+                text_block, f"{{{ALTO_NS}}}TextLine", ID=ids(line, "line")
+            )
+            _alto_position(text_line, line.bbox)
+            for i, (word_id, text, bbox, confidence) in enumerate(_words(line)):
+                if i > 0:
+                    SubElement(text_line, f"{{{ALTO_NS}}}SP")
+                string = SubElement(text_line, f"{{{ALTO_NS}}}String")
+                string.set("ID", word_id or ids(None, "word"))
+                string.set("CONTENT", text)
+                _alto_position(string, bbox)
+                if confidence is not None:
+                    wc = min(max(confidence / 100, 0.0), 1.0)
+                    string.set("WC", f"{wc:.4g}")
+
+    return alto_page
+
+
+def to_alto(source: Source, output: Any, encoding: str = "utf-8") -> int:
+    """Writes a document as ALTO v4 XML, one page at a time
+
+    The Description is written before the first page; its fileName is the
+    image of the first page and the processing software is the ocr-system
+    of the head. Every page is converted by page_to_alto and written to
+    output with lxml.etree.xmlfile before the next page is parsed.
+
+    >>> to_alto("book.hocr", "book.alto.xml")
+
+    :param source: filename of a HOCR document, or a HOCRDocument
+    :param output: filename or binary file-like object
+    :param encoding: (optional) Encoding of the source file. Default is utf-8.
+    :return: number of pages written
+    """
+    metadata, pages = _open_source(source, encoding)
+    # the Description needs the image of the first page
+    first = next(pages, None)
+    if first is not None:
+        pages = itertools.chain((first,), pages)
+
+    count = 0
+    with lxml.etree.xmlfile(output, encoding="utf-8") as xf:
+        xf.write_declaration()
+        with xf.element(f"{{{ALTO_NS}}}alto", nsmap={None: ALTO_NS}):
+            xf.write(_alto_description(metadata, first), pretty_print=True)
+            with xf.element(f"{{{ALTO_NS}}}Layout"):
+                for count, page in enumerate(pages, 1):
+                    xf.write(page_to_alto(page, count), pretty_print=True)
+                    xf.flush()
+
+    return count
+
+
+def _alto_description(
+    metadata: Metadata, first: Optional[HOCRNode]
+) -> lxml.etree._Element:
+    E = lxml.etree.Element
+    SubElement = lxml.etree.SubElement
+
+    description = E(f"{{{ALTO_NS}}}Description", nsmap={None: ALTO_NS})
+    SubElement(description, f"{{{ALTO_NS}}}MeasurementUnit").text = "pixel"
+    image = None
+    if first is not None and first.get("title"):
+        image = first.typed_properties.get("image")
+    if image is not None:
+        info = SubElement(description, f"{{{ALTO_NS}}}sourceImageInformation")
+        SubElement(info, f"{{{ALTO_NS}}}fileName").text = image
+    if metadata.system is not None:
+        processing = SubElement(description, f"{{{ALTO_NS}}}OCRProcessing", ID="OCR_0")
+        step = SubElement(processing, f"{{{ALTO_NS}}}ocrProcessingStep")
+        software = SubElement(step, f"{{{ALTO_NS}}}processingSoftware")
+        SubElement(software, f"{{{ALTO_NS}}}softwareName").text = metadata.system
+
+    return description
+
+
+def _page_points(bbox: BBox) -> str:
+    x1, y1, x2, y2 = bbox.x1, bbox.y1, bbox.x2, bbox.y2
+    return f"{x1},{y1} {x2},{y1} {x2},{y2} {x1},{y2}"
+
+
+def _page_text(parent: Any, text: str, confidence: Any = None) -> None:
+    equiv = lxml.etree.SubElement(parent, f"{{{PAGE_NS}}}TextEquiv")
+    if confidence is not None:
+        equiv.set("conf", f"{min(max(confidence / 100, 0.0), 1.0):.4g}")
+    lxml.etree.SubElement(equiv, f"{{{PAGE_NS}}}Unicode").text = text
+
+
+def page_to_page_xml(
+    page: HOCRNode,
+    metadata: Optional[Metadata] = None,
+    number: int = 1,
+    created: Optional[str] = None,
+) -> lxml.etree._Element:
+    """Converts a page into a PAGE XML (2019-07-15) PcGts element
+
+    PAGE XML describes a single page per file. The id of the page is
+    written as pcGtsId. Blocks become TextRegions; lines and regions get the
+    text of their words as TextEquiv. Confidences are converted to the range
+    0 to 1 of the conf attribute.
+
+    :param page: ocr_page HOCRNode
+    :param metadata: (optional) Metadata of the document; its ocr-system is
+        written as Creator
+    :param number: (optional) number of the page in the document, starting
+        at 1, used for ids the page lacks
+    :param created: (optional) value of Created and LastChange. Default is
+        the current time.
+    :return: PcGts element in the PAGE namespace
+    """
+    E = lxml.etree.Element
+    SubElement = lxml.etree.SubElement
+    ids = _Ids(number)
+
+    root = E(f"{{{PAGE_NS}}}PcGts", nsmap={None: PAGE_NS})
+    root.set("pcGtsId", ids(page, "page"))
+    info = SubElement(root, f"{{{PAGE_NS}}}Metadata")
+    system = metadata.system if metadata is not None else None
+    SubElement(info, f"{{{PAGE_NS}}}Creator").text = system or "hocr-parser"
+    created = created or time.strftime("%Y-%m-%dT%H:%M:%S")
+    SubElement(info, f"{{{PAGE_NS}}}Created").text = created
+    SubElement(info, f"{{{PAGE_NS}}}LastChange").text = created
+
+    properties = page.typed_properties if page.get("title") else {}
+    bbox = properties.get("bbox")
+    page_element = SubElement(
+        root,
+        f"{{{PAGE_NS}}}Page",
+        imageFilename=properties.get("image", ""),
+        imageWidth=str(bbox.x2 if bbox is not None else 0),
+        imageHeight=str(bbox.y2 if bbox is not None else 0),
+    )
+
+    def add_coords(parent: Any, bbox: Optional[BBox]) -> None:
+        points = _page_points(bbox) if bbox is not None else "0,0"
+        SubElement(parent, f"{{{PAGE_NS}}}Coords", points=points)
+
+    for block, lines in _blocks(page):
+        region = SubElement(page_element, f"{{{PAGE_NS}}}TextRegion")
+        region.set("id", ids(block, "block"))
+        add_coords(region, _block_bbox(block, lines))
+        line_texts = []
+        for line in lines:
+            text_line = SubElement(
+                region, f"{{{PAGE_NS}}}TextLine", id=ids(line, "line")
+            )
+            add_coords(text_line, line.bbox)
+            texts = []
+            for word_id, text, bbox, confidence in _words(line):
+                word = SubElement(text_line, f"{{{PAGE_NS}}}Word")
+                word.set("id", word_id or ids(None, "word"))
+                add_coords(word, bbox)
+                _page_text(word, text, confidence)
+                texts.append(text)
+            line_texts.append(" ".join(texts))
+            _page_text(text_line, line_texts[-1])
+        _page_text(region, "\n".join(line_texts))
+
+    return root
+
+
+def to_page_xml(
+    source: Source,
+    directory: str,
+    encoding: str = "utf-8",
+    created: Optional[str] = None,
+) -> List[str]:
+    """Writes every page of a document as PAGE XML file into directory
+
+    The files are named after the position of the page, page_00001.xml
+    for the first one, and written one at a time with page_to_page_xml. Ids
+    of the pages are only written into the files (as pcGtsId), as they are
+    taken from the document and may contain path separators.
+
+    >>> paths = to_page_xml("book.hocr", "book_page/")
+
+    :param source: filename of a HOCR document, or a HOCRDocument
+    :param directory: output directory, created if it doesn't exist
+    :param encoding: (optional) Encoding of the source file. Default is utf-8.
+    :param created: (optional) see page_to_page_xml
+    :return: paths of the written files in page order
+    """
+    metadata, pages = _open_source(source, encoding)
+    os.makedirs(directory, exist_ok=True)
+
+    paths = []
+    for number, page in enumerate(pages, 1):
+        path = os.path.join(directory, f"page_{number:05d}.xml")
+        root = page_to_page_xml(page, metadata, number, created)
+        lxml.etree.ElementTree(root).write(
+            path, encoding="utf-8", xml_declaration=True, pretty_print=True
+        )
+        paths.append(path)
+
+    return paths
@@ -0,0 +1,220 @@
+from array import array
+from bisect import bisect_right
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from .columns import columns_to_numpy
+from .text import END, START, get_ocr_class, iter_text_events
+
+# classes of elements holding single characters of a word
+GLYPH_CLASSES = ("ocrx_cinfo", "ocr_cinfo", "ocr_glyph")
+
+
+class Glyphs:
+    """Character boxes and confidences of words, aligned to their text
+
+    Every character of the text of every word is one glyph, so glyph i is
+    the character text[i], where text is the concatenation of the text of all
+    words (without separators between the words). The text of a word is its
+    ocr_text, except that glyph elements are joined without separator: a
+    word with one ocrx_cinfo element per character reads "Ocr" rather than
+    "O\nc\nr". The values of each
+    column are stored in one contiguous array.array:
+    - x1, y1, x2, y2: box of the character, -1 if it has none
+    - confidence: confidence of the character, NaN if it has none
+    - word: index of the word the character belongs to
+
+    The glyphs of word w are the rows word_starts[w] to word_starts[w + 1];
+    word_ids holds the id of every word.
+
+    The values are taken from the title of the element directly containing
+    the character, which is either the word or a glyph element inside the
+    word (see GLYPH_CLASSES, e.g. the ocrx_cinfo elements Tesseract writes
+    with hocr_char_boxes enabled):
+    - x_bboxes and x_confs hold one box and one confidence per character;
+      the n-th character of the element gets the n-th value
+    - otherwise, all characters of a glyph element get its bbox and its
+      x_conf or x_wconf; characters of the word itself get no values
+
+    Separators between the text of child elements of a word (see
+    HOCRNode.OCR_TEXT_SEPARATORS) are glyphs without box and confidence.
+    """
+
+    COLUMNS: Tuple[Tuple[str, str], ...] = (
+        ("x1", "q"),
+        ("y1", "q"),
+        ("x2", "q"),
+        ("y2", "q"),
+        ("confidence", "d"),
+        ("word", "q"),
+    )
+
+    def __init__(self):
+        self.columns: Dict[str, array] = {
+            name: array(typecode) for name, typecode in self.COLUMNS
+        }
+        self.word_ids: List[Optional[str]] = []
+        self.word_starts = array("q", [0])
+        self.text = ""
+
+    def __len__(self) -> int:
+        """Returns the number of glyphs"""
+        return len(self.columns["word"])
+
+    def __getitem__(self, name: str) -> array:
+        return self.columns[name]
+
+    @property
+    def word_count(self) -> int:
+        return len(self.word_ids)
+
+    def span_of(self, word: int) -> Tuple[int, int]:
+        """Returns (start, end) of the glyphs of the word with the given index"""
+        return self.word_starts[word], self.word_starts[word + 1]
+
+    def word_of(self, glyph: int) -> int:
+        """Returns the index of the word the glyph with the given index is in"""
+        if not 0 <= glyph < len(self):
+            raise IndexError("glyph index out of range")
+        return bisect_right(self.word_starts, glyph) - 1
+
+    @classmethod
+    def from_node(
+        cls, node: Any, glyph_classes: Iterable[str] = GLYPH_CLASSES
+    ) -> "Glyphs":
+        """Collects the glyphs of all words in the subtree of node
+
+        :param node: HOCRNode, e.g. a page or a single word. It's included if
+            it's a word itself.
+        :param glyph_classes: (optional) classes of the glyph elements inside
+            words. Default is GLYPH_CLASSES. If empty, the values are only
+            taken from the titles of the words.
+        :return: Glyphs with the words in document order
+        :raises MalformedOCRException: If x_bboxes, x_confs or another used
+            property is malformed
+        """
+        glyphs = cls()
+        glyph_classes = frozenset(glyph_classes)
+        # glyph elements hold the characters of one word, so they don't get
+        # a separator like other elements do in ocr_text. This doesn't depend
+        # on glyph_classes, which only selects where values are taken from.
+        separators = dict(node.OCR_TEXT_SEPARATORS)
+        separators.update((c, "") for c in GLYPH_CLASSES + tuple(glyph_classes))
+        chunks = []
+        for word in node.words:
+            chunks.append(glyphs._add_word(word, glyph_classes, separators))
+
+        glyphs.text = "".join(chunks)
+        return glyphs
+
+    def _add_word(
+        self, word: Any, glyph_classes: FrozenSet[str], separators: Dict[str, str]
+    ) -> str:
+        index = len(self.word_ids)
+
+        if len(word) == 0:
+            # fast path for words without children, e.g. all words of
+            # Tesseract without character boxes
+            text = (word.text or "").strip()
+            self._add_chars(self._source(word, glyph=False), len(text))
+            self._end_word(word, index)
+            return text
+
+        # stack of [boxes, confidences, bbox, confidence, characters so far] of
+        # the word and the open glyph elements
+        sources: List[List[Any]] = []
+        chunks = []
+        for event in iter_text_events(word, separators):
+            kind = event[0]
+            if kind is START:
+                element = event[1]
+                if not sources:
+                    sources.append(self._source(element, glyph=False))
+                elif glyph_classes and get_ocr_class(element) in glyph_classes:
+                    sources.append(self._source(element, glyph=True))
+                else:
+                    # other children inherit the values of their parent
+                    sources.append(sources[-1])
+
+            elif kind is END:
+                sources.pop()
+
+            else:
+                chunk = event[1]
+                chunks.append(chunk)
+                if chunk.isspace():
+                    # separator; text pieces are stripped and never whitespace
+                    self._add_chars(None, len(chunk))
+                else:
+                    self._add_chars(sources[-1], len(chunk))
+
+        self._end_word(word, index)
+        return "".join(chunks)
+
+    def _add_chars(self, source: Optional[List[Any]], count: int) -> None:
+        columns = self.columns
+        x1, y1, x2, y2 = columns["x1"], columns["y1"], columns["x2"], columns["y2"]
+        confidence = columns["confidence"]
+
+        if source is None:
+            x1.extend([-1] * count)
+            y1.extend([-1] * count)
+            x2.extend([-1] * count)
+            y2.extend([-1] * count)
+            confidence.extend([float("nan")] * count)
+            return
+
+        boxes, confs, bbox, conf, n = source
+        for k in range(n, n + count):
+            if boxes is not None and len(boxes) >= 4 * k + 4:
+                x1.append(boxes[4 * k])
+                y1.append(boxes[4 * k + 1])
+                x2.append(boxes[4 * k + 2])
+                y2.append(boxes[4 * k + 3])
+            elif bbox is not None:
+                x1.append(bbox.x1)
+                y1.append(bbox.y1)
+                x2.append(bbox.x2)
+                y2.append(bbox.y2)
+            else:
+                x1.append(-1)
+                y1.append(-1)
+                x2.append(-1)
+                y2.append(-1)
+
+            if confs is not None and len(confs) > k:
+                confidence.append(confs[k])
+            else:
+                confidence.append(float("nan") if conf is None else conf)
+        source[4] = n + count
+
+    def _end_word(self, word: Any, index: int) -> None:
+        columns = self.columns
+        columns["word"].extend([index] * (len(columns["x1"]) - len(columns["word"])))
+        self.word_ids.append(word.get("id"))
+        self.word_starts.append(len(columns["word"]))
+
+    @staticmethod
+    def _source(element: Any, glyph: bool) -> List[Any]:
+        properties = element.typed_properties if element.get("title") else {}
+        boxes = properties.get("x_bboxes")
+        confs = properties.get("x_confs")
+        bbox = conf = None
+        if glyph:
+            # the bbox and confidence of a word don't belong to its characters
+            bbox = properties.get("bbox")
+            conf = properties.get("x_conf", properties.get("x_wconf"))
+        return [boxes, confs, bbox, conf, 0]
+
+    def to_numpy(self) -> Any:
+        """Returns the columns as NumPy structured array
+
+        The field names and types are the same as the ones of the columns.
+        Requires NumPy, which is not installed with hocr-parser by default.
+
+        >>> glyphs = document.glyphs(0)
+        >>> records = glyphs.to_numpy()
+        >>> boxes = numpy.stack([records[k] for k in ("x1", "y1", "x2", "y2")], 1)
+
+        :return: numpy.ndarray with one record per glyph
+        """
+        return columns_to_numpy(self.columns, self.COLUMNS, len(self))
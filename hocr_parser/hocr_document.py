@@ -1,41 +1,320 @@
-from typing import Iterable, List, Optional
+from typing import (
+    Any,
+    AsyncIterator,
+    BinaryIO,
+    Generator,
+    Iterable,
+    List,
+    Optional,
+    TextIO,
+    Tuple,
+    Union,
+)
+import codecs
+import mmap
+import os
+import tempfile
 import warnings
 
+import lxml.etree
+
 from .bbox import BBox
+from .class_index import ClassIndex
+from .columns import Columns
+from .document_cache import DocumentCache
 from .exceptions import EncodingError, EmptyDocumentException, MissingRequiredMetaField
+from .glyphs import Glyphs
 from .hocr_node import HOCRNode
+from .metadata import Metadata
+from .model import DocumentModel
+from .page_index import LazyDocument, PageIndex, _ascii_compatible
+from .parsers import decoding_failed, get_parser
+from .spatial_index import SpatialIndex
+
+Buffer = Union[bytes, bytearray, memoryview, mmap.mmap]
 
 
 class HOCRDocument:
-    def __init__(self, filename: str, encoding: str = "utf-8"):
+    def __init__(self, filename: str, encoding: str = "utf-8", **parser_options: bool):
         """Creates a new HOCRDocument instance from the HOCR file `filename`
 
+        The file is read as bytes and handed to lxml without decoding it to a
+        str first. Use HOCRDocument.frommmap to avoid reading the file into
+        memory altogether.
+
+        Values cached for the nodes of the document live as long as the
+        document, see HOCRNode.
+
         :param filename: Filename of the input HOCR document
         :param encoding: (optional) Encoding to be for the document.
             Default is utf-8.
+        :param parser_options: (optional) remove_blank_text, huge_tree and
+            collect_ids options for the parser, see HOCRNode.fromstring
         :raises EncodingError: When opening the file with the given encoding
             raises a UnicodeDecodeError.
         :raises EmptyDocumentException: When the given file is empty
         """
-        # try to open the file with the given encoding
-        data = self._read_file(filename, encoding)
+        data = self._read_file(filename)
+        self._load(data, encoding, filename, **parser_options)
+        self._set_source(filename)
+
+    @classmethod
+    def frombytes(
+        cls,
+        data: Buffer,
+        encoding: str = "utf-8",
+        name: str = "<bytes>",
+        **parser_options: bool,
+    ) -> "HOCRDocument":
+        """Creates a new HOCRDocument from a bytes-like object
+
+        The buffer is passed to the parser as is, so bytes-like objects other
+        than bytes (bytearray, memoryview, mmap) aren't copied either. See
+        HOCRNode.frombytes for the parsing details.
+
+        :param data: The encoded HOCR document
+        :param encoding: (optional) Encoding of the document. Default is utf-8.
+        :param name: (optional) Name of the source used in error messages
+        :param parser_options: (optional) see HOCRDocument.__init__
+        :raises EncodingError: When decoding the data with the given encoding
+            raises a UnicodeDecodeError.
+        :raises EmptyDocumentException: When data is empty
+        """
+        document = cls.__new__(cls)
+        document._load(data, encoding, name, **parser_options)
+        return document
+
+    @classmethod
+    def fromfile(
+        cls, f: BinaryIO, encoding: str = "utf-8", **parser_options: bool
+    ) -> "HOCRDocument":
+        """Creates a new HOCRDocument from a file object opened in binary mode
+
+        :param f: File object to read the document from
+        :param encoding: (optional) Encoding of the document. Default is utf-8.
+        :param parser_options: (optional) see HOCRDocument.__init__
+        :raises EncodingError: When decoding the file content with the given
+            encoding raises a UnicodeDecodeError.
+        :raises EmptyDocumentException: When nothing can be read from f
+        """
+        name = getattr(f, "name", "<file>")
+        data = f.read()
+        return cls.frombytes(data, encoding, str(name), **parser_options)
+
+    @classmethod
+    def frommmap(
+        cls, filename: str, encoding: str = "utf-8", **parser_options: bool
+    ) -> "HOCRDocument":
+        """Creates a new HOCRDocument from a memory-mapped HOCR file
+
+        The file is mapped into memory and parsed straight from the mapping,
+        so the raw file content is never copied into a Python object. The
+        mapping is closed once the tree is built.
+
+        :param filename: Filename of the input HOCR document
+        :param encoding: (optional) Encoding of the document. Default is utf-8.
+        :param parser_options: (optional) see HOCRDocument.__init__
+        :raises EncodingError: When decoding the file with the given encoding
+            raises a UnicodeDecodeError.
+        :raises EmptyDocumentException: When the given file is empty
+        """
+        # empty files can't be mapped
+        if os.path.getsize(filename) == 0:
+            raise EmptyDocumentException("Document is empty")
+
+        with open(filename, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                document = cls.frombytes(data, encoding, filename, **parser_options)
+
+        document._set_source(filename)
+        return document
+
+    @classmethod
+    async def aopen(
+        cls,
+        filename: str,
+        encoding: str = "utf-8",
+        loader: Optional[Any] = None,
+        **parser_options: bool,
+    ) -> "HOCRDocument":
+        """Reads and parses the HOCR file `filename` without blocking asyncio
+
+        >>> document = await HOCRDocument.aopen("page.hocr")
+
+        Reading and parsing happen in the thread pool of an aio.Loader, which
+        also limits the number of files loaded at the same time.
 
+        :param filename: Filename of the input HOCR document
+        :param encoding: (optional) Encoding of the document. Default is utf-8.
+        :param loader: (optional) aio.Loader to use. Default is the shared
+            loader returned by aio.default_loader.
+        :param parser_options: (optional) see HOCRDocument.__init__
+        :raises EncodingError: see HOCRDocument.__init__
+        :raises EmptyDocumentException: see HOCRDocument.__init__
+        """
+        from .aio import default_loader
+
+        loader = loader or default_loader()
+        return await loader.open(filename, encoding, **parser_options)
+
+    @staticmethod
+    def aiterpages(
+        filename: str,
+        encoding: str = "utf-8",
+        loader: Optional[Any] = None,
+        **parser_options: bool,
+    ) -> AsyncIterator["HOCRNode"]:
+        """Asynchronous version of iterpages, see aio.Loader.iterpages
+
+        >>> async for page in HOCRDocument.aiterpages("book.hocr"):
+        ...     print(page.id)
+
+        :param filename: Filename of the input HOCR document
+        :param encoding: (optional) Encoding of the document. Default is utf-8.
+        :param loader: (optional) see aopen
+        :param parser_options: (optional) see HOCRDocument.__init__
+        """
+        from .aio import default_loader
+
+        loader = loader or default_loader()
+        return loader.iterpages(filename, encoding, **parser_options)
+
+    @staticmethod
+    def lazy(
+        filename: str,
+        encoding: str = "utf-8",
+        sidecar: Union[bool, str] = False,
+        cache_size: int = 16,
+        **parser_options: bool,
+    ) -> LazyDocument:
+        """Opens the HOCR file `filename` for random access to its pages
+
+        Only the byte offsets of the pages are determined up front; pages are
+        parsed on request. See page_index.LazyDocument.
+
+        >>> book = HOCRDocument.lazy("book.hocr", sidecar=True)
+        >>> book.page(316).ocr_text
+
+        :param filename: Filename of the input HOCR document
+        :param encoding: (optional) Encoding of the document, must be ASCII
+            compatible. Default is utf-8.
+        :param sidecar: (optional) store the page offsets in a sidecar file,
+            see PageIndex.for_file. Default is False.
+        :param cache_size: (optional) number of parsed pages to keep in the
+            LRU cache. Default is 16.
+        :param parser_options: (optional) see HOCRDocument.__init__
+        :raises EmptyDocumentException: When the given file is empty
+        :raises ValueError: If the encoding isn't ASCII compatible
+        """
+        return LazyDocument(filename, encoding, sidecar, cache_size, **parser_options)
+
+    def _load(
+        self, data: Buffer, encoding: str, name: str, **parser_options: bool
+    ) -> None:
         # if no data was read, the document is empty
         if len(data) == 0:
             raise EmptyDocumentException("Document is empty")
 
         # parse document to node
-        self.html = HOCRNode.fromstring(data, encoding=encoding)
+        self.html = HOCRNode.frombytes(data, encoding=encoding, **parser_options)
+        self._check_decoded(encoding, name, **parser_options)
+
+        # cache for parsed element properties, shared by all nodes of the tree
+        self.cache = DocumentCache(self.root)
+
+        # file the document was read from as (filename, size, mtime), and the
+        # offsets of its pages, used by save
+        self.encoding = encoding
+        self._source: Optional[Tuple[str, int, int]] = None
+        self._page_index: Optional[PageIndex] = None
+
+    def _set_source(self, filename: str) -> None:
+        stat = os.stat(filename)
+        self._source = (filename, stat.st_size, stat.st_mtime_ns)
+        self._page_index = None
 
     @staticmethod
-    def _read_file(filename: str, encoding: str) -> str:
-        try:
-            with open(filename, encoding=encoding) as f:
-                return f.read()
-        except UnicodeDecodeError:
-            msg = f"Couldn't open file {filename} with encoding {encoding}."
+    def _read_file(filename: str) -> bytes:
+        with open(filename, "rb") as f:
+            return f.read()
+
+    @staticmethod
+    def _check_decoded(encoding: str, name: str, **parser_options: bool) -> None:
+        """Raises EncodingError if the last parsed input couldn't be decoded
+
+        lxml doesn't complain about undecodable input, but libxml2 logs it
+        while decoding. Checking that log instead of decoding the input again
+        in Python keeps loading bytes and mmaps free of a second pass.
+        Must be called right after HOCRNode.frombytes with the same options.
+        """
+        parser = get_parser(HOCRNode, encoding=encoding, **parser_options)
+        if decoding_failed(parser):
+            msg = f"Couldn't open file {name} with encoding {encoding}."
             raise EncodingError(msg)
 
+    @staticmethod
+    def iterpages(
+        filename: str, encoding: str = "utf-8", **parser_options: bool
+    ) -> Generator["HOCRNode", None, None]:
+        """Parses the HOCR file `filename` incrementally and yields its pages
+
+        Uses lxml.etree.iterparse to build the tree while reading the file.
+        Each element with the class ocr_page is yielded as soon as its end tag
+        has been parsed. The page is a regular HOCRNode of the (partial) tree.
+        Once the next page is requested, the previous page is cleared and
+        removed from the tree together with everything that came before it,
+        so memory usage doesn't grow with the number of pages.
+
+        Don't keep references to yielded pages or their descendants after
+        advancing the iterator; they will be empty.
+
+        >>> for page in HOCRDocument.iterpages("book.hocr"):
+        ...     print(page.id, len(page.words))
+
+        The errors raised for invalid files are the same as for HOCRDocument,
+        but they are only raised when iterating.
+
+        :param filename: Filename of the input HOCR document
+        :param encoding: (optional) Encoding to be for the document.
+            Default is utf-8.
+        :param parser_options: (optional) see HOCRDocument.__init__
+        :raises EncodingError: When decoding the file with the given encoding
+            raises a UnicodeDecodeError.
+        :raises EmptyDocumentException: When the given file is empty
+        """
+        if os.path.getsize(filename) == 0:
+            raise EmptyDocumentException("Document is empty")
+
+        with open(filename, "rb") as f:
+            source = _DecodingReader(f, encoding, filename)
+            events = lxml.etree.iterparse(
+                source,
+                events=("end",),
+                html=True,
+                encoding=encoding,
+                **parser_options,
+            )
+            lookup = lxml.etree.ElementDefaultClassLookup(element=HOCRNode)
+            events.set_element_class_lookup(lookup)
+
+            cache = None
+            for _, element in events:
+                if "ocr_page" not in (element.get("class") or "").split():
+                    continue
+
+                if cache is None:
+                    cache = DocumentCache(element.getroottree().getroot())
+
+                yield element
+
+                # the page has been consumed: free it and all preceding nodes
+                cache.invalidate()
+                element.clear()
+                parent = element.getparent()
+                if parent is not None:
+                    while element.getprevious() is not None:
+                        del parent[0]
+
     @property
     def root(self) -> Optional["HOCRNode"]:
         """Returns the root node of the document if available
@@ -52,6 +331,37 @@ class HOCRDocument:
         """
         return self.html.find("body")
 
+    @property
+    def metadata(self) -> Metadata:
+        """Returns the meta fields of the head of the document
+
+        The head is searched once; the result is cached in the DocumentCache
+        and dropped with cache.invalidate(). To read the metadata of a file
+        without parsing it, use read_metadata. ocr_system and
+        ocr_capabilities search the whole document instead, see Metadata.find.
+
+        :return: Metadata, see metadata.Metadata
+        """
+        return self.cache.get(self.root, "metadata", Metadata.from_node)
+
+    @staticmethod
+    def read_metadata(filename: str, encoding: str = "utf-8") -> Metadata:
+        """Reads the meta fields of the HOCR file `filename` without its body
+
+        Only the start of the file up to the end of the head is read and
+        parsed, see Metadata.from_file.
+
+        >>> HOCRDocument.read_metadata("book.hocr").capabilities
+        ['ocr_page', 'ocr_carea', 'ocr_par', 'ocr_line', 'ocrx_word']
+
+        :param filename: Filename of the HOCR document
+        :param encoding: (optional) Encoding of the document. Default is utf-8.
+        :return: Metadata
+        :raises EncodingError: When the head can't be decoded with encoding
+        :raises EmptyDocumentException: When the given file is empty
+        """
+        return Metadata.from_file(filename, encoding)
+
     @property
     def ocr_system(self) -> Optional[str]:
         """Searches for the ocr-system meta tag and returns its content.
@@ -67,12 +377,11 @@ class HOCRDocument:
 
         :return: The content of the meta tag named ocr-system
         """
-        try:
-            meta = self.html.cssselect("meta[name='ocr-system']")[0]
-            return meta.get("content")
-        except IndexError:
+        meta = self._find_meta("ocr-system")
+        if meta is None:
             warnings.warn("Missing ocr-system", MissingRequiredMetaField)
             return None
+        return meta.get("content")
 
     @property
     def ocr_capabilities(self) -> List[str]:
@@ -96,32 +405,365 @@ class HOCRDocument:
         :return: A list, potentially of length zero, of the capabilities in
             the content of the meta tag named ocr-system, split at whitespace.
         """
-        capabilities = []
-
-        try:
-            meta = self.html.cssselect("meta[name='ocr-capabilities']")[0]
-            capabilities = meta.get("content").split()
-        except IndexError:
+        meta = self._find_meta("ocr-capabilities")
+        if meta is None:
             warnings.warn("Missing ocr-capabilities", MissingRequiredMetaField)
+            return []
+        return (meta.get("content") or "").split()
+
+    def _find_meta(self, name: str) -> Optional["HOCRNode"]:
+        # the whole document is searched like before metadata was added, see
+        # Metadata.find; the result is cached like the metadata
+        return self.cache.get(
+            self.root, f"meta {name}", lambda root: Metadata.find(root, name)
+        )
+
+    def trust_capabilities(self, trust: bool = True) -> bool:
+        """Lets the accessors of all nodes rely on the declared capabilities
+
+        In this mode, the pages, areas, paragraphs, lines and words accessors
+        return an empty list right away for ocr classes missing from the
+        ocr-capabilities meta field, instead of searching the tree. Glyph
+        extraction (see HOCRNode.glyphs) only looks for the glyph classes
+        that are declared. For documents of engines that declare their
+        output correctly, e.g. Tesseract, most structural scans are skipped:
 
-        return capabilities
+        >>> document.trust_capabilities()
+        True
+        >>> document.body.areas  # [] if ocr_carea isn't declared
+
+        Elements of undeclared classes are then silently ignored, so only
+        use this for documents whose producer is known to be reliable. The
+        mode isn't enabled if the document has no ocr-capabilities field.
+
+        :param trust: (optional) False to switch the mode off again
+        :return: True if the mode is enabled
+        """
+        if not trust or "ocr-capabilities" not in self.metadata.fields:
+            self.cache.capabilities = None
+            return False
+
+        self.cache.capabilities = frozenset(self.metadata.capabilities)
+        return True
 
     @property
     def bbox(self) -> Optional[BBox]:
         """Returns the max BBox containing all other BBoxes of tree nodes
 
-        Iterates over the tree, collecting all BBoxes and calls
-        BBox.max_bbox with the list of BBoxes as argument.
+        Iterates over the tree and passes the BBoxes to BBox.max_bbox as they
+        are found, without collecting them in a list first. For more
+        operations on all boxes of the document, see BBoxArray.from_document.
 
-        :return: BBox, or None if the list of collected bboxes is empty
+        :return: BBox, or None if the tree has no bboxes
         """
-        boxes = []
-        for node in self.iter():
-            box = node.bbox
-            if box:
-                boxes.append(box)
+        boxes = (node.bbox for node in self.iter() if isinstance(node, HOCRNode))
+        return BBox.max_bbox(box for box in boxes if box)
+
+    def to_columns(self) -> Columns:
+        """Returns the ocr elements of the document body as column table
 
-        return BBox.max_bbox(boxes)
+        All elements with an ocr class are collected in a single pass over the
+        tree. See Columns for the available columns.
+
+        :return: Columns instance, empty if the document has no body
+        """
+        if self.body is None:
+            return Columns()
+
+        return Columns.from_node(self.body)
+
+    def rel_bboxes(
+        self, ocr_class: Optional[str] = None
+    ) -> List[Tuple["HOCRNode", BBox]]:
+        """Returns the rel_bbox of all nodes of the body with a bbox
+
+        See HOCRNode.rel_bboxes.
+
+        :param ocr_class: (optional) only return nodes with this ocr class
+        :return: list of (node, rel_bbox) tuples, empty if there is no body
+        """
+        if self.body is None:
+            return []
+
+        return self.body.rel_bboxes(ocr_class)
+
+    def to_model(self) -> DocumentModel:
+        """Returns a lightweight read-only model of the document body
+
+        The model is built in a single pass and doesn't reference the lxml
+        tree, see model.DocumentModel.
+
+        :return: DocumentModel, empty if the document has no body
+        """
+        if self.body is None:
+            return DocumentModel()
+
+        return DocumentModel.from_node(self.body)
+
+    def glyphs(self, page: Union[int, "HOCRNode", None] = None) -> Glyphs:
+        """Returns the character boxes and confidences of the words of a page
+
+        See HOCRNode.glyphs and glyphs.Glyphs.
+
+        >>> glyphs = document.glyphs(0)
+        >>> records = glyphs.to_numpy()
+        >>> low = records["word"][records["confidence"] < 50]
+
+        :param page: (optional) index of the page in the document, or the
+            page node. Default is the whole body.
+        :return: Glyphs of the words of the page, empty if there is no body
+        """
+        if isinstance(page, int):
+            pages = self.body.pages if self.body is not None else []
+            page = pages[page]
+        elif page is None:
+            page = self.body
+            if page is None:
+                return Glyphs()
+
+        return page.glyphs()
+
+    def to_numpy(self) -> Tuple[Any, str]:
+        """Returns the column table as NumPy structured array and the text
+
+        Requires NumPy. See Columns.to_numpy.
+
+        :return: tuple of the structured array and the text of the document,
+            which the text_start and text_end fields refer to
+        """
+        columns = self.to_columns()
+        return columns.to_numpy(), columns.text
+
+    def spatial_index(self, page: Union[int, "HOCRNode"]) -> SpatialIndex:
+        """Returns the spatial index over the elements of a page
+
+        The index is built on first use and cached in the DocumentCache of
+        the page. It's not updated when the page is modified; call
+        page.invalidate() to have it rebuilt on the next call.
+
+        >>> index = document.spatial_index(0)
+        >>> index.query_rect(BBox((0, 0, 500, 500)), ocr_class="ocrx_word")
+
+        :param page: index of the page in the document, or the page node
+        :return: SpatialIndex over all elements of the page with a bbox
+        :raises IndexError: If there is no page with the given index
+        """
+        if isinstance(page, int):
+            pages = self.body.pages if self.body is not None else []
+            page = pages[page]
+
+        return self.cache.get(page, "spatial_index", SpatialIndex.from_node)
+
+    def build_index(self) -> ClassIndex:
+        """Builds the class index of the document in a single pass
+
+        Once the index exists, the pages, areas, paragraphs, lines and words
+        accessors of all nodes of the document look up their results in the
+        index instead of searching the subtree, so e.g. iterating over the
+        words of every line only visits each word once. get_element_by_id
+        uses the index as well.
+
+        The index isn't updated when elements are added, moved or removed;
+        call build_index again after such changes, or drop_index.
+
+        :return: the new ClassIndex
+        """
+        index = ClassIndex(self.root)
+        self.cache.class_index = index
+        return index
+
+    def drop_index(self) -> None:
+        """Removes the class index, see build_index"""
+        self.cache.class_index = None
+
+    @property
+    def index(self) -> Optional[ClassIndex]:
+        """Returns the class index of the document, or None if not built"""
+        return self.cache.class_index
+
+    def get_element_by_id(self, element_id: str) -> Optional["HOCRNode"]:
+        """Returns the first element of the document with the given id
+
+        :param element_id: value of the id attribute
+        :return: HOCRNode, or None if no element has this id
+        """
+        index = self.cache.class_index
+        if index is not None:
+            return index.get_element_by_id(element_id)
+
+        return self.html.get_element_by_id(element_id, None)
+
+    @property
+    def dirty_pages(self) -> List["HOCRNode"]:
+        """Returns the pages marked as modified, see HOCRNode.mark_dirty
+
+        :return: list of page nodes in document order. If the root is in the
+            list, modifications outside of pages were made.
+        """
+        dirty = self.cache.dirty
+        root = self.root
+        if root is not None and id(root) in dirty:
+            return [root]
+        if self.body is None:
+            return []
+        return [page for page in self.body.pages if id(page) in dirty]
+
+    def save(self, filename: Optional[str] = None) -> int:
+        """Writes the document, re-serialising only the modified pages
+
+        If the document was read from a file (HOCRDocument(filename) or
+        frommmap) and the file hasn't changed since, only the pages marked as
+        modified (see HOCRNode.mark_dirty) are serialised. They are spliced
+        into the original bytes of the file, everything else is copied as is,
+        so the cost of a save depends on the size of the edits rather than on
+        the size of the document.
+
+        The whole tree is serialised instead if the document has no source
+        file, the source file changed, the encoding isn't ASCII compatible,
+        pages were added or removed, or nodes outside of pages were modified.
+
+        The output is written to a temporary file which then replaces
+        filename. Afterwards, the written file is the source of the document
+        and no page is marked as modified anymore.
+
+        >>> document.get_element_by_id("word_1_2").set_text("quick")
+        >>> document.save()
+
+        :param filename: (optional) file to write. Default is the file the
+            document was read from.
+        :return: number of bytes written
+        :raises ValueError: If filename isn't given and the document wasn't
+            read from a file
+        """
+        if filename is None:
+            if self._source is None:
+                raise ValueError("filename is required, the document has no file")
+            filename = self._source[0]
+
+        splice = self._plan_splice()
+        directory = os.path.dirname(os.path.abspath(filename))
+        fd, temp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                if splice is None:
+                    root = self.root
+                    if root is None:
+                        raise ValueError("Document has no root to write")
+                    tree = root.getroottree()
+                    f.write(
+                        lxml.etree.tostring(tree, encoding=self.encoding, method="html")
+                    )
+                    index = None
+                else:
+                    index = self._write_splice(f, *splice)
+                size = f.tell()
+            os.replace(temp, filename)
+        except BaseException:
+            try:
+                os.remove(temp)
+            except OSError:
+                pass
+            raise
+
+        self.cache.dirty.clear()
+        self._set_source(filename)
+        source = self._source
+        if index is not None and source is not None:
+            index.size, index.mtime = source[1], source[2]
+            self._page_index = index
+        return size
+
+    def _plan_splice(
+        self,
+    ) -> Optional[Tuple[str, PageIndex, List[Tuple[int, "HOCRNode"]]]]:
+        """Returns (source, page index, modified (number, page)) or None
+
+        None means that the modified pages can't be spliced into the source
+        file, see save.
+        """
+        if self._source is None or not _ascii_compatible(self.encoding):
+            return None
+
+        source, size, mtime = self._source
+        try:
+            stat = os.stat(source)
+        except OSError:
+            return None
+        if (stat.st_size, stat.st_mtime_ns) != (size, mtime):
+            return None
+
+        dirty = self.cache.dirty
+        if id(self.root) in dirty or self.body is None:
+            return None
+
+        index = self._page_index
+        if index is None or not index.is_current(source):
+            index = PageIndex.from_file(source, self.encoding)
+
+        pages = self.body.pages
+        if len(pages) != len(index):
+            return None
+
+        changed = []
+        for number, page in enumerate(pages):
+            if id(page) in dirty:
+                changed.append((number, page))
+            elif page.get("id") != index.ids[number]:
+                # the pages don't match the ones of the file
+                return None
+
+        # e.g. a page marked as modified that isn't a page anymore
+        if len(changed) != len(dirty):
+            return None
+
+        return source, index, changed
+
+    def _write_splice(
+        self,
+        f: BinaryIO,
+        source: str,
+        index: PageIndex,
+        changed: List[Tuple[int, "HOCRNode"]],
+    ) -> PageIndex:
+        """Writes the source file with the changed pages replaced to f
+
+        :return: the page index of the written file
+        """
+        starts, ends = list(index.starts), list(index.ends)
+        shift = 0
+        changed_numbers = {number: page for number, page in changed}
+
+        with open(source, "rb") as src:
+            with mmap.mmap(src.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                with memoryview(data) as view:
+                    position = 0
+                    for number in range(len(index)):
+                        start, end = index[number]
+                        starts[number] = start + shift
+                        page = changed_numbers.get(number)
+                        if page is not None:
+                            f.write(view[position:start])
+                            serialised = lxml.etree.tostring(
+                                page, encoding=str, method="html", with_tail=False
+                            ).encode(self.encoding, "xmlcharrefreplace")
+                            f.write(serialised)
+                            position = end
+                            shift += len(serialised) - (end - start)
+                        ends[number] = end + shift
+                    f.write(view[position:])
+
+        return PageIndex(starts, ends, list(index.ids), encoding=index.encoding)
+
+    def write_text(self, f: TextIO) -> int:
+        """Writes the ocr_text of the document body to f, see HOCRNode.write_text
+
+        :param f: file-like object with a write method accepting str
+        :return: number of characters written
+        """
+        if self.body is None:
+            return 0
+
+        return self.body.write_text(f)
 
     def iter(self) -> Iterable["HOCRNode"]:
         """Iterates tree in depth first pre-order"""
@@ -129,3 +771,28 @@ class HOCRDocument:
             return []
         else:
             return self.body.iter()
+
+
+class _DecodingReader:
+    """Wraps a binary file and checks that its content can be decoded
+
+    lxml's HTML parser silently replaces invalid input, so the bytes are run
+    through an incremental decoder as they are read to get the same
+    EncodingError that HOCRDocument raises when reading a file.
+    """
+
+    def __init__(self, f: BinaryIO, encoding: str, filename: str):
+        self.f = f
+        self.encoding = encoding
+        self.filename = filename
+        self.decoder = codecs.getincrementaldecoder(encoding)()
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.f.read(size)
+        try:
+            self.decoder.decode(data, final=not data)
+        except UnicodeDecodeError:
+            msg = f"Couldn't open file {self.filename} with encoding {self.encoding}."
+            raise EncodingError(msg)
+
+        return data
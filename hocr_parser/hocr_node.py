@@ -1,11 +1,17 @@
-from typing import List, Union, Optional, Iterable, Dict
+from typing import Any, List, Union, Optional, Iterable, Dict, TextIO, Tuple
+import mmap
 
 import lxml.etree
 import lxml.html
-from lxml.doctestcompare import LHTMLOutputChecker, PARSE_HTML
 
 from .bbox import BBox
+from .compare import fingerprints, nodes_equal
+from .document_cache import DocumentCache
 from .exceptions import EmptyDocumentException, MalformedOCRException
+from .glyphs import GLYPH_CLASSES, Glyphs
+from .parsers import get_parser
+from .properties import parse_properties, split_properties
+from .text import get_ocr_class, iter_text
 
 
 class HOCRNode(lxml.html.HtmlElement):
@@ -13,9 +19,21 @@ class HOCRNode(lxml.html.HtmlElement):
 
     This class isn't meant to be used by itself. It is utilised by the
     HOCRDocument class to represent the elements of the HTML tree.
+
+    Values derived from the tree (parsed properties, the class index, the
+    trusted capabilities) are kept in the DocumentCache of the HOCRDocument.
+    Nodes don't keep the document alive: once it is garbage collected, nodes
+    that are still referenced (e.g. from HOCRDocument(path).body.words) give
+    the same results, but compute them again on every access. Keep a
+    reference to the document while working with its nodes.
     """
 
     HTML = True
+    # declared for type checkers; the values are properties of the lxml base
+    # class, which has no type information
+    text: Optional[str]
+    tail: Optional[str]
+
     OCR_TEXT_SEPARATORS = {
         "ocrx_word": " ",
         "ocr_line": "\n",
@@ -26,7 +44,13 @@ class HOCRNode(lxml.html.HtmlElement):
     }
 
     @staticmethod
-    def fromstring(s: str, encoding: str = "utf-8") -> "HOCRNode":
+    def fromstring(
+        s: str,
+        encoding: str = "utf-8",
+        remove_blank_text: bool = False,
+        huge_tree: bool = False,
+        collect_ids: bool = True,
+    ) -> "HOCRNode":
         """Parses the input HTMl string to a HOCRNode object
 
         Uses lxml.html.fromstring to parse the string to nodes. Note that the
@@ -78,24 +102,84 @@ class HOCRNode(lxml.html.HtmlElement):
         in Python as utf-16-le, but in iconv only utf16le and utf-16le
         are valid.
 
+        The remaining parameters are passed on to lxml's HTMLParser. Parsers
+        are cached per thread and configuration (see parsers.get_parser), so
+        parsing many small documents doesn't create a new parser each time.
+
         :param s: HTML string to parse
         :param encoding: (Optional) Encoding that should be used for the
             document. Default is utf-8
+        :param remove_blank_text: (Optional) Discard whitespace-only text
+            between tags. Default is False
+        :param huge_tree: (Optional) Disable libxml2's limits for very deep
+            trees and very long text content. Default is False
+        :param collect_ids: (Optional) Build a hash table of the id attributes
+            while parsing. Default is True
         :return: lxml parsed HOCRNode of the input string
         """
         # raise exception if input string is empty
         if len(s) == 0:
             raise EmptyDocumentException("document string is empty")
 
-        # define own parser with HOCRNode as element class lookup
-        lookup = lxml.etree.ElementDefaultClassLookup(element=HOCRNode)
-        parser = lxml.etree.HTMLParser(encoding=encoding)
-        parser.set_element_class_lookup(lookup)
+        # get parser with HOCRNode as element class lookup
+        parser = get_parser(
+            HOCRNode,
+            encoding=encoding,
+            remove_blank_text=remove_blank_text,
+            huge_tree=huge_tree,
+            collect_ids=collect_ids,
+        )
 
         # encode input string
         encoded: bytes = s.encode(encoding)
         return lxml.html.fromstring(encoded, parser=parser)
 
+    @staticmethod
+    def frombytes(
+        b: Union[bytes, bytearray, memoryview, mmap.mmap],
+        encoding: str = "utf-8",
+        remove_blank_text: bool = False,
+        huge_tree: bool = False,
+        collect_ids: bool = True,
+    ) -> "HOCRNode":
+        """Parses already encoded HTML to a HOCRNode object
+
+        Unlike fromstring, the input isn't decoded or re-encoded but handed to
+        the parser as is; libxml2 decodes it with the given encoding while
+        parsing. bytes input is treated exactly like the input of fromstring.
+
+        Other bytes-like objects (bytearray, memoryview, mmap, ...) are parsed
+        without copying them. They are always treated as a full document, so
+        the root element of the tree is returned and no fragment handling as
+        described in fromstring takes place.
+
+        :param b: encoded HTML to parse
+        :param encoding: (Optional) Encoding of the input. Default is utf-8
+        :param remove_blank_text: (Optional) see fromstring
+        :param huge_tree: (Optional) see fromstring
+        :param collect_ids: (Optional) see fromstring
+        :return: lxml parsed HOCRNode of the input
+        :raises EmptyDocumentException: If the input is empty
+        """
+        # raise exception if input is empty
+        if len(b) == 0:
+            raise EmptyDocumentException("document is empty")
+
+        # get parser with HOCRNode as element class lookup
+        parser = get_parser(
+            HOCRNode,
+            encoding=encoding,
+            remove_blank_text=remove_blank_text,
+            huge_tree=huge_tree,
+            collect_ids=collect_ids,
+        )
+
+        # lxml.html.fromstring only handles bytes and str
+        if isinstance(b, bytes):
+            return lxml.html.fromstring(b, parser=parser)
+        else:
+            return lxml.etree.fromstring(b, parser=parser)
+
     def __eq__(self, o: object) -> bool:
         """Compares the HOCRNode to another object
 
@@ -106,25 +190,59 @@ class HOCRNode(lxml.html.HtmlElement):
         https://lxml.de/lxmlhtml.html#running-html-doctests
 
         Though this isn't a doctest, this functionality is essentially what
-        is needed to compare two nodes. The comparator lives in
-        lxml.doctestcompare.LHTMLOutputChecker, which is used with the
-        PARSE_HTML optionflag.
+        is needed to compare two nodes. Serialising both nodes and handing
+        them to lxml.doctestcompare.LHTMLOutputChecker is slow though, so
+        compare.nodes_equal walks both trees directly, applying the same
+        rules as the output checker.
 
         The following is considered functionally equivalent by the output
         checker and will therefore evaluate as true:
         - Different order of attributes
         - Repeated spaces inside a tag
         - Whitespace between tags
+
+        Cached fingerprints aren't used here: they aren't dropped by edits
+        that bypass set (e.g. assigning text or tail), so they may be stale.
         """
         if not isinstance(o, HOCRNode):
             return False
 
-        checker = LHTMLOutputChecker()
-        return checker.check_output(
-            want=lxml.etree.tostring(self),
-            got=lxml.etree.tostring(o),
-            optionflags=PARSE_HTML,
-        )
+        return nodes_equal(self, o)
+
+    def fingerprint(self) -> str:
+        """Returns the structural hash of the node and its subtree
+
+        Nodes that are equal (see __eq__) have the same fingerprint, so
+        fingerprints can be used to find duplicate subtrees or to compare
+        subtrees of different documents. See compare.fingerprints for details.
+
+        The fingerprints of the node and of all its descendants are computed
+        in a single pass. If the node belongs to a tree with a DocumentCache,
+        they are all cached, so the fingerprint of any descendant is available
+        right away afterwards. Setting an attribute of a node through set
+        drops the cached fingerprints of the node and its ancestors; call
+        invalidate() after other modifications, e.g. of text or tail.
+
+        :return: hex digest of the subtree
+        """
+        cached = self._cached_fingerprint()
+        if cached is not None:
+            return cached
+
+        computed = fingerprints(self)
+        cache = DocumentCache.of(self)
+        if cache is not None:
+            for element, digest in computed.values():
+                cache.put(element, "fingerprint", digest.hex())
+
+        return computed[id(self)][1].hex()
+
+    def _cached_fingerprint(self) -> Optional[str]:
+        cache = DocumentCache.of(self)
+        if cache is None:
+            return None
+
+        return cache.peek(self, "fingerprint")
 
     def tostring(self) -> str:
         """Returns the HTML string of the current node"""
@@ -172,15 +290,275 @@ class HOCRNode(lxml.html.HtmlElement):
 
         return None
 
+    def set(self, key: str, value: Optional[str] = None) -> None:
+        """Sets an attribute of the node
+
+        Setting the title, class or id attribute invalidates the values
+        cached for this node in the DocumentCache of its tree (see invalidate)
+        and marks the page of the node as modified (see mark_dirty). Setting
+        the class or id attribute also drops the class index of the tree.
+
+        Other attributes don't affect cached values and are set as in lxml,
+        so building a tree stays cheap. Like when modifying the attributes
+        through the attrib dict, call mark_dirty() before saving the document
+        (and invalidate() if fingerprints are used) in that case.
+        """
+        super().set(key, value)
+        if key not in ("title", "class", "id"):
+            return
+
+        self.invalidate()
+        if key != "title":
+            cache = DocumentCache.of(self)
+            if cache is not None:
+                cache.class_index = None
+        self.mark_dirty()
+
+    def invalidate(self) -> None:
+        """Drops all values cached for this node in the cache of its tree
+
+        The fingerprints of the ancestors and the parent bboxes of the
+        descendants depend on this node, so they are dropped as well.
+        """
+        cache = DocumentCache.of(self)
+        if cache is not None:
+            cache.invalidate(self)
+            for ancestor in self.iterancestors():
+                cache.discard(ancestor, "fingerprint")
+            for descendant in self.iterdescendants():
+                cache.discard(descendant, "parent_bbox")
+
+    def mark_dirty(self) -> None:
+        """Marks the page containing this node as modified
+
+        HOCRDocument.save only serialises the pages marked as modified and
+        copies everything else from the original file. The editing methods
+        (set, set_text, set_bbox, set_confidence, merge, split) mark the
+        pages they change; call this after modifying the tree directly
+        through lxml. Nodes outside of any page mark the whole document.
+        """
+        cache = DocumentCache.of(self)
+        if cache is None:
+            return
+
+        page = self
+        while page is not None and "ocr_page" not in page.classes:
+            page = page.getparent()
+        cache.mark_dirty(page if page is not None else cache.root)
+
+    def _set_property(self, name: str, value: Optional[str]) -> None:
+        """Sets (or with value None removes) one property of the title
+
+        The other properties are kept as they are, in their order.
+        """
+        title = self.get("title", "")
+        props = split_properties(title) if '"' in title else title.split(";")
+
+        properties = []
+        found = False
+        for prop in props:
+            prop = prop.strip()
+            if not prop:
+                continue
+            if prop.split(" ", 1)[0] == name:
+                if value is not None and not found:
+                    properties.append(f"{name} {value}")
+                found = True
+            else:
+                properties.append(prop)
+
+        if value is not None and not found:
+            properties.append(f"{name} {value}")
+
+        if properties:
+            self.set("title", "; ".join(properties))
+        elif self.get("title") is not None:
+            # no empty title attributes
+            del self.attrib["title"]
+            self.invalidate()
+            self.mark_dirty()
+
+    def set_text(self, text: str) -> None:
+        """Replaces the content of this node (e.g. a word) with text
+
+        Child elements are removed, the tail is kept. If the number of
+        characters changes, the character level properties x_bboxes and
+        x_confs are removed from the title, since they don't match the new
+        text anymore.
+
+        :param text: new text of the node
+        """
+        length = len(self.ocr_text)
+        tail = self.tail
+        for child in list(self):
+            self.remove(child)
+        self.text = text
+        self.tail = tail
+
+        if len(text) != length and self.get("title"):
+            self._set_property("x_bboxes", None)
+            self._set_property("x_confs", None)
+
+        cache = DocumentCache.of(self)
+        if cache is not None:
+            cache.class_index = None
+        self.invalidate()
+        self.mark_dirty()
+
+    def set_bbox(self, bbox: Optional[BBox]) -> None:
+        """Sets the bbox property of this node, or removes it if bbox is None
+
+        :param bbox: the new BBox
+        """
+        value = None
+        if bbox is not None:
+            value = f"{bbox.x1} {bbox.y1} {bbox.x2} {bbox.y2}"
+        self._set_property("bbox", value)
+
+    def set_confidence(self, confidence: Optional[float]) -> None:
+        """Sets the x_wconf property, or removes it if confidence is None
+
+        x_wconf takes precedence over x_confs, so the confidence property
+        returns the new value afterwards (see confidence).
+
+        :param confidence: the new confidence, 0 to 100
+        """
+        value = None if confidence is None else f"{confidence:g}"
+        self._set_property("x_wconf", value)
+
+    def merge(self, other: "HOCRNode", separator: str = "") -> None:
+        """Merges the node other (e.g. the next word) into this node
+
+        The text becomes the ocr_text of this node, separator and the ocr_text
+        of other; the bbox is the box containing both bboxes and the
+        confidence the lower of both confidences. other is removed from the
+        tree; its tail replaces the tail of this node.
+
+        >>> first, second = line.words[3:5]  # "exam", "ple"
+        >>> first.merge(second)  # "example"
+
+        :param other: next sibling of this node with the same ocr class,
+            usually the next word of the same line
+        :param separator: (optional) text between both texts. Default is "".
+        :raises ValueError: If other isn't the next sibling of this node or
+            has another ocr class
+        """
+        # HOCRNode.__eq__ compares content, so identity is checked explicitly
+        if self.getnext() is not other:
+            raise ValueError("can only merge a node with its next sibling")
+        if other.ocr_class != self.ocr_class:
+            raise ValueError("can't merge nodes of different ocr classes")
+
+        bbox = BBox.max_bbox(b for b in (self.bbox, other.bbox) if b is not None)
+        confidences = [c for c in (self.confidence, other.confidence) if c is not None]
+        text = self.ocr_text + separator + other.ocr_text
+        tail = other.tail
+
+        other.mark_dirty()
+        other.invalidate()
+        other.getparent().remove(other)
+
+        self.set_text(text)
+        self.tail = tail
+        self.set_bbox(bbox)
+        self.set_confidence(min(confidences) if confidences else None)
+
+    def split(self, position: int, separator: str = " ") -> "HOCRNode":
+        """Splits this node (e.g. a word) into two at a position of its text
+
+        This node keeps the text before position, a new node with the same
+        tag and attributes gets the rest and is inserted after this node. The
+        new node gets a new unique id based on the id of this node.
+
+        The bboxes of both nodes are the boxes of their characters if all
+        characters have boxes (see glyphs), otherwise the bbox is divided in
+        proportion to the number of characters. Both nodes keep the
+        confidence; character level properties are removed.
+
+        >>> word.ocr_text
+        'thequick'
+        >>> second = word.split(3)
+        >>> word.ocr_text, second.ocr_text
+        ('the', 'quick')
+
+        :param position: index in ocr_text where the second node starts
+        :param separator: (optional) tail between both nodes. Default is " ".
+        :return: the new node
+        :raises ValueError: If position doesn't split the text in two
+        """
+        text = self.ocr_text
+        if not 0 < position < len(text):
+            raise ValueError("position must be inside the text")
+
+        bbox = self.bbox
+        boxes: List[Optional[BBox]] = [bbox, bbox]
+        glyphs = self.glyphs()
+        if glyphs.text == text and all(x != -1 for x in glyphs["x1"]):
+            x1, y1, x2, y2 = (glyphs[k] for k in ("x1", "y1", "x2", "y2"))
+            boxes = [
+                BBox.from_ints(min(x1[a:b]), min(y1[a:b]), max(x2[a:b]), max(y2[a:b]))
+                for a, b in ((0, position), (position, len(text)))
+            ]
+        elif bbox is not None:
+            split_x = bbox.x1 + round((bbox.x2 - bbox.x1) * position / len(text))
+            boxes = [
+                BBox.from_ints(bbox.x1, bbox.y1, split_x, bbox.y2),
+                BBox.from_ints(split_x, bbox.y1, bbox.x2, bbox.y2),
+            ]
+
+        second = self.makeelement(self.tag, dict(self.attrib))
+        self.addnext(second)
+        if self.id is not None:
+            root = self.getroottree().getroot()
+            number = 2
+            while root.get_element_by_id(f"{self.id}_{number}", None) is not None:
+                number += 1
+            second.set("id", f"{self.id}_{number}")
+
+        second.tail = self.tail
+        self.tail = separator
+        for node, node_text, node_bbox in (
+            (self, text[:position], boxes[0]),
+            (second, text[position:], boxes[1]),
+        ):
+            # the lengths change, so x_bboxes and x_confs are dropped
+            node.set_text(node_text)
+            if node_bbox is not None:
+                node.set_bbox(node_bbox)
+
+        return second
+
     @property
     def ocr_properties(self) -> Dict[str, str]:
+        """Returns the properties in the title attribute as dict
+
+        If the node belongs to a tree with a DocumentCache (e.g. the tree of a
+        HOCRDocument), the title is only parsed on the first access.
+
+        :return: dict mapping property names to their unparsed values
+        :raises MalformedOCRException: If a property has no value
+        """
+        return dict(self._properties)
+
+    @property
+    def _properties(self) -> Dict[str, str]:
+        """Returns the (possibly cached) properties dict; don't modify it"""
+        cache = DocumentCache.of(self)
+        if cache is None:
+            return self._parse_properties()
+
+        return cache.get(self, "properties", HOCRNode._parse_properties)
+
+    def _parse_properties(self) -> Dict[str, str]:
         d: Dict = {}
 
         title = self.get("title", "")
         if title == "":
             return d
 
-        for prop in title.split(";"):
+        # semicolons in quoted values (e.g. of image) don't separate properties
+        props = split_properties(title) if '"' in title else title.split(";")
+        for prop in props:
             prop = prop.strip()
             splt = prop.split(" ", 1)
             if not len(splt) == 2:
@@ -190,6 +568,31 @@ class HOCRNode(lxml.html.HtmlElement):
 
         return d
 
+    @property
+    def typed_properties(self) -> Dict[str, Any]:
+        """Returns the properties in the title attribute as typed values
+
+        Unlike ocr_properties, the values are converted according to the hOCR
+        1.2 spec: numbers, BBox instances, compact arrays for per-character
+        data like x_bboxes and x_confs, unquoted strings for image etc. See
+        properties.parse_properties for all conversions.
+
+        If the node belongs to a tree with a DocumentCache, the title is only
+        parsed on the first access. The returned dict is a copy, but the
+        values (e.g. arrays) are shared with the cache; don't modify them.
+
+        :return: dict mapping property names to their typed values
+        :raises MalformedOCRException: If a property is malformed
+        """
+        cache = DocumentCache.of(self)
+        if cache is None:
+            return parse_properties(self.get("title", ""))
+
+        properties = cache.get(
+            self, "typed_properties", lambda e: parse_properties(e.get("title", ""))
+        )
+        return dict(properties)
+
     @property
     def bbox(self) -> Optional[BBox]:
         """Parses the bbox hocr property and returns it as BBox instance
@@ -208,7 +611,19 @@ class HOCRNode(lxml.html.HtmlElement):
             property in the title attribute is malformed (wrong number of
             arguments or wrong type of arguments)
         """
-        bbox = self.ocr_properties.get("bbox")
+        cache = DocumentCache.of(self)
+        if cache is None:
+            return self._parse_bbox(self._properties)
+
+        return cache.get(self, "bbox", HOCRNode._own_bbox)
+
+    @staticmethod
+    def _own_bbox(element: "HOCRNode") -> Optional[BBox]:
+        return element._parse_bbox(element._properties)
+
+    @staticmethod
+    def _parse_bbox(properties: Dict[str, str]) -> Optional[BBox]:
+        bbox = properties.get("bbox")
         if not bbox:
             return None
 
@@ -225,7 +640,7 @@ class HOCRNode(lxml.html.HtmlElement):
         except ValueError:
             raise MalformedOCRException("Value of bbox arguments must be uint")
 
-        return BBox((x0, y0, x1, y1))
+        return BBox.from_ints(x0, y0, x1, y1)
 
     @property
     def parent_bbox(self) -> Optional[BBox]:
@@ -234,16 +649,50 @@ class HOCRNode(lxml.html.HtmlElement):
         Traverses the tree upwards through the parent and looks for the first
         node that defines a BBox.
 
+        If the node belongs to a tree with a DocumentCache, the result is
+        cached for this node and all ancestors passed on the way up, which
+        have the same parent bbox. The walk also stops at the first ancestor
+        whose parent bbox is cached already, so resolving the parent bboxes
+        of many nodes visits each ancestor only once. See also rel_bboxes.
+
         :return: BBox instance, or None if no parent with a BBox exists
         """
-        parent = self.parent
-        while parent is not None:
-            if parent.bbox:
-                return parent.bbox
-            else:
-                parent = parent.parent
+        cache = DocumentCache.of(self)
+        if cache is None:
+            parent = self.parent
+            while parent is not None:
+                bbox = parent.bbox
+                if bbox:
+                    return bbox
+                else:
+                    parent = parent.parent
 
-        return None
+            return None
+
+        # values are cached as 1-tuples to tell a cached None from a miss
+        path = []
+        node = self
+        while True:
+            cached = cache.peek(node, "parent_bbox")
+            if cached is not None:
+                result = cached[0]
+                break
+
+            path.append(node)
+            parent = node.getparent()
+            if parent is None:
+                result = None
+                break
+
+            result = parent.bbox
+            if result is not None:
+                break
+            node = parent
+
+        for node in path:
+            cache.put(node, "parent_bbox", (result,))
+
+        return result
 
     @property
     def rel_bbox(self) -> Optional[BBox]:
@@ -266,21 +715,55 @@ class HOCRNode(lxml.html.HtmlElement):
 
         :return: A BBox instance, or None
         """
-        if self.bbox is None:
+        bbox = self.bbox
+        if bbox is None:
             return None
 
         parent_bbox = self.parent_bbox
         if parent_bbox is None:
-            return self.bbox
-
-        return BBox(
-            (
-                self.bbox.x1 - parent_bbox.x1,
-                self.bbox.y1 - parent_bbox.y1,
-                self.bbox.x2 - parent_bbox.x1,
-                self.bbox.y2 - parent_bbox.y1,
-            )
-        )
+            return bbox
+
+        return bbox.relative_to(parent_bbox)
+
+    def rel_bboxes(
+        self, ocr_class: Optional[str] = None
+    ) -> List[Tuple["HOCRNode", BBox]]:
+        """Returns the rel_bbox of the node and all descendants with a bbox
+
+        The subtree is traversed once, top-down, keeping track of the closest
+        bbox of the ancestors, so no ancestors are visited repeatedly. If the
+        node belongs to a tree with a DocumentCache, the parent bbox of each
+        returned node is cached as well.
+
+        :param ocr_class: (optional) only return nodes with this ocr class
+        :return: list of (node, rel_bbox) tuples in document order
+        :raises MalformedOCRException: If a bbox is malformed
+        """
+        cache = DocumentCache.of(self)
+        result = []
+        # closest bbox of the open elements or their ancestors
+        stack = [self.parent_bbox]
+
+        for event, element in lxml.etree.iterwalk(self, events=("start", "end")):
+            if event == "end":
+                stack.pop()
+                continue
+
+            parent_bbox = stack[-1]
+            bbox = element.bbox
+            stack.append(parent_bbox if bbox is None else bbox)
+            if bbox is None:
+                continue
+            if ocr_class is not None and get_ocr_class(element) != ocr_class:
+                continue
+
+            if cache is not None:
+                cache.put(element, "parent_bbox", (parent_bbox,))
+            if parent_bbox is not None:
+                bbox = bbox.relative_to(parent_bbox)
+            result.append((element, bbox))
+
+        return result
 
     @property
     def confidence(self) -> Optional[float]:
@@ -317,8 +800,20 @@ class HOCRNode(lxml.html.HtmlElement):
         :return: A float if x_confs and/or x_wconf properties are given in
                  the title string of the element; otherwise None
         """
+        cache = DocumentCache.of(self)
+        if cache is None:
+            return self._parse_confidence(self._properties)
+
+        return cache.get(self, "confidence", HOCRNode._own_confidence)
+
+    @staticmethod
+    def _own_confidence(element: "HOCRNode") -> Optional[float]:
+        return element._parse_confidence(element._properties)
+
+    @staticmethod
+    def _parse_confidence(properties: Dict[str, str]) -> Optional[float]:
         # return x_wconf if it is given
-        x_wconf = self.ocr_properties.get("x_wconf")
+        x_wconf = properties.get("x_wconf")
         if x_wconf:
             try:
                 return float(x_wconf)
@@ -326,7 +821,7 @@ class HOCRNode(lxml.html.HtmlElement):
                 raise MalformedOCRException("Value of x_wconf must be float")
 
         # return averaged x_confs if given
-        x_confs = self.ocr_properties.get("x_confs")
+        x_confs = properties.get("x_confs")
         if x_confs:
             values = x_confs.split(" ")
 
@@ -340,49 +835,111 @@ class HOCRNode(lxml.html.HtmlElement):
 
         return None
 
+    def _find_ocr_class(self, class_name: str) -> List["HOCRNode"]:
+        """find_class that uses the class index of the tree if there is one
+
+        With an index (see HOCRDocument.build_index), the cost depends on the
+        number of results instead of the size of the subtree. If the tree
+        trusts its capabilities (see HOCRDocument.trust_capabilities), classes
+        that aren't declared are not searched at all.
+        """
+        cache = DocumentCache.of(self)
+        if cache is None:
+            return self.find_class(class_name)
+
+        if cache.capabilities is not None and class_name not in cache.capabilities:
+            return []
+        if cache.class_index is not None:
+            found = cache.class_index.find_class(self, class_name)
+            if found is not None:
+                return found
+
+        return self.find_class(class_name)
+
     @property
     def pages(self) -> List["HOCRNode"]:
         """Finds and returns all children with the ocr_page class."""
-        return self.find_class("ocr_page")
+        return self._find_ocr_class("ocr_page")
 
     @property
     def areas(self) -> List["HOCRNode"]:
         """Finds and returns all children with the ocr_carea class."""
-        return self.find_class("ocr_carea")
+        return self._find_ocr_class("ocr_carea")
 
     @property
     def paragraphs(self) -> List["HOCRNode"]:
         """Finds and returns all children with the ocr_par class."""
-        return self.find_class("ocr_par")
+        return self._find_ocr_class("ocr_par")
 
     @property
     def lines(self) -> List["HOCRNode"]:
         """Finds and returns all children with the ocr_line class."""
-        return self.find_class("ocr_line")
+        return self._find_ocr_class("ocr_line")
 
     @property
     def words(self) -> List["HOCRNode"]:
         """Finds and returns all children with the ocrx_word class."""
-        return self.find_class("ocrx_word")
+        return self._find_ocr_class("ocrx_word")
+
+    def glyphs(self) -> Glyphs:
+        """Returns the character boxes and confidences of the words
+
+        All words in the subtree of this node (including the node itself) are
+        collected in document order, see glyphs.Glyphs. The values are taken
+        from x_bboxes and x_confs of the words, or from their ocrx_cinfo
+        elements.
+
+        >>> glyphs = word.glyphs()
+        >>> for char, x1 in zip(glyphs.text, glyphs["x1"]):
+        ...     print(char, x1)
+
+        If the tree trusts its capabilities (see
+        HOCRDocument.trust_capabilities) and no ocrx_cinfo or other glyph
+        classes are declared, the children of the words aren't checked for
+        glyph elements.
+
+        :return: Glyphs with one glyph per character of the words' text
+        :raises MalformedOCRException: If x_bboxes or x_confs are malformed
+        """
+        cache = DocumentCache.of(self)
+        if cache is None or cache.capabilities is None:
+            return Glyphs.from_node(self)
+
+        glyph_classes = [c for c in GLYPH_CLASSES if c in cache.capabilities]
+        return Glyphs.from_node(self, glyph_classes)
 
     @property
     def ocr_text(self) -> str:
-        """Returns the text content of this node and all its children."""
-        # get the text of this node before the start of any possible children
-        text = (self.text or "").strip()
+        """Returns the text content of this node and all its children.
+
+        The text, children and tails of every element are stripped and joined
+        with the separator of the respective child's ocr class (see
+        OCR_TEXT_SEPARATORS). Comments only contribute their tail.
+
+        The tree is walked iteratively and the result joined once at the end
+        (see text.iter_text), so deep or very wide trees are no problem.
+        """
+        return "".join(iter_text(self))
+
+    def write_text(self, f: TextIO) -> int:
+        """Writes the ocr_text of this node to the file-like object f
 
-        for child in self.children:
-            child_text = child.ocr_text
-            ocr_class = child.ocr_class or "default"
-            separator = self.OCR_TEXT_SEPARATORS.get(ocr_class, "\n")
+        The text is written in chunks while walking the tree, so it's never
+        held in memory as a whole. To write the text of a document that's too
+        large to parse at once, write the pages one by one:
 
-            # append child text only if it is not empty
-            if not child_text == "":
-                text = text + separator + child_text
+        >>> with open("book.txt", "w") as f:
+        ...     for i, page in enumerate(HOCRDocument.iterpages("book.hocr")):
+        ...         if i > 0:
+        ...             f.write(HOCRNode.OCR_TEXT_SEPARATORS["ocr_page"])
+        ...         page.write_text(f)
 
-            # append any text after the end tag of the current child
-            tail = (child.tail or "").strip()
-            if tail:
-                text = text + separator + tail
+        :param f: file-like object with a write method accepting str
+        :return: number of characters written
+        """
+        written = 0
+        for chunk in iter_text(self):
+            f.write(chunk)
+            written += len(chunk)
 
-        return text.strip()
+        return written
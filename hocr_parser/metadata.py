@@ -0,0 +1,157 @@
+from typing import Dict, Optional
+import codecs
+import re
+
+import lxml.etree
+
+from .exceptions import EmptyDocumentException, EncodingError
+
+# the head ends at its end tag or, if that is missing, where the body starts
+_HEAD_END = re.compile(r"</head\s*>|<body[\s>/]", re.IGNORECASE)
+
+# bytes that couldn't be decoded, see from_file
+_ESCAPED = re.compile("[\udc80-\udcff]")
+
+# size of the chunks a file is read in until the end of the head is found
+CHUNK_SIZE = 1 << 14
+
+
+class Metadata:
+    """The meta fields in the head of a HOCR document
+
+    Every <meta> element with a name and content is collected in `fields`
+    (name -> content, the first element wins if a name is repeated). The
+    fields defined by the hOCR spec are available as attributes:
+    - system: content of ocr-system, or None
+    - capabilities: ocr-capabilities split at whitespace
+    - number_of_pages: ocr-number-of-pages as int, or None if it's missing
+      or not an integer
+    - langs, scripts: ocr-langs and ocr-scripts split at whitespace
+
+    http://kba.cloud/hocr-spec/1.2/#metadata
+    """
+
+    def __init__(self, fields: Dict[str, str]):
+        """Creates the metadata from the contents of the meta fields
+
+        :param fields: dict mapping names of meta fields to their content
+        """
+        self.fields = fields
+        self.system = fields.get("ocr-system")
+        self.capabilities = fields.get("ocr-capabilities", "").split()
+        self.langs = fields.get("ocr-langs", "").split()
+        self.scripts = fields.get("ocr-scripts", "").split()
+
+        self.number_of_pages: Optional[int] = None
+        try:
+            self.number_of_pages = int(fields.get("ocr-number-of-pages", ""))
+        except ValueError:
+            pass
+
+    def __repr__(self):
+        return f"Metadata({self.fields!r})"
+
+    def __eq__(self, other):
+        if not isinstance(other, Metadata):
+            return NotImplemented
+        return self.fields == other.fields
+
+    @classmethod
+    def from_node(cls, root: lxml.etree._Element) -> "Metadata":
+        """Collects the meta fields of the head of the tree of root
+
+        Only the head element is searched, so the cost doesn't depend on the
+        size of the body.
+
+        :param root: root element (html) of a HOCR tree
+        :return: Metadata, without fields if the tree has no head
+        """
+        fields: Dict[str, str] = {}
+        head = root.find("head")
+        if head is not None:
+            for meta in head.iter("meta"):
+                name, content = meta.get("name"), meta.get("content")
+                if name is not None and content is not None:
+                    fields.setdefault(name, content)
+
+        return cls(fields)
+
+    @staticmethod
+    def find(root: lxml.etree._Element, name: str) -> Optional[lxml.etree._Element]:
+        """Returns the first <meta> element with the given name in the tree
+
+        Unlike from_node, the whole tree is searched, in document order, and
+        the element is returned even if it has no content. The search stops
+        at the first match, so the body is only walked if the head has no
+        such element.
+
+        :param root: root element (html) of a HOCR tree
+        :param name: name of the meta field, compared case-sensitively
+        :return: the meta element, or None
+        """
+        for meta in root.iter("meta"):
+            if meta.get("name") == name:
+                return meta
+        return None
+
+    @classmethod
+    def from_file(cls, filename: str, encoding: str = "utf-8") -> "Metadata":
+        """Reads the meta fields of the HOCR file `filename`
+
+        The file is read in small chunks until the end of the head is found,
+        and only this prefix is parsed. The body is neither read nor checked,
+        so this is much cheaper than opening a HOCRDocument.
+
+        >>> for path in paths:
+        ...     print(path, Metadata.from_file(path).number_of_pages)
+
+        :param filename: Filename of the HOCR document
+        :param encoding: (optional) Encoding of the document. Default is utf-8.
+        :return: Metadata
+        :raises EncodingError: When the prefix can't be decoded with encoding
+        :raises EmptyDocumentException: When the given file is empty
+        """
+        # undecodable bytes are only an error if they are part of the head
+        decoder = codecs.getincrementaldecoder(encoding)(errors="surrogateescape")
+        text = ""
+        # offset in the decoded text where the search for the end continues,
+        # overlapping the previous chunk in case a tag was split
+        search_from = 0
+
+        with open(filename, "rb") as f:
+            while True:
+                data = f.read(CHUNK_SIZE)
+                text += decoder.decode(data, final=not data)
+
+                match = _HEAD_END.search(text, search_from)
+                if match is not None:
+                    text = text[: match.start()]
+                    break
+                if not data:
+                    break
+                search_from = max(0, len(text) - 16)
+
+        if not text and match is None:
+            raise EmptyDocumentException("Document is empty")
+        if _ESCAPED.search(text):
+            msg = f"Couldn't open file {filename} with encoding {encoding}."
+            raise EncodingError(msg)
+
+        return cls.from_prefix(text)
+
+    @classmethod
+    def from_prefix(cls, text: str) -> "Metadata":
+        """Parses the meta fields of the (possibly truncated) start of a file
+
+        :param text: decoded start of a HOCR document, at least up to the end
+            of its head
+        :return: Metadata
+        """
+        # the decoded text is encoded again, so declarations of other
+        # encodings in the prefix don't matter
+        parser = lxml.etree.HTMLParser(encoding="utf-8", recover=True)
+        data = text.encode("utf-8", "surrogatepass") + b"</head></html>"
+        root = lxml.etree.fromstring(data, parser=parser)
+        if root is None:
+            return cls({})
+        return cls.from_node(root)
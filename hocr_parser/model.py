@@ -0,0 +1,246 @@
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Type
+
+from .bbox import BBox
+from .text import START, TEXT, get_ocr_class, iter_text_events
+
+
+class Element:
+    """Read-only ocr element of a DocumentModel
+
+    Unlike HOCRNode, elements don't reference the lxml tree: all values are
+    computed while the model is built and stored in slots, so reading them
+    is plain attribute access. Only elements with an ocr class are part of
+    the model; children are the closest descendants with an ocr class.
+
+    The values are the same as the ones of the respective HOCRNode:
+    - id, ocr_class (the first class starting with "ocr")
+    - bbox, rel_bbox and confidence, see HOCRNode
+    - ocr_text, a slice of the text of the whole model
+    """
+
+    __slots__ = (
+        "id",
+        "ocr_class",
+        "bbox",
+        "rel_bbox",
+        "confidence",
+        "parent",
+        "children",
+        "model",
+        "text_start",
+        "text_end",
+    )
+
+    def __init__(
+        self,
+        id: Optional[str],
+        ocr_class: str,
+        bbox: Optional[BBox],
+        rel_bbox: Optional[BBox],
+        confidence: Optional[float],
+        parent: Optional["Element"],
+        model: "DocumentModel",
+    ):
+        self.id = id
+        self.ocr_class = ocr_class
+        self.bbox = bbox
+        self.rel_bbox = rel_bbox
+        self.confidence = confidence
+        self.parent = parent
+        self.children: List["Element"] = []
+        self.model = model
+        self.text_start = 0
+        self.text_end = 0
+
+    def __repr__(self):
+        return f"{type(self).__name__}(id={self.id!r}, bbox={self.bbox!r})"
+
+    @property
+    def ocr_text(self) -> str:
+        """Returns the ocr_text of the element, same as HOCRNode.ocr_text"""
+        start, end = self.text_start, self.text_end
+        return self.model.text[start:end]
+
+    def iter(self) -> Iterator["Element"]:
+        """Iterates over the element and its descendants in document order"""
+        stack = [self]
+        while stack:
+            element = stack.pop()
+            yield element
+            stack.extend(reversed(element.children))
+
+    def find_class(self, ocr_class: str) -> List["Element"]:
+        """Returns the element and its descendants with the given ocr class"""
+        return [e for e in self.iter() if e.ocr_class == ocr_class]
+
+    @property
+    def pages(self) -> List["Element"]:
+        return self.find_class("ocr_page")
+
+    @property
+    def areas(self) -> List["Element"]:
+        return self.find_class("ocr_carea")
+
+    @property
+    def paragraphs(self) -> List["Element"]:
+        return self.find_class("ocr_par")
+
+    @property
+    def lines(self) -> List["Element"]:
+        return self.find_class("ocr_line")
+
+    @property
+    def words(self) -> List["Element"]:
+        return self.find_class("ocrx_word")
+
+
+class Page(Element):
+    __slots__ = ()
+
+
+class Area(Element):
+    __slots__ = ()
+
+
+class Paragraph(Element):
+    __slots__ = ()
+
+
+class Line(Element):
+    __slots__ = ()
+
+
+class Word(Element):
+    __slots__ = ()
+
+
+# model class of each ocr class; all other ocr classes use Element
+ELEMENT_CLASSES: Dict[str, Type[Element]] = {
+    "ocr_page": Page,
+    "ocr_carea": Area,
+    "ocr_par": Paragraph,
+    "ocr_line": Line,
+    "ocrx_word": Word,
+}
+
+
+class DocumentModel:
+    """Lightweight read-only object model of a HOCR tree
+
+    The model is built in a single pass over the tree (see from_node) and
+    holds no references to lxml objects, so the tree can be freed once the
+    model exists. Use it for read-only workloads that traverse many
+    elements; for anything else, use HOCRDocument and HOCRNode.
+
+    >>> model = HOCRDocument("book.hocr").to_model()
+    >>> for word in model.words:
+    ...     print(word.id, word.bbox, word.confidence, word.ocr_text)
+    """
+
+    def __init__(self):
+        # ocr elements without ocr ancestor, and all elements in document order
+        self.children: List[Element] = []
+        self.elements: List[Element] = []
+        self.text = ""
+
+    def __len__(self) -> int:
+        """Returns the number of elements"""
+        return len(self.elements)
+
+    @classmethod
+    def from_node(cls, node: Any) -> "DocumentModel":
+        """Builds the model of the subtree of node
+
+        :param node: root HOCRNode of the subtree, e.g. the body of a document
+        :return: DocumentModel
+        :raises MalformedOCRException: If the title of an element is malformed
+        """
+        model = cls()
+        chunks = []
+
+        # the bbox of an element is relative to the closest ancestor with a
+        # bbox, which doesn't have to have an ocr class
+        outer_bbox = node.parent_bbox
+        # (element, closest bbox of it or its ancestors, model element or None)
+        stack: List[Tuple[Any, Optional[BBox], Optional[Element]]] = []
+        parents: List[Element] = []
+
+        for event in iter_text_events(node):
+            kind = event[0]
+            if kind is TEXT:
+                chunks.append(event[1])
+
+            elif kind is START:
+                element = event[1]
+                parent_bbox = stack[-1][1] if stack else outer_bbox
+
+                bbox = confidence = None
+                if element.get("title") is not None:
+                    properties = element._parse_properties()
+                    bbox = element._parse_bbox(properties)
+                    confidence = element._parse_confidence(properties)
+
+                item = None
+                ocr_class = get_ocr_class(element)
+                if ocr_class is not None:
+                    rel_bbox = bbox
+                    if bbox is not None and parent_bbox is not None:
+                        rel_bbox = bbox.relative_to(parent_bbox)
+
+                    parent = parents[-1] if parents else None
+                    item = ELEMENT_CLASSES.get(ocr_class, Element)(
+                        element.get("id"),
+                        ocr_class,
+                        bbox,
+                        rel_bbox,
+                        confidence,
+                        parent,
+                        model,
+                    )
+                    (model.children if parent is None else parent.children).append(item)
+                    model.elements.append(item)
+                    parents.append(item)
+
+                closest_bbox = bbox if bbox is not None else parent_bbox
+                stack.append((element, closest_bbox, item))
+
+            else:
+                _, _, item = stack.pop()
+                if item is not None:
+                    item.text_start, item.text_end = event[2], event[3]
+                    parents.pop()
+
+        model.text = "".join(chunks)
+        return model
+
+    @property
+    def ocr_text(self) -> str:
+        return self.text
+
+    def iter(self) -> Iterator[Element]:
+        """Iterates over all elements in document order"""
+        return iter(self.elements)
+
+    def find_class(self, ocr_class: str) -> List[Element]:
+        """Returns all elements with the given ocr class"""
+        return [e for e in self.elements if e.ocr_class == ocr_class]
+
+    @property
+    def pages(self) -> List[Element]:
+        return self.find_class("ocr_page")
+
+    @property
+    def areas(self) -> List[Element]:
+        return self.find_class("ocr_carea")
+
+    @property
+    def paragraphs(self) -> List[Element]:
+        return self.find_class("ocr_par")
+
+    @property
+    def lines(self) -> List[Element]:
+        return self.find_class("ocr_line")
+
+    @property
+    def words(self) -> List[Element]:
+        return self.find_class("ocrx_word")
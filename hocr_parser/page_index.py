@@ -0,0 +1,384 @@
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+import json
+import mmap
+import os
+import re
+
+from .document_cache import DocumentCache
+from .exceptions import EmptyDocumentException
+from .hocr_node import HOCRNode
+
+# start tag of an element with the class ocr_page
+_PAGE_START = re.compile(
+    rb"<([a-z][a-z0-9]*)\b[^>]*?\sclass\s*=\s*"
+    rb"(?:\"[^\"]*?\bocr_page\b[^\"]*\"|'[^']*?\bocr_page\b[^']*'|ocr_page\b)"
+    rb"[^>]*>",
+    re.IGNORECASE,
+)
+_ID = re.compile(rb"""\sid\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))""", re.IGNORECASE)
+_BODY_END = re.compile(rb"</body\b", re.IGNORECASE)
+
+SIDECAR_SUFFIX = ".pageindex"
+SIDECAR_VERSION = 1
+
+Buffer = Union[bytes, bytearray, memoryview, mmap.mmap]
+
+
+def _tag_pattern(tag: bytes) -> "re.Pattern[bytes]":
+    # groups: "/" for end tags, "/" for self-closing tags
+    return re.compile(rb"<(/?)" + re.escape(tag) + rb"\b[^>]*?(/?)>", re.IGNORECASE)
+
+
+def _ascii_compatible(encoding: str) -> bool:
+    """Checks that markup is encoded the same as in ASCII, see PageIndex"""
+    markup = "<>/=;&'\" azAZ09_-"
+    try:
+        return markup.encode(encoding) == markup.encode("ascii")
+    except LookupError:
+        return False
+
+
+def _check_encoding(encoding: str) -> None:
+    if not _ascii_compatible(encoding):
+        raise ValueError(f"encoding {encoding} isn't ASCII compatible")
+
+
+class PageIndex:
+    """Byte offsets of the ocr_page elements of a HOCR file
+
+    The raw bytes are scanned once with regular expressions, without parsing
+    the document: the start tag of each page is found by its class, and the
+    end by counting the start and end tags with the same name. Page n of the
+    file is data[starts[n]:ends[n]].
+
+    The scan only works for ASCII compatible encodings like utf-8 or the
+    ISO 8859 encodings (others raise ValueError), and it doesn't know about
+    comments or CDATA sections, so pages commented out are found as well.
+    Self-closing tags don't count as start tags. If the end tag of a page is
+    missing, the page ends where the next page starts or where the body ends.
+
+    The index can be stored next to the file as sidecar (see save and
+    for_file). It records the size and modification time of the file, so
+    outdated indices can be detected.
+    """
+
+    def __init__(
+        self,
+        starts: List[int],
+        ends: List[int],
+        ids: List[Optional[str]],
+        size: int = -1,
+        mtime: int = -1,
+        encoding: str = "utf-8",
+    ):
+        """Creates an index from known offsets, usually use build or load
+
+        :param starts: offset of the start tag of each page
+        :param ends: offset after the end tag of each page
+        :param ids: id attribute of each page, or None
+        :param size: (optional) size of the indexed file
+        :param mtime: (optional) modification time of the indexed file in ns
+        :param encoding: (optional) encoding the ids were decoded with
+        """
+        self.starts = starts
+        self.ends = ends
+        self.ids = ids
+        self.size = size
+        self.mtime = mtime
+        self.encoding = encoding
+
+    @classmethod
+    def build(cls, data: Buffer, encoding: str = "utf-8") -> "PageIndex":
+        """Scans data for pages, see PageIndex
+
+        :param data: encoded HOCR document, e.g. an mmap of the file
+        :param encoding: (optional) encoding of data, must be ASCII
+            compatible. Default is utf-8.
+        :return: PageIndex with size set to the length of data
+        :raises ValueError: If the encoding isn't ASCII compatible
+        """
+        _check_encoding(encoding)
+        starts: List[int] = []
+        ends: List[int] = []
+        ids: List[Optional[str]] = []
+
+        match = _PAGE_START.search(data)
+        while match is not None:
+            start = match.start()
+            tag_pattern = _tag_pattern(match.group(1))
+            id_match = _ID.search(match.group(0))
+            next_page = _PAGE_START.search(data, match.end())
+
+            # find the end tag closing the start tag
+            end = None
+            if match.group(0).endswith(b"/>"):
+                end = match.end()
+            else:
+                depth = 1
+                for tag in tag_pattern.finditer(data, match.end()):
+                    if tag.group(2):
+                        # self-closing tags don't change the depth
+                        continue
+                    depth += -1 if tag.group(1) else 1
+                    if depth == 0:
+                        end = tag.end()
+                        break
+
+            if end is None or (next_page is not None and end > next_page.start()):
+                # end tag missing: stop at the next page or the end of the body
+                if next_page is not None:
+                    end = next_page.start()
+                else:
+                    body_end = _BODY_END.search(data, match.end())
+                    end = body_end.start() if body_end is not None else len(data)
+
+            starts.append(start)
+            ends.append(end)
+            if id_match is None:
+                ids.append(None)
+            else:
+                value = next(g for g in id_match.groups() if g is not None)
+                ids.append(value.decode(encoding, "replace"))
+
+            if next_page is not None and next_page.start() < end:
+                next_page = _PAGE_START.search(data, end)
+            match = next_page
+
+        return cls(starts, ends, ids, size=len(data), encoding=encoding)
+
+    @classmethod
+    def from_file(cls, filename: str, encoding: str = "utf-8") -> "PageIndex":
+        """Scans the file `filename` through a memory mapping
+
+        :param filename: Filename of the HOCR document
+        :param encoding: (optional) see build
+        :return: PageIndex with size and mtime of the file
+        :raises EmptyDocumentException: When the given file is empty
+        :raises ValueError: If the encoding isn't ASCII compatible
+        """
+        _check_encoding(encoding)
+        stat = os.stat(filename)
+        if stat.st_size == 0:
+            raise EmptyDocumentException("Document is empty")
+
+        with open(filename, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                index = cls.build(data, encoding)
+
+        index.mtime = stat.st_mtime_ns
+        return index
+
+    @classmethod
+    def for_file(
+        cls, filename: str, sidecar: Union[bool, str] = False, encoding: str = "utf-8"
+    ) -> "PageIndex":
+        """Returns the index of a file, using a sidecar file if possible
+
+        :param filename: Filename of the HOCR document
+        :param sidecar: (optional) False to always scan the file. True to use
+            the sidecar filename + SIDECAR_SUFFIX, or the name of the sidecar.
+            If the sidecar is missing, invalid, outdated or was written for
+            another encoding, the file is scanned and the sidecar (re)written.
+        :param encoding: (optional) see build
+        :return: PageIndex
+        :raises ValueError: If the encoding isn't ASCII compatible
+        """
+        _check_encoding(encoding)
+        if not sidecar:
+            return cls.from_file(filename, encoding)
+
+        path = filename + SIDECAR_SUFFIX if sidecar is True else str(sidecar)
+        try:
+            index = cls.load(path)
+            if index.is_current(filename) and index.encoding == encoding:
+                return index
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+        index = cls.from_file(filename, encoding)
+        index.save(path)
+        return index
+
+    def is_current(self, filename: str) -> bool:
+        """Checks that size and modification time of the file are unchanged"""
+        stat = os.stat(filename)
+        return self.size == stat.st_size and self.mtime == stat.st_mtime_ns
+
+    def save(self, path: str) -> None:
+        """Writes the index to the JSON file `path`"""
+        data = {
+            "version": SIDECAR_VERSION,
+            "size": self.size,
+            "mtime": self.mtime,
+            "starts": self.starts,
+            "ends": self.ends,
+            "ids": self.ids,
+            "encoding": self.encoding,
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+
+    @classmethod
+    def load(cls, path: str) -> "PageIndex":
+        """Reads an index written by save
+
+        :raises ValueError: If the file isn't a valid index
+        """
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+
+        if data.get("version") != SIDECAR_VERSION:
+            raise ValueError(f"unsupported page index version in {path}")
+        if not len(data["starts"]) == len(data["ends"]) == len(data["ids"]):
+            raise ValueError(f"invalid page index {path}")
+
+        return cls(
+            data["starts"],
+            data["ends"],
+            data["ids"],
+            data["size"],
+            data["mtime"],
+            # written before the encoding was recorded
+            data.get("encoding", "utf-8"),
+        )
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __getitem__(self, number: int) -> Tuple[int, int]:
+        """Returns (start, end) of the page with the given number"""
+        return self.starts[number], self.ends[number]
+
+    def number_of(self, page_id: str) -> int:
+        """Returns the number of the page with the given id
+
+        :raises KeyError: If no page has this id
+        """
+        try:
+            return self.ids.index(page_id)
+        except ValueError:
+            raise KeyError(page_id)
+
+
+class LazyDocument:
+    """HOCR file whose pages are only parsed when they are requested
+
+    Instead of parsing the whole document, a PageIndex of the file is built
+    (or loaded from a sidecar) and only the bytes of a requested page are
+    read and parsed. The most recently used pages are kept in an LRU cache.
+
+    >>> book = LazyDocument("book.hocr", sidecar=True)
+    >>> page = book.page(316)
+    >>> page.ocr_text
+
+    Every page is parsed into a tree of its own (html > body > page) with its
+    own DocumentCache, so cached values of the nodes work as usual. Pages
+    are dropped from the LRU cache, not invalidated: references to them stay
+    valid, but requesting the page again parses it anew.
+
+    If the file changes, the index is rebuilt and the cache cleared on the
+    next page request.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        encoding: str = "utf-8",
+        sidecar: Union[bool, str] = False,
+        cache_size: int = 16,
+        **parser_options: bool,
+    ):
+        """Creates a new LazyDocument for the HOCR file `filename`
+
+        :param filename: Filename of the HOCR document
+        :param encoding: (optional) Encoding of the document, must be ASCII
+            compatible. Default is utf-8.
+        :param sidecar: (optional) see PageIndex.for_file
+        :param cache_size: (optional) number of parsed pages to keep. Default
+            is 16.
+        :param parser_options: (optional) see HOCRDocument.__init__
+        :raises EmptyDocumentException: When the given file is empty
+        :raises ValueError: If the encoding isn't ASCII compatible
+        """
+        self.filename = filename
+        self.encoding = encoding
+        self.sidecar = sidecar
+        self.cache_size = cache_size
+        self.parser_options = parser_options
+        self.index = PageIndex.for_file(filename, sidecar, encoding)
+        self._pages: "OrderedDict[int, Tuple[HOCRNode, DocumentCache]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        """Returns the number of pages"""
+        return len(self.index)
+
+    def __getitem__(self, number: int) -> HOCRNode:
+        return self.page(number)
+
+    def __iter__(self) -> Iterator[HOCRNode]:
+        for number in range(len(self)):
+            yield self.page(number)
+
+    def page(self, number: int) -> HOCRNode:
+        """Returns the parsed page with the given number
+
+        :param number: number of the page, counted from 0. Negative numbers
+            count from the end.
+        :return: the ocr_page HOCRNode
+        :raises IndexError: If there is no page with the given number
+        :raises EncodingError: When the page can't be decoded
+        """
+        if not self.index.is_current(self.filename):
+            self.index = PageIndex.for_file(self.filename, self.sidecar, self.encoding)
+            self._pages.clear()
+
+        if number < 0:
+            number += len(self)
+        if not 0 <= number < len(self):
+            raise IndexError("page number out of range")
+
+        cached = self._pages.get(number)
+        if cached is not None:
+            self._pages.move_to_end(number)
+            return cached[0]
+
+        page, cache = self._parse(number)
+        self._pages[number] = (page, cache)
+        while len(self._pages) > self.cache_size:
+            self._pages.popitem(last=False)
+
+        return page
+
+    def page_by_id(self, page_id: str) -> HOCRNode:
+        """Returns the parsed page with the given id
+
+        :raises KeyError: If no page has this id
+        """
+        return self.page(self.index.number_of(page_id))
+
+    def _parse(self, number: int) -> Tuple[HOCRNode, DocumentCache]:
+        # imported here, hocr_document uses this module
+        from .hocr_document import HOCRDocument
+
+        start, end = self.index[number]
+        with open(self.filename, "rb") as f:
+            f.seek(start)
+            data = f.read(end - start)
+
+        html = HOCRNode.frombytes(
+            b"<html><body>" + data + b"</body></html>",
+            encoding=self.encoding,
+            **self.parser_options,
+        )
+        HOCRDocument._check_decoded(self.encoding, self.filename, **self.parser_options)
+        body = html.find("body")
+        page = body[0] if body is not None and len(body) else None
+        if page is None:
+            raise EmptyDocumentException(f"page {number} is empty")
+
+        return page, DocumentCache(html)
+
+    def cached_pages(self) -> Dict[int, HOCRNode]:
+        """Returns the currently cached pages by number, least recent first"""
+        return {number: page for number, (page, _) in self._pages.items()}
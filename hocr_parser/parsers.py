@@ -0,0 +1,66 @@
+from typing import Dict, Tuple, Type
+import threading
+
+import lxml.etree
+
+# lxml parsers must not be used by several threads at the same time, so every
+# thread gets its own set of parsers
+_local = threading.local()
+
+
+def get_parser(
+    element_class: Type[lxml.etree.ElementBase],
+    encoding: str = "utf-8",
+    remove_blank_text: bool = False,
+    huge_tree: bool = False,
+    collect_ids: bool = True,
+) -> lxml.etree.HTMLParser:
+    """Returns a cached HTMLParser for the given configuration
+
+    Creating a parser and its element class lookup is expensive compared to
+    parsing a small document. The parsers are therefore created once per
+    thread and configuration and reused afterwards.
+
+    :param element_class: Class used for all elements of parsed trees
+    :param encoding: (optional) Encoding the parser uses for its input.
+        Default is utf-8.
+    :param remove_blank_text: (optional) Discard whitespace-only text between
+        tags. Default is False.
+    :param huge_tree: (optional) Disable libxml2's security restrictions for
+        very deep trees and very long text content. Default is False.
+    :param collect_ids: (optional) Build a hash table of the id attributes
+        while parsing. Default is True.
+    :return: HTMLParser with an element class lookup for element_class
+    """
+    try:
+        parsers: Dict[Tuple, lxml.etree.HTMLParser] = _local.parsers
+    except AttributeError:
+        parsers = _local.parsers = {}
+
+    key = (element_class, encoding, remove_blank_text, huge_tree, collect_ids)
+    parser = parsers.get(key)
+    if parser is None:
+        parser = lxml.etree.HTMLParser(
+            encoding=encoding,
+            remove_blank_text=remove_blank_text,
+            huge_tree=huge_tree,
+            collect_ids=collect_ids,
+        )
+        lookup = lxml.etree.ElementDefaultClassLookup(element=element_class)
+        parser.set_element_class_lookup(lookup)
+        parsers[key] = parser
+
+    return parser
+
+
+def decoding_failed(parser: lxml.etree.HTMLParser) -> bool:
+    """Returns whether the last input of parser had undecodable bytes
+
+    libxml2 replaces such bytes while parsing and only records an error in
+    the parser's error log, which is reset for every parse.
+
+    :param parser: parser that was just used
+    :return: True if an invalid byte sequence was found
+    """
+    invalid = lxml.etree.ErrorTypes.ERR_INVALID_ENCODING
+    return any(error.type == invalid for error in parser.error_log)
@@ -0,0 +1,296 @@
+from array import array
+from typing import Any, Callable, Dict, List, Tuple
+import numbers
+import re
+
+from .bbox import BBox
+from .exceptions import MalformedOCRException
+
+# a quoted string (with backslash escapes), a property separator or a bare
+# word; whitespace between tokens is skipped
+_TOKEN = re.compile(r'"((?:[^"\\]|\\.)*)"|(;)|([^\s;"]+)')
+_ESCAPE = re.compile(r"\\(.)")
+# a quoted string (possibly unterminated) or a property separator
+_QUOTED_OR_SEPARATOR = re.compile(r'"(?:[^"\\]|\\.)*"?|;')
+
+# strings that must be quoted to be read back as one value
+_NEEDS_QUOTES = re.compile(r'[;"\\]|^$')
+# properties whose values the spec defines as delimited strings
+_QUOTED = frozenset(("image", "imagemd5", "x_source"))
+
+Token = Tuple[str, bool]
+
+
+def split_properties(title: str) -> List[str]:
+    """Splits a title at the semicolons that aren't part of a quoted string
+
+    >>> split_properties('image "a;b.png"; ppageno 7')
+    ['image "a;b.png"', ' ppageno 7']
+    """
+    parts = []
+    start = 0
+    for match in _QUOTED_OR_SEPARATOR.finditer(title):
+        if match.group(0) == ";":
+            end = match.start()
+            parts.append(title[start:end])
+            start = match.end()
+
+    parts.append(title[start:])
+    return parts
+
+
+def tokenize(title: str) -> List[Tuple[str, List[Token]]]:
+    """Splits a title into properties and their value tokens in one pass
+
+    :param title: value of a title attribute
+    :return: list of (name, tokens) tuples in the order of the title. Each
+        token is a (value, quoted) tuple; quoted strings are unescaped.
+    :raises MalformedOCRException: If a property has no name
+    """
+    properties: List[Tuple[str, List[Token]]] = []
+    tokens: List[Token] = []
+    name = None
+
+    for match in _TOKEN.finditer(title):
+        quoted, separator, word = match.groups()
+        if separator is not None:
+            if name is None:
+                raise MalformedOCRException(f"Malformed properties: {title}")
+            properties.append((name, tokens))
+            name, tokens = None, []
+        elif name is None:
+            if word is None:
+                raise MalformedOCRException(f"Property without name: {title}")
+            name = word
+        elif word is not None:
+            tokens.append((word, False))
+        else:
+            tokens.append((_ESCAPE.sub(r"\1", quoted), True))
+
+    if name is not None:
+        properties.append((name, tokens))
+
+    return properties
+
+
+def _values(name: str, tokens: List[Token], count: int = -1) -> List[str]:
+    if count >= 0 and len(tokens) != count:
+        raise MalformedOCRException(f"{name} must have {count} values")
+    return [value for value, _ in tokens]
+
+
+def _int(name: str, tokens: List[Token]) -> int:
+    try:
+        return int(_values(name, tokens, 1)[0])
+    except ValueError:
+        raise MalformedOCRException(f"Value of {name} must be int")
+
+
+def _float(name: str, tokens: List[Token]) -> float:
+    try:
+        return float(_values(name, tokens, 1)[0])
+    except ValueError:
+        raise MalformedOCRException(f"Value of {name} must be float")
+
+
+def _number(name: str, tokens: List[Token]) -> float:
+    # int if possible, e.g. for x_fsize, which some engines write as float
+    value = _values(name, tokens, 1)[0]
+    try:
+        return int(value)
+    except ValueError:
+        return _float(name, tokens)
+
+
+def _ints(name: str, tokens: List[Token]) -> array:
+    try:
+        return array("q", [int(v) for v in _values(name, tokens)])
+    except ValueError:
+        raise MalformedOCRException(f"Values of {name} must be int")
+
+
+def _floats(name: str, tokens: List[Token]) -> array:
+    try:
+        return array("d", [float(v) for v in _values(name, tokens)])
+    except ValueError:
+        raise MalformedOCRException(f"Values of {name} must be float")
+
+
+def _pair(convert: Callable[[str], Any]) -> Callable[[str, List[Token]], Tuple]:
+    def parse(name: str, tokens: List[Token]) -> Tuple:
+        try:
+            first, second = _values(name, tokens, 2)
+            return convert(first), convert(second)
+        except ValueError:
+            raise MalformedOCRException(f"Values of {name} must be numbers")
+
+    return parse
+
+
+def _bbox(name: str, tokens: List[Token]) -> BBox:
+    try:
+        x1, y1, x2, y2 = [int(v) for v in _values(name, tokens, 4)]
+    except ValueError:
+        raise MalformedOCRException("Value of bbox arguments must be uint")
+    return BBox.from_ints(x1, y1, x2, y2)
+
+
+def _x_bboxes(name: str, tokens: List[Token]) -> array:
+    values = _ints(name, tokens)
+    if len(values) % 4 != 0:
+        raise MalformedOCRException("x_bboxes must have four values per box")
+    return values
+
+
+def _cuts(name: str, tokens: List[Token]) -> List[Tuple[int, ...]]:
+    # every cut is an offset, optionally followed by comma separated offsets
+    # describing a non-straight cut
+    try:
+        return [tuple(int(v) for v in value.split(",")) for value, _ in tokens]
+    except ValueError:
+        raise MalformedOCRException("Values of cuts must be int")
+
+
+def _string(name: str, tokens: List[Token]) -> str:
+    return " ".join(_values(name, tokens))
+
+
+def _strings(name: str, tokens: List[Token]) -> List[str]:
+    return _values(name, tokens)
+
+
+def _ppageno(name: str, tokens: List[Token]) -> Any:
+    # the spec defines an uint, but some producers write quoted strings
+    if len(tokens) == 1 and tokens[0][1]:
+        return tokens[0][0]
+    return _int(name, tokens)
+
+
+# parsers of the properties defined in hOCR 1.2
+PARSERS: Dict[str, Callable[[str, List[Token]], Any]] = {
+    "baseline": _pair(float),
+    "bbox": _bbox,
+    "cflow": _string,
+    "cuts": _cuts,
+    "hardbreak": _int,
+    "image": _string,
+    "imagemd5": _string,
+    "lpageno": _string,
+    "nlp": _floats,
+    "order": _int,
+    "poly": _ints,
+    "ppageno": _ppageno,
+    "scan_res": _pair(int),
+    "textangle": _float,
+    "x_bboxes": _x_bboxes,
+    "x_confs": _floats,
+    "x_font": _string,
+    "x_fsize": _number,
+    "x_scanner": _string,
+    "x_source": _strings,
+    "x_wconf": _float,
+    "x_size": _float,
+    "x_descenders": _float,
+    "x_ascenders": _float,
+    # not part of the spec; Tesseract writes it for ocrx_cinfo elements
+    "x_conf": _float,
+}
+
+
+def parse_properties(title: str) -> Dict[str, Any]:
+    """Parses all properties of a title into typed values
+
+    Properties defined by the hOCR 1.2 spec are converted by the functions in
+    PARSERS:
+    - bbox: BBox
+    - baseline: (slope, offset) tuple of floats; scan_res: tuple of ints
+    - textangle, x_size, x_descenders, x_ascenders, x_wconf, x_conf: float
+    - hardbreak, order: int; x_fsize: int, or float if not integral
+    - ppageno: int, or str if quoted
+    - x_bboxes, poly: array.array("q") of all values (x_bboxes: 4 per char)
+    - x_confs, nlp: array.array("d")
+    - cuts: list of tuples of ints
+    - image, imagemd5, lpageno, cflow, x_font, x_scanner: str (unquoted)
+    - x_source: list of str
+
+    All other properties are returned as str with the values joined by
+    single spaces. If a property is given more than once, the last one wins.
+
+    >>> parse_properties('image "scan 1.png"; bbox 0 0 10 20; x_confs 90 80')
+    {'image': 'scan 1.png', 'bbox': BBox((0, 0, 10, 20)),
+     'x_confs': array('d', [90.0, 80.0])}
+
+    :param title: value of a title attribute
+    :return: dict mapping property names to their values
+    :raises MalformedOCRException: If a property is malformed
+    """
+    properties = {}
+    for name, tokens in tokenize(title):
+        if not tokens:
+            raise MalformedOCRException(f"Property {name} has no value")
+        parse = PARSERS.get(name, _string)
+        properties[name] = parse(name, tokens)
+
+    return properties
+
+
+def _quote(value: str) -> str:
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def _format_number(value: Any) -> str:
+    if isinstance(value, numbers.Integral):
+        return str(int(value))
+    value = float(value)
+    if value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _format_value(name: str, value: Any) -> str:
+    if isinstance(value, BBox):
+        return f"{value.x1} {value.y1} {value.x2} {value.y2}"
+    if isinstance(value, str):
+        if name in _QUOTED or _NEEDS_QUOTES.search(value):
+            return _quote(value)
+        return value
+    if isinstance(value, numbers.Number):
+        return _format_number(value)
+
+    parts = []
+    for item in value:
+        if isinstance(item, str):
+            parts.append(_quote(item))
+        elif isinstance(item, numbers.Number):
+            parts.append(_format_number(item))
+        elif name == "cuts":
+            parts.append(",".join(_format_number(v) for v in item))
+        else:
+            # nested sequences, e.g. one (x1, y1, x2, y2) tuple per character
+            # for x_bboxes, are flattened
+            parts.append(" ".join(_format_number(v) for v in item))
+    return " ".join(parts)
+
+
+def format_properties(properties: Dict[str, Any]) -> str:
+    """Formats properties as value of a title attribute
+
+    The inverse of parse_properties: the result is parsed into equal values.
+    Values may be BBoxes, numbers, strings or sequences of them. Strings are
+    quoted if the spec defines them as delimited strings or if they contain
+    a semicolon, quote or backslash; strings in sequences are always quoted.
+    Nested sequences are flattened, except for cuts, whose inner sequences
+    are joined by commas. Properties with the value None are skipped.
+
+    >>> format_properties({"bbox": (0, 0, 10, 20), "x_wconf": 96.5})
+    'bbox 0 0 10 20; x_wconf 96.5'
+
+    :param properties: dict mapping property names to their values, in the
+        order they should be written
+    :return: the title
+    """
+    return "; ".join(
+        f"{name} {_format_value(name, value)}"
+        for name, value in properties.items()
+        if value is not None
+    )
@@ -0,0 +1,262 @@
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+import heapq
+import math
+
+from .bbox import BBox
+from .text import get_ocr_class
+
+Box = Tuple[int, int, int, int]
+
+
+def _distance(box: Box, x: float, y: float) -> float:
+    """Euclidean distance of point (x, y) to box; 0 if the point is inside"""
+    dx = max(box[0] - x, 0, x - box[2])
+    dy = max(box[1] - y, 0, y - box[3])
+    return math.hypot(dx, dy)
+
+
+class _Grid:
+    """Uniform grid over the boxes of one ocr class
+
+    Every box is stored in all cells it overlaps. The cell size is the median
+    box size, so a cell contains only a few boxes on average.
+    """
+
+    def __init__(self, items: List[Tuple[int, Box]]):
+        """
+        :param items: list of (element number, box) tuples
+        """
+        self.items = items
+
+        sizes = sorted(max(b[2] - b[0], b[3] - b[1]) for _, b in items)
+        self.cell_size = max(sizes[len(sizes) // 2], 1)
+
+        self.cells: Dict[Tuple[int, int], List[int]] = {}
+        for position, (_, box) in enumerate(items):
+            x1, y1, x2, y2 = self._cell_range(box)
+            for cx in range(x1, x2 + 1):
+                for cy in range(y1, y2 + 1):
+                    self.cells.setdefault((cx, cy), []).append(position)
+
+        cells = self.cells.keys()
+        self.min_cx = min(cx for cx, _ in cells)
+        self.max_cx = max(cx for cx, _ in cells)
+        self.min_cy = min(cy for _, cy in cells)
+        self.max_cy = max(cy for _, cy in cells)
+
+    def _cell_range(self, box: Box) -> Box:
+        size = self.cell_size
+        x1, x2 = min(box[0], box[2]), max(box[0], box[2])
+        y1, y2 = min(box[1], box[3]), max(box[1], box[3])
+        return x1 // size, y1 // size, x2 // size, y2 // size
+
+    def candidates(self, box: Box) -> Iterable[int]:
+        """Returns the positions of all items in cells overlapping box"""
+        x1, y1, x2, y2 = self._cell_range(box)
+
+        # clamp the range to the cells in use
+        x1, y1 = max(x1, self.min_cx), max(y1, self.min_cy)
+        x2, y2 = min(x2, self.max_cx), min(y2, self.max_cy)
+        if x1 > x2 or y1 > y2:
+            return ()
+
+        # scanning more cells than there are items is slower than a full scan
+        if (x2 - x1 + 1) * (y2 - y1 + 1) > len(self.items):
+            return range(len(self.items))
+
+        positions: Set[int] = set()
+        for cx in range(x1, x2 + 1):
+            for cy in range(y1, y2 + 1):
+                positions.update(self.cells.get((cx, cy), ()))
+
+        return positions
+
+    def nearest(self, x: float, y: float, k: int) -> List[Tuple[float, int]]:
+        """Returns (distance, element number) of the k items nearest to (x, y)
+
+        Searches the cells in rings of growing (Chebyshev) radius around the
+        cell containing the point. Items in cells outside of ring r are at
+        least r * cell_size away, which ends the search once k items closer
+        than that have been found.
+        """
+        if k >= len(self.items):
+            return sorted((_distance(b, x, y), n) for n, b in self.items)[:k]
+
+        size = self.cell_size
+        px, py = int(x // size), int(y // size)
+        max_radius = max(
+            abs(px - self.min_cx),
+            abs(px - self.max_cx),
+            abs(py - self.min_cy),
+            abs(py - self.max_cy),
+        )
+
+        # max-heap (negated distances) of the best k items found so far
+        best: List[Tuple[float, int]] = []
+        seen: Set[int] = set()
+        visited = 0
+
+        for radius in range(max_radius + 1):
+            if radius == 0:
+                ring = [(px, py)]
+            else:
+                ring = [
+                    (cx, cy)
+                    for cx in range(px - radius, px + radius + 1)
+                    for cy in (py - radius, py + radius)
+                ]
+                ring += [
+                    (cx, cy)
+                    for cx in (px - radius, px + radius)
+                    for cy in range(py - radius + 1, py + radius)
+                ]
+
+            for cell in ring:
+                for position in self.cells.get(cell, ()):
+                    if position in seen:
+                        continue
+                    seen.add(position)
+                    number, box = self.items[position]
+                    item = (-_distance(box, x, y), -number)
+                    if len(best) < k:
+                        heapq.heappush(best, item)
+                    elif item > best[0]:
+                        heapq.heapreplace(best, item)
+
+            if len(best) == k and -best[0][0] < radius * size:
+                break
+
+            # far away from all items the rings are mostly empty
+            visited += len(ring)
+            if visited > 4 * len(self.items):
+                return sorted((_distance(b, x, y), n) for n, b in self.items)[:k]
+
+        return sorted((-d, -n) for d, n in best)
+
+
+class SpatialIndex:
+    """Spatial index over the elements of a subtree, usually a page
+
+    The index holds all descendants of a node that have an ocr class and a
+    bbox. For every ocr class, the boxes are distributed over a uniform grid,
+    so that queries only have to look at the boxes close to the queried area
+    instead of scanning all elements.
+
+    All queries return elements in document order, except for nearest.
+    The index isn't updated when the tree changes.
+    """
+
+    def __init__(self, elements: Iterable[Tuple[Any, BBox]]):
+        """Creates a new index over the given elements
+
+        :param elements: Iterable of (HOCRNode, BBox) tuples in document order
+        """
+        self.elements: List[Any] = []
+        self.boxes: List[Box] = []
+        items: Dict[Optional[str], List[Tuple[int, Box]]] = {}
+
+        for number, (element, bbox) in enumerate(elements):
+            box = (bbox.x1, bbox.y1, bbox.x2, bbox.y2)
+            self.elements.append(element)
+            self.boxes.append(box)
+            items.setdefault(get_ocr_class(element), []).append((number, box))
+
+        self.grids = {class_: _Grid(entries) for class_, entries in items.items()}
+
+    @classmethod
+    def from_node(cls, node: Any) -> "SpatialIndex":
+        """Creates an index over all descendants of node with a bbox
+
+        :param node: HOCRNode, e.g. an ocr_page
+        :return: SpatialIndex
+        """
+        elements = []
+        for element in node.iterdescendants():
+            if get_ocr_class(element) is None:
+                continue
+            bbox = element.bbox
+            if bbox is not None:
+                elements.append((element, bbox))
+
+        return cls(elements)
+
+    def __len__(self) -> int:
+        return len(self.elements)
+
+    def _grids(self, ocr_class: Optional[str]) -> List[_Grid]:
+        if ocr_class is None:
+            return list(self.grids.values())
+
+        grid = self.grids.get(ocr_class)
+        return [] if grid is None else [grid]
+
+    def query_rect(
+        self, bbox: BBox, ocr_class: Optional[str] = None, contained: bool = False
+    ) -> List[Any]:
+        """Returns the elements whose boxes intersect with bbox
+
+        :param bbox: the queried rectangle
+        :param ocr_class: (optional) only return elements of this ocr class
+        :param contained: (optional) only return elements that lie completely
+            inside of bbox. Default is False.
+        :return: list of HOCRNodes in document order
+        """
+        query = (bbox.x1, bbox.y1, bbox.x2, bbox.y2)
+        numbers = []
+        for grid in self._grids(ocr_class):
+            for position in grid.candidates(query):
+                number, (x1, y1, x2, y2) = grid.items[position]
+                if contained:
+                    hit = (
+                        x1 >= query[0]
+                        and y1 >= query[1]
+                        and x2 <= query[2]
+                        and y2 <= query[3]
+                    )
+                else:
+                    hit = (
+                        x1 <= query[2]
+                        and y1 <= query[3]
+                        and x2 >= query[0]
+                        and y2 >= query[1]
+                    )
+                if hit:
+                    numbers.append(number)
+
+        return [self.elements[number] for number in sorted(numbers)]
+
+    def query_point(self, x: int, y: int, ocr_class: Optional[str] = None) -> List[Any]:
+        """Returns the elements whose boxes contain the point (x, y)
+
+        Points on the border of a box count as inside.
+
+        :param x: x coordinate
+        :param y: y coordinate
+        :param ocr_class: (optional) only return elements of this ocr class
+        :return: list of HOCRNodes in document order
+        """
+        return self.query_rect(BBox.from_ints(x, y, x, y), ocr_class=ocr_class)
+
+    def nearest(
+        self, x: float, y: float, k: int = 1, ocr_class: Optional[str] = None
+    ) -> List[Any]:
+        """Returns the k elements closest to the point (x, y)
+
+        The distance of an element is the distance between the point and the
+        closest point of its box, so it's 0 for all boxes containing the point.
+        Ties are broken by document order.
+
+        :param x: x coordinate
+        :param y: y coordinate
+        :param k: (optional) number of elements to return. Default is 1.
+        :param ocr_class: (optional) only return elements of this ocr class
+        :return: list of at most k HOCRNodes, closest first
+        """
+        if k <= 0:
+            return []
+
+        found = []
+        for grid in self._grids(ocr_class):
+            found.extend(grid.nearest(x, y, k))
+
+        return [self.elements[number] for _, number in sorted(found)[:k]]
@@ -0,0 +1,124 @@
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import lxml.etree
+
+TEXT = "text"
+START = "start"
+END = "end"
+
+
+def get_ocr_class(element: lxml.etree._Element) -> Optional[str]:
+    """Same as HOCRNode.ocr_class, but without creating a Classes object"""
+    for class_ in (element.get("class") or "").split():
+        if class_.startswith("ocr"):
+            return class_
+
+    return None
+
+
+def iter_text_events(
+    node: lxml.etree._Element, separators: Optional[Dict[str, str]] = None
+) -> Iterator[Tuple[Any, ...]]:
+    """Walks the subtree of node and yields its text with element boundaries
+
+    The concatenation of all TEXT chunks equals node.ocr_text: the stripped
+    text, children and tails of every element, joined with the separator of
+    the respective child element (see HOCRNode.OCR_TEXT_SEPARATORS).
+
+    The subtree is walked iteratively in a single pass, so neither deep nor
+    very wide trees are a problem. Yielded events are tuples:
+    - (TEXT, chunk): the next chunk of the text
+    - (START, element): start of element, in document order
+    - (END, element, start, end): end of element with the span of its
+      ocr_text in the concatenated text, i.e. text[start:end] equals
+      element.ocr_text
+
+    :param node: root of the subtree. Its tail is not part of the text.
+    :param separators: (optional) separators by ocr class to use instead of
+        node.OCR_TEXT_SEPARATORS. The text then differs from node.ocr_text.
+    :return: iterator over the events
+    """
+    if separators is None:
+        separators = node.OCR_TEXT_SEPARATORS
+    default_separator = separators.get("default", "\n")
+
+    # offset of the next chunk in the concatenated text
+    position = 0
+    # whether any text has been yielded yet
+    emitted = False
+    # separator to yield before the next piece of text, and the depth of the
+    # element it belongs to. The separator of the shallowest element entered
+    # since the last piece of text is used: all deeper elements have been
+    # entered without text, so their separators are stripped in ocr_text.
+    pending: Optional[str] = None
+    pending_depth = 0
+
+    depth = -1
+    # [element, start] of the open elements, and the subset of those elements
+    # that have no text yet and therefore no start offset
+    stack: List[List[Any]] = []
+    waiting: List[List[Any]] = []
+
+    events = ("start", "end", "comment", "pi")
+    for event, element in lxml.etree.iterwalk(node, events=events):
+        piece = ""
+        if event == "start":
+            depth += 1
+            entry = [element, None]
+            stack.append(entry)
+            waiting.append(entry)
+
+            if depth > 0:
+                sep = separators.get(get_ocr_class(element) or "default", "\n")
+                if pending is None or depth <= pending_depth:
+                    pending, pending_depth = sep, depth
+
+            yield START, element
+            piece = (element.text or "").strip()
+
+        elif event == "end":
+            entry = stack.pop()
+            if entry[1] is None:
+                # element without any text, it's the last one waiting
+                entry[1] = position
+                waiting.pop()
+            yield END, element, entry[1], position
+
+            if depth > 0:
+                piece = (element.tail or "").strip()
+                if piece:
+                    sep = separators.get(get_ocr_class(element) or "default", "\n")
+                    if pending is None or depth <= pending_depth:
+                        pending, pending_depth = sep, depth
+            depth -= 1
+
+        else:
+            # comments and processing instructions only contribute their tail
+            piece = (element.tail or "").strip()
+            if piece and (pending is None or depth + 1 <= pending_depth):
+                pending, pending_depth = default_separator, depth + 1
+
+        if piece:
+            if pending is not None and emitted:
+                yield TEXT, pending
+                position += len(pending)
+            pending = None
+
+            for entry in waiting:
+                entry[1] = position
+            waiting.clear()
+
+            yield TEXT, piece
+            position += len(piece)
+            emitted = True
+
+
+def iter_text(node: lxml.etree._Element) -> Iterator[str]:
+    """Yields the chunks of node.ocr_text, see iter_text_events
+
+    :param node: root of the subtree
+    :return: iterator over str chunks
+    """
+    for event in iter_text_events(node):
+        if event[0] is TEXT:
+            yield event[1]
@@ -0,0 +1,380 @@
+from contextlib import ExitStack, contextmanager
+from typing import (
+    Any,
+    ContextManager,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+)
+
+import lxml.etree
+
+from .properties import format_properties
+
+XHTML = "http://www.w3.org/1999/xhtml"
+DOCTYPE = (
+    '<!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 Transitional//EN"\n'
+    '    "http://www.w3.org/TR/xhtml1/DTD/xhtml1-transitional.dtd">'
+)
+
+# classes written by default, declared in the ocr-capabilities field
+CAPABILITIES = ("ocr_page", "ocr_carea", "ocr_par", "ocr_line", "ocrx_word")
+
+# kind -> (tag, default class, prefix of generated ids, allowed parent kinds)
+_KINDS = {
+    "page": ("div", "ocr_page", "page", (None,)),
+    "area": ("div", "ocr_carea", "block", ("page",)),
+    "paragraph": ("p", "ocr_par", "par", ("page", "area")),
+    "line": ("span", "ocr_line", "line", ("page", "area", "paragraph")),
+    "word": ("span", "ocrx_word", "word", ("line",)),
+}
+
+
+def _tag(name: str) -> str:
+    return f"{{{XHTML}}}{name}"
+
+
+class HOCRWriter:
+    """Writes a HOCR document incrementally, without building a tree
+
+    The head is written when the writer is entered, every element as soon as
+    it's opened, and the buffered output is flushed after every page. Only
+    the currently open elements are kept in memory, so documents of any size
+    can be written to a file or streamed, e.g. to a socket.
+
+    Elements are nested with context managers, which return the id of the
+    element; words are written with word(). All values are plain Python
+    data: bboxes are BBoxes or (x1, y1, x2, y2) tuples, further properties
+    of the title are passed as keyword arguments (see format_properties).
+
+    >>> with HOCRWriter("out.hocr", ocr_system="my-engine 1.0") as writer:
+    ...     with writer.page((0, 0, 2480, 3508), image="scan.png", ppageno=0):
+    ...         with writer.line((100, 150, 420, 198), baseline=(0.01, -8)):
+    ...             writer.word("Hello", (100, 150, 240, 198), confidence=96)
+    ...             writer.word("world", (260, 152, 420, 196), confidence=91.5)
+
+    Ids are generated like Tesseract does (page_1, block_1_1, par_1_1,
+    line_1_1, word_1_1, numbered per page) unless one is given. The output is
+    XHTML, which HOCRDocument reads back with the same structure and values.
+    """
+
+    def __init__(
+        self,
+        output: Any,
+        ocr_system: str = "hocr-parser",
+        capabilities: Optional[Iterable[str]] = CAPABILITIES,
+        number_of_pages: Optional[int] = None,
+        langs: Sequence[str] = (),
+        scripts: Sequence[str] = (),
+        meta: Optional[Dict[str, str]] = None,
+        encoding: str = "utf-8",
+    ):
+        """Creates a writer; nothing is written before it's entered
+
+        :param output: filename or binary file-like object. File objects are
+            not closed by the writer; for a socket, use socket.makefile("wb").
+        :param ocr_system: (optional) content of the ocr-system field
+        :param capabilities: (optional) classes written into the document,
+            written to the ocr-capabilities field. Writing an element with a
+            class that isn't declared raises a ValueError. Default is
+            CAPABILITIES; None writes no field and allows all classes.
+        :param number_of_pages: (optional) content of ocr-number-of-pages
+        :param langs: (optional) languages for the ocr-langs field
+        :param scripts: (optional) scripts for the ocr-scripts field
+        :param meta: (optional) further meta fields, name -> content
+        :param encoding: (optional) Encoding of the output. Default is utf-8.
+        """
+        self.output = output
+        self.encoding = encoding
+        self.capabilities = None if capabilities is None else tuple(capabilities)
+
+        self.fields: Dict[str, str] = {"ocr-system": ocr_system}
+        if self.capabilities is not None:
+            self.fields["ocr-capabilities"] = " ".join(self.capabilities)
+        if number_of_pages is not None:
+            self.fields["ocr-number-of-pages"] = str(number_of_pages)
+        if langs:
+            self.fields["ocr-langs"] = " ".join(langs)
+        if scripts:
+            self.fields["ocr-scripts"] = " ".join(scripts)
+        self.fields.update(meta or {})
+
+        self.pages = 0
+        self._stack: Optional[ExitStack] = None
+        self._xf: Any = None
+        # kinds of the open elements, outermost first
+        self._open: List[str] = []
+        # number of elements of each kind on the current page, for the ids
+        self._counts: Dict[str, int] = {}
+        # True if the open line has no words yet
+        self._first_word = True
+
+    def __enter__(self) -> "HOCRWriter":
+        self.open()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if exc_info[0] is None:
+            self.close()
+        elif self._stack is not None:
+            stack, self._stack, self._xf = self._stack, None, None
+            stack.__exit__(*exc_info)
+
+    def open(self) -> None:
+        """Writes everything up to the start of the body
+
+        Called when the writer is entered; call close() when using it without
+        a with statement.
+        """
+        if self._stack is not None:
+            raise ValueError("Writer is already open")
+
+        with ExitStack() as stack:
+            xf = stack.enter_context(
+                lxml.etree.xmlfile(self.output, encoding=self.encoding)
+            )
+            xf.write_declaration()
+            xf.write_doctype(DOCTYPE)
+            stack.enter_context(
+                xf.element(_tag("html"), {"lang": "en"}, nsmap={None: XHTML})
+            )
+            xf.write("\n ")
+            with xf.element(_tag("head")):
+                xf.write("\n  ")
+                with xf.element(_tag("title")):
+                    pass
+                xf.write("\n  ")
+                content_type = f"text/html;charset={self.encoding}"
+                self._meta(xf, {"http-equiv": "Content-Type", "content": content_type})
+                for name, content in self.fields.items():
+                    xf.write("\n  ")
+                    self._meta(xf, {"name": name, "content": content})
+                xf.write("\n ")
+            xf.write("\n ")
+            stack.enter_context(xf.element(_tag("body")))
+            # the elements stay open until the writer is closed
+            stack = stack.pop_all()
+
+        self._stack = stack
+        self._xf = xf
+
+    def close(self) -> None:
+        """Writes the end of the document and flushes the output"""
+        if self._open:
+            raise ValueError(f"Can't close the writer, {self._open[-1]} is open")
+        if self._stack is not None:
+            self._xf.write("\n ")
+            stack, self._stack, self._xf = self._stack, None, None
+            stack.close()
+
+    @staticmethod
+    def _meta(xf: Any, attributes: Dict[str, str]) -> None:
+        # written as complete element, so it's self-closing; without a
+        # namespace, it inherits the default namespace of html
+        xf.write(lxml.etree.Element("meta", attributes))
+
+    def flush(self) -> None:
+        """Writes the buffered output to the file or socket"""
+        if self._xf is not None:
+            self._xf.flush()
+
+    @contextmanager
+    def page(
+        self,
+        bbox: Any,
+        image: Optional[str] = None,
+        ppageno: Optional[int] = None,
+        id: Optional[str] = None,
+        ocr_class: Optional[str] = None,
+        **properties: Any,
+    ) -> Iterator[str]:
+        """Writes an ocr_page, and its content inside the with block
+
+        :param bbox: bbox of the page, usually (0, 0, width, height)
+        :param image: (optional) filename of the scanned image
+        :param ppageno: (optional) physical page number, starting at 0
+        :param id: (optional) id of the page. Default is page_<n>.
+        :param ocr_class: (optional) class of the element. Default is ocr_page.
+        :param properties: further properties of the title, e.g. scan_res
+        :return: context manager returning the id of the page
+        :raises ValueError: If the writer isn't open or a page is still open
+        """
+        title = {"bbox": bbox, "image": image, "ppageno": ppageno}
+        title.update(properties)
+        with self._element("page", ocr_class, id, title) as element_id:
+            yield element_id
+        self.flush()
+
+    def area(
+        self,
+        bbox: Any = None,
+        id: Optional[str] = None,
+        ocr_class: Optional[str] = None,
+        **properties: Any,
+    ) -> ContextManager[str]:
+        """Writes an ocr_carea inside a page, see page() for the arguments"""
+        return self._element("area", ocr_class, id, dict(bbox=bbox, **properties))
+
+    def paragraph(
+        self,
+        bbox: Any = None,
+        lang: Optional[str] = None,
+        id: Optional[str] = None,
+        ocr_class: Optional[str] = None,
+        **properties: Any,
+    ) -> ContextManager[str]:
+        """Writes an ocr_par inside a page or area, see page() for the arguments
+
+        :param lang: (optional) value of the lang attribute, e.g. eng
+        """
+        title = dict(bbox=bbox, **properties)
+        return self._element("paragraph", ocr_class, id, title, lang)
+
+    def line(
+        self,
+        bbox: Any = None,
+        id: Optional[str] = None,
+        ocr_class: Optional[str] = None,
+        **properties: Any,
+    ) -> ContextManager[str]:
+        """Writes an ocr_line inside a page, area or paragraph
+
+        Other line classes, e.g. ocr_header or ocr_caption, are written with
+        ocr_class. See page() for the arguments.
+        """
+        return self._element("line", ocr_class, id, dict(bbox=bbox, **properties))
+
+    def word(
+        self,
+        text: str,
+        bbox: Any = None,
+        confidence: Optional[float] = None,
+        lang: Optional[str] = None,
+        id: Optional[str] = None,
+        ocr_class: Optional[str] = None,
+        **properties: Any,
+    ) -> str:
+        """Writes an ocrx_word inside a line
+
+        Words of a line are separated by a space.
+
+        >>> writer.word("Hello", (100, 150, 240, 198), confidence=96,
+        ...             x_bboxes=[(100, 150, 128, 198), ...])
+
+        :param text: text of the word
+        :param bbox: (optional) bbox of the word
+        :param confidence: (optional) confidence, written as x_wconf
+        :param lang: (optional) value of the lang attribute
+        :param id: (optional) id of the word. Default is word_<page>_<n>.
+        :param ocr_class: (optional) class of the element. Default is ocrx_word.
+        :param properties: further properties of the title, e.g. x_bboxes
+            with one box and x_confs with one confidence per character
+        :return: id of the word
+        :raises ValueError: If no line is open
+        """
+        title = dict(bbox=bbox, x_wconf=confidence, **properties)
+        with self._element("word", ocr_class, id, title, lang) as element_id:
+            self._xf.write(text)
+        return element_id
+
+    @contextmanager
+    def _element(
+        self,
+        kind: str,
+        ocr_class: Optional[str],
+        element_id: Optional[str],
+        title: Dict[str, Any],
+        lang: Optional[str] = None,
+    ) -> Iterator[str]:
+        tag, default_class, prefix, parents = _KINDS[kind]
+        if self._stack is None:
+            raise ValueError("Writer isn't open")
+        parent = self._open[-1] if self._open else None
+        if parent not in parents:
+            where = f"inside {parent}" if parent else "outside of a page"
+            raise ValueError(f"Can't write {kind} {where}")
+
+        ocr_class = ocr_class or default_class
+        if self.capabilities is not None and ocr_class not in self.capabilities:
+            raise ValueError(f"{ocr_class} is not in the declared capabilities")
+
+        if kind == "page":
+            self.pages += 1
+            self._counts = {}
+        count = self._counts[kind] = self._counts.get(kind, 0) + 1
+        if element_id is None:
+            if kind == "page":
+                element_id = f"{prefix}_{self.pages}"
+            else:
+                element_id = f"{prefix}_{self.pages}_{count}"
+
+        attributes = {"class": ocr_class, "id": element_id}
+        formatted = format_properties(title)
+        if formatted:
+            attributes["title"] = formatted
+        if lang is not None:
+            attributes["lang"] = lang
+
+        xf = self._xf
+        depth = len(self._open)
+        if kind == "word":
+            if not self._first_word:
+                xf.write(" ")
+            self._first_word = False
+        else:
+            xf.write("\n" + " " * (depth + 2))
+
+        with xf.element(_tag(tag), attributes):
+            self._open.append(kind)
+            if kind != "word":
+                self._first_word = True
+            try:
+                yield element_id
+            finally:
+                self._open.pop()
+            if kind not in ("line", "word"):
+                xf.write("\n" + " " * (depth + 2))
+
+
+def write(output: Any, pages: Iterable[Dict[str, Any]], **options: Any) -> None:
+    """Writes a complete document from nested dicts, page by page
+
+    Every page is a dict with the keyword arguments of HOCRWriter.page and a
+    list of "lines"; every line has the arguments of HOCRWriter.line and a
+    list of "words" with the arguments of HOCRWriter.word. Pages may also
+    contain "areas" with "paragraphs" with "lines" instead. pages can be a
+    generator, so pages are written as soon as they are recognized.
+
+    >>> write("out.hocr", [{"bbox": (0, 0, 100, 50), "lines": [{"words": [
+    ...     {"text": "Hello", "bbox": (10, 10, 40, 20), "confidence": 90}]}]}])
+
+    :param output: filename or binary file-like object
+    :param pages: iterable of page dicts
+    :param options: keyword arguments of HOCRWriter, e.g. ocr_system
+    """
+    with HOCRWriter(output, **options) as writer:
+        for page in pages:
+            _write_children(writer, "page", page)
+
+
+_CHILDREN = {
+    "page": (("areas", "area"), ("paragraphs", "paragraph"), ("lines", "line")),
+    "area": (("paragraphs", "paragraph"), ("lines", "line")),
+    "paragraph": (("lines", "line"),),
+    "line": (("words", "word"),),
+}
+
+
+def _write_children(writer: HOCRWriter, kind: str, data: Dict[str, Any]) -> None:
+    children = _CHILDREN[kind]
+    arguments = {k: v for k, v in data.items() if k not in dict(children)}
+    with getattr(writer, kind)(**arguments):
+        for key, child_kind in children:
+            for child in data.get(key, ()):
+                if child_kind == "word":
+                    writer.word(**child)
+                else:
+                    _write_children(writer, child_kind, child)
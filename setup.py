@@ -21,9 +21,12 @@ setup(
     version="0.3.0",
     author="jlieth",
     license="GNU General Public License v3 (GPLv3)",
-    packages=find_packages(exclude=["tests", "*.tests", "*.tests.*"]),
+    packages=find_packages(
+        exclude=["tests", "*.tests", "*.tests.*", "benchmarks", "benchmarks.*"]
+    ),
     python_requires=">=3.6",
     install_requires=REQUIREMENTS,
+    extras_require={"numpy": ["numpy"]},
     tests_require=DEV_REQUIREMENTS,
     classifiers=[
         "Development Status :: 3 - Alpha",
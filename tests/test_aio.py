@@ -0,0 +1,96 @@
+import asyncio
+import time
+
+import pytest
+
+from hocr_parser.aio import Loader, default_loader
+from hocr_parser.exceptions import EmptyDocumentException, EncodingError
+from hocr_parser.hocr_document import HOCRDocument
+
+from .base import BaseTestClass
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+class TestAio(BaseTestClass):
+    def test_aopen(self):
+        path = self.get_testfile_path("document_test_pages.hocr")
+        document = run(HOCRDocument.aopen(path))
+        assert document.body.ocr_text == HOCRDocument(path).body.ocr_text
+        assert document.cache is not None
+        # the document knows its file, like HOCRDocument(path)
+        assert document._source == HOCRDocument(path)._source
+
+        path = self.get_testfile_path("document_test_init_empty_file.hocr")
+        with pytest.raises(EmptyDocumentException):
+            run(HOCRDocument.aopen(path))
+
+        path = self.get_testfile_path("document_test_file_encodings_utf16le.hocr")
+        with pytest.raises(EncodingError):
+            run(HOCRDocument.aopen(path))
+
+    def test_limit(self, mocker):
+        loader = Loader(max_workers=4, limit=2)
+        path = self.get_testfile_path("document_test_pages.hocr")
+        read_file = HOCRDocument._read_file
+        load = HOCRDocument._load
+        running = []
+        maximum = []
+        # file contents read but not parsed yet
+        held = []
+        held_maximum = []
+
+        def read(filename):
+            running.append(filename)
+            maximum.append(len(running))
+            time.sleep(0.01)
+            running.pop()
+            held.append(filename)
+            held_maximum.append(len(held))
+            return read_file(filename)
+
+        def parse(document, *args, **kwargs):
+            load(document, *args, **kwargs)
+            held.pop()
+
+        mocker.patch.object(HOCRDocument, "_read_file", side_effect=read)
+        mocker.patch.object(HOCRDocument, "_load", autospec=True, side_effect=parse)
+
+        async def main():
+            return await asyncio.gather(*(loader.open(path) for _ in range(8)))
+
+        documents = run(main())
+        loader.shutdown()
+
+        assert len(documents) == 8
+        assert max(maximum) == 2
+        assert max(held_maximum) <= 2
+
+    def test_aiterpages(self):
+        path = self.get_testfile_path("document_test_pages.hocr")
+
+        async def main():
+            ids = []
+            async for page in HOCRDocument.aiterpages(path):
+                ids.append((page.id, len(page.words)))
+            return ids
+
+        assert run(main()) == [("page_1", 5), ("page_2", 4), ("page_3", 0)]
+
+        # stopping early closes the generator
+        async def first():
+            pages = HOCRDocument.aiterpages(path)
+            async for page in pages:
+                page_id = page.id
+                break
+            await pages.aclose()
+            return page_id
+
+        assert run(first()) == "page_1"
+        assert default_loader() is default_loader()
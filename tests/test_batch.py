@@ -0,0 +1,98 @@
+import os
+import shutil
+
+import pytest
+
+from hocr_parser import batch
+from hocr_parser.exceptions import EmptyDocumentException, EncodingError
+
+from .base import BaseTestClass
+
+
+def word_ids(document):
+    return [word.id for word in document.body.words]
+
+
+def fail(document):
+    raise ValueError("foo")
+
+
+class TestBatch(BaseTestClass):
+    def get_paths(self, tmpdir):
+        for name in ("document_test_pages.hocr", "node_test_bbox.hocr"):
+            shutil.copy(self.get_testfile_path(name), str(tmpdir))
+        tmpdir.join("sub").mkdir()
+        tmpdir.join("sub", "empty.hocr").write("")
+        tmpdir.join("sub", "latin1.hocr").write_binary("<p>fööbär</p>".encode("latin1"))
+
+        return [
+            str(tmpdir.join("*.hocr")),
+            str(tmpdir.join("sub", "*.hocr")),
+            str(tmpdir.join("missing.hocr")),
+        ]
+
+    def test_expand_paths(self, tmpdir):
+        paths = batch.expand_paths(self.get_paths(tmpdir))
+        names = [os.path.relpath(path, str(tmpdir)) for path in paths]
+        assert names == [
+            "document_test_pages.hocr",
+            "node_test_bbox.hocr",
+            os.path.join("sub", "empty.hocr"),
+            os.path.join("sub", "latin1.hocr"),
+            "missing.hocr",
+        ]
+
+        # recursive globs and duplicates
+        paths = batch.expand_paths(
+            [str(tmpdir.join("**", "*.hocr")), str(tmpdir.join("*.hocr"))]
+        )
+        assert len(paths) == 4
+
+    def test_chunk_paths(self, tmpdir):
+        sizes = [10, 10, 30, 5, 5, 5]
+        paths = []
+        for i, size in enumerate(sizes):
+            path = tmpdir.join(f"{i}.hocr")
+            path.write("x" * size)
+            paths.append(str(path))
+        paths.append(str(tmpdir.join("missing.hocr")))
+
+        chunks = batch.chunk_paths(paths, 20)
+        assert [len(chunk) for chunk in chunks] == [2, 1, 4]
+        assert sum(chunks, []) == paths
+
+    @pytest.mark.parametrize("max_workers", [0, 2])
+    def test_process(self, tmpdir, max_workers):
+        paths = self.get_paths(tmpdir)
+        results = list(batch.process(paths, word_ids, max_workers=max_workers))
+        assert [os.path.basename(r.path) for r in results] == [
+            "document_test_pages.hocr",
+            "node_test_bbox.hocr",
+            "empty.hocr",
+            "latin1.hocr",
+            "missing.hocr",
+        ]
+
+        assert results[0].ok
+        assert results[0].value[-1] == "word_2_4"
+        assert results[1].value == []
+        assert isinstance(results[2].error, EmptyDocumentException)
+        assert isinstance(results[3].error, EncodingError)
+        assert isinstance(results[4].error, FileNotFoundError)
+        assert "error=" in repr(results[4])
+
+        # unordered results contain the same files
+        results = batch.process(paths, word_ids, ordered=False, chunk_bytes=1)
+        assert sorted(r.path for r in results) == sorted(batch.expand_paths(paths))
+
+    def test_process_errors(self, tmpdir):
+        paths = self.get_paths(tmpdir)[:1]
+
+        # other exceptions abort the batch
+        with pytest.raises(ValueError):
+            list(batch.process(paths, fail, max_workers=1))
+
+        # unless they are collected
+        errors = batch.ERRORS + (ValueError,)
+        results = list(batch.process(paths, fail, max_workers=1, errors=errors))
+        assert all(isinstance(r.error, ValueError) for r in results)
@@ -1,3 +1,5 @@
+import pickle
+
 import pytest
 
 from hocr_parser.bbox import BBox
@@ -70,3 +72,39 @@ class TestBBox:
         boxes = [BBox((4, 2, 9, 5)), BBox((1, 3, 3, 4)), BBox((6, 6, 8, 8))]
         expected = BBox((1, 2, 9, 8))
         assert BBox.max_bbox(boxes) == expected
+
+    def test_from_ints(self):
+        bbox = BBox.from_ints(-123, -456, 123, 456)
+        assert bbox == BBox((-123, -456, 123, 456))
+        assert type(bbox) is BBox
+
+    def test_relative_to(self):
+        bbox = BBox((15, 30, 40, 50))
+        assert bbox.relative_to(BBox((10, 20, 100, 100))) == BBox((5, 10, 30, 30))
+        assert bbox.relative_to(bbox) == BBox((0, 0, 25, 20))
+
+    def test_immutable(self):
+        bbox = BBox((1, 2, 3, 4))
+
+        with pytest.raises(AttributeError):
+            bbox.x1 = 5
+
+        with pytest.raises(AttributeError):
+            del bbox.y2
+
+        # no instance dict to add attributes to
+        with pytest.raises(AttributeError):
+            bbox.foo = 5
+        assert not hasattr(bbox, "__dict__")
+
+    def test_hash(self):
+        bbox1 = BBox((1, 2, 3, 4))
+        bbox2 = BBox.from_ints(1, 2, 3, 4)
+        bbox3 = BBox((4, 3, 2, 1))
+
+        assert hash(bbox1) == hash(bbox2)
+        assert len({bbox1, bbox2, bbox3}) == 2
+
+    def test_pickle(self):
+        bbox = BBox((1, 2, 3, 4))
+        assert pickle.loads(pickle.dumps(bbox)) == bbox
@@ -0,0 +1,99 @@
+import pytest
+
+from hocr_parser.bbox import BBox
+
+numpy = pytest.importorskip("numpy")
+from hocr_parser.bbox_array import BBoxArray  # noqa: E402
+
+from .base import BaseTestClass  # noqa: E402
+
+
+class TestBBoxArray(BaseTestClass):
+    def test_init(self):
+        # empty
+        assert len(BBoxArray()) == 0
+        assert BBoxArray().boxes.shape == (0, 4)
+
+        # wrong shape
+        with pytest.raises(ValueError):
+            BBoxArray([(1, 2, 3)])
+
+        boxes = BBoxArray([(1, 2, 3, 4), (5, 6, 7, 8)])
+        assert len(boxes) == 2
+        assert boxes[1] == BBox((5, 6, 7, 8))
+        assert list(boxes) == [BBox((1, 2, 3, 4)), BBox((5, 6, 7, 8))]
+
+    def test_from_bboxes(self):
+        bboxes = [BBox((1, 2, 3, 4)), BBox((5, 6, 7, 8))]
+        assert BBoxArray.from_bboxes(bboxes).to_bboxes() == bboxes
+        assert len(BBoxArray.from_bboxes([])) == 0
+
+    def test_from_document(self):
+        doc = self.get_document("document_test_bbox_overlapping_boxes.hocr")
+        boxes = BBoxArray.from_document(doc)
+        expected = [node.bbox for node in doc.iter() if node.bbox]
+        assert boxes.to_bboxes() == expected
+        assert boxes.union() == doc.bbox
+
+        # only words
+        boxes = BBoxArray.from_node(doc.body, ocr_class="ocrx_word")
+        assert boxes.to_bboxes() == [node.bbox for node in doc.body.words]
+
+        # no boxes at all
+        doc = self.get_document("document_test_bbox_no_boxes.hocr")
+        assert BBoxArray.from_document(doc).union() is None
+
+    def test_area(self):
+        boxes = BBoxArray([(0, 0, 10, 20), (5, 5, 5, 10), (10, 10, 0, 0)])
+        assert boxes.width.tolist() == [10, 0, -10]
+        assert boxes.height.tolist() == [20, 5, -10]
+        assert boxes.area().tolist() == [200, 0, 0]
+
+    def test_union_intersection(self):
+        boxes = BBoxArray([(1, 1, 4, 5), (3, 3, 5, 7)])
+        assert boxes.union() == BBox((1, 1, 5, 7))
+        assert boxes.intersection() == BBox((3, 3, 4, 5))
+
+        # disjoint boxes
+        boxes = BBoxArray([(1, 1, 2, 2), (3, 3, 4, 4)])
+        assert boxes.intersection() is None
+        assert BBoxArray().intersection() is None
+
+    def test_iou(self):
+        boxes = BBoxArray([(0, 0, 10, 10), (5, 0, 15, 10), (20, 20, 20, 20)])
+        iou = boxes.iou()
+        assert iou.shape == (3, 3)
+        assert iou[0, 0] == 1
+        assert iou[0, 1] == pytest.approx(50 / 150)
+        assert iou[0, 2] == 0
+        assert iou[2, 2] == 0
+
+        other = BBoxArray([(0, 0, 5, 10)])
+        assert boxes.iou(other)[:, 0].tolist() == [0.5, 0, 0]
+
+    def test_containment(self):
+        boxes = BBoxArray([(0, 0, 10, 10), (2, 2, 4, 4)])
+        assert boxes.contains(boxes).tolist() == [[True, True], [False, True]]
+        assert boxes.contains(BBox((3, 3, 4, 4))).tolist() == [True, True]
+        assert boxes.within(BBox((1, 1, 5, 5))).tolist() == [False, True]
+        assert boxes.contains_point(1, 1).tolist() == [True, False]
+
+    def test_transformations(self):
+        boxes = BBoxArray([(10, 20, 30, 40)])
+        assert boxes.translate(-10, 5)[0] == BBox((0, 25, 20, 45))
+        assert boxes.scale(0.5)[0] == BBox((5, 10, 15, 20))
+        assert boxes.scale(2, 1)[0] == BBox((20, 20, 60, 40))
+
+    def test_relative_to(self):
+        doc = self.get_document("node_test_rel_bbox.hocr")
+        node = doc.body.get_element_by_id("bbox_on_node_and_distant_ancestor")
+        boxes = BBoxArray.from_bboxes([node.bbox])
+
+        result = boxes.relative_to(node.parent_bbox)
+        assert result[0] == node.rel_bbox
+
+        parents = BBoxArray.from_bboxes([node.parent_bbox])
+        assert boxes.relative_to(parents)[0] == node.rel_bbox
+
+        with pytest.raises(ValueError):
+            boxes.relative_to(BBoxArray())
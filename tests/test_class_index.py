@@ -0,0 +1,45 @@
+from hocr_parser.class_index import ClassIndex
+from hocr_parser.hocr_node import HOCRNode
+
+from .base import BaseTestClass
+
+
+def ids(elements):
+    return [e.get("id") for e in elements]
+
+
+class TestClassIndex(BaseTestClass):
+    def test_find_class(self):
+        doc = self.get_document("document_test_pages.hocr")
+        index = ClassIndex(doc.root)
+
+        # same results as find_class, for every node and class
+        for node in doc.root.iter():
+            for class_ in ("ocr_page", "ocr_carea", "ocr_par", "ocr_line", "ocrx_word"):
+                found = index.find_class(node, class_)
+                assert ids(found) == ids(node.find_class(class_))
+
+        # nodes of the result are the proxies of the tree
+        page = doc.body.pages[1]
+        assert index.find_class(page, "ocr_page")[0] is page
+
+        # unknown classes starting with ocr are indexed as well
+        assert index.find_class(doc.body, "ocr_photo") == []
+
+        # not indexed: other class names and other trees
+        assert index.find_class(doc.body, "foo") is None
+        other = HOCRNode.fromstring("<p class='ocr_line'>foo</p>")
+        assert index.find_class(other, "ocr_line") is None
+
+    def test_duplicate_classes(self):
+        node = HOCRNode.fromstring(
+            "<div><p class='ocr_line ocr_line foo' id='a'>foo</p>"
+            "<p class='ocr_line' id='a'>bar</p></div>"
+        )
+        index = ClassIndex(node)
+        assert len(index) == 3
+        assert len(index.find_class(node, "ocr_line")) == 2
+
+        # the first element with an id wins
+        assert index.get_element_by_id("a").text == "foo"
+        assert index.get_element_by_id("b") is None
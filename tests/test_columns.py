@@ -0,0 +1,68 @@
+import math
+
+import pytest
+
+from hocr_parser.columns import OCR_CLASS_CODES, Columns
+
+from .base import BaseTestClass
+
+
+class TestColumns(BaseTestClass):
+    def test_from_node(self):
+        doc = self.get_document("document_test_pages.hocr")
+        columns = doc.to_columns()
+
+        # one row per ocr element, in document order
+        elements = [node for node in doc.body.iter() if node.ocr_class]
+        assert len(columns) == len(elements) == 22
+        assert columns.ids == [node.id for node in elements]
+        assert columns.text == doc.body.ocr_text
+
+        for row, node in enumerate(elements):
+            bbox = node.bbox
+            assert columns["x1"][row] == bbox.x1
+            assert columns["y2"][row] == bbox.y2
+            assert columns["ocr_class"][row] == OCR_CLASS_CODES[node.ocr_class]
+            assert columns.text_of(row) == node.ocr_text
+            if node.confidence is None:
+                assert math.isnan(columns["confidence"][row])
+            else:
+                assert columns["confidence"][row] == node.confidence
+
+        # hierarchy of the last word
+        row = columns.ids.index("word_2_4")
+        assert columns["page"][row] == 1
+        assert columns["carea"][row] == 2
+        assert columns["par"][row] == 2
+        assert columns["line"][row] == 3
+        assert columns.ids[columns["parent"][row]] == "line_2_2"
+
+        # pages have no enclosing elements
+        assert columns["page"][0] == 0
+        assert columns["line"][0] == -1
+        assert columns["parent"][0] == -1
+
+    def test_missing_values(self):
+        node = self.get_node_from_string("<div class='ocr_page'>foo</div>")
+        columns = Columns.from_node(node)
+        assert len(columns) == 1
+        assert columns["x1"][0] == -1
+        assert math.isnan(columns["confidence"][0])
+        assert columns.text_of(0) == "foo"
+
+    def test_to_numpy(self):
+        numpy = pytest.importorskip("numpy")
+
+        doc = self.get_document("document_test_pages.hocr")
+        records, text = doc.to_numpy()
+        assert len(records) == 22
+        assert text == doc.body.ocr_text
+
+        words = records[records["ocr_class"] == OCR_CLASS_CODES["ocrx_word"]]
+        assert len(words) == 9
+        assert numpy.all(words["confidence"] >= 70)
+        start, end = words["text_start"][0], words["text_end"][0]
+        assert text[start:end] == "The"
+
+        # empty table
+        assert len(Columns().to_numpy()) == 0
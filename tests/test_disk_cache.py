@@ -0,0 +1,98 @@
+import os
+import shutil
+
+import pytest
+
+from hocr_parser.columns import Columns
+from hocr_parser.disk_cache import DiskCache
+from hocr_parser.hocr_document import HOCRDocument
+
+from .base import BaseTestClass
+
+
+class TestDiskCache(BaseTestClass):
+    def copy(self, tmpdir, name="book.hocr"):
+        path = str(tmpdir.join(name))
+        shutil.copy(self.get_testfile_path("document_test_pages.hocr"), path)
+        return path
+
+    def test_columns_bytes(self):
+        columns = self.get_document("document_test_pages.hocr").to_columns()
+        data = columns.to_bytes()
+        restored = Columns.from_bytes(data)
+
+        assert restored.ids == columns.ids
+        assert restored.text == columns.text
+        for name, _ in Columns.COLUMNS:
+            assert restored[name].tobytes() == columns[name].tobytes()
+
+        for invalid in (b"foo", data[:-1], data + b"x", data[:20]):
+            with pytest.raises(ValueError):
+                Columns.from_bytes(invalid)
+
+    def test_open(self, tmpdir, mocker):
+        path = self.copy(tmpdir)
+        cache = DiskCache(str(tmpdir.join("cache")))
+        spy = mocker.spy(HOCRDocument, "to_columns")
+
+        # miss: the file is parsed and stored
+        document = cache.open(path)
+        assert spy.call_count == 1
+        assert cache.get(path) is not None
+        assert (
+            document.ocr_text == "The quick brown\nfox jumps\n\nover the lazy\n\nHund"
+        )
+
+        # hit: loaded without parsing
+        document = cache.open(path)
+        assert spy.call_count == 1
+        assert document._document is None
+        assert len(document) == 22
+        assert document.bbox(0) == HOCRDocument(path).body.pages[0].bbox
+
+        # the tree is only parsed for raw HTML access
+        row = document.columns.ids.index("word_2_4")
+        assert document.element(row).ocr_text == "Hund"
+        assert document.element(row).id == "word_2_4"
+
+        # changed files aren't found
+        with open(path, "ab") as f:
+            f.write(b"\n")
+        assert cache.get(path) is None
+
+    def test_content_key(self, tmpdir):
+        cache = DiskCache(str(tmpdir.join("cache")), key="content")
+        cache.open(self.copy(tmpdir, "a.hocr"))
+        assert cache.get(self.copy(tmpdir, "b.hocr")) is not None
+
+        # other encodings are separate entries
+        assert cache.get(self.copy(tmpdir, "b.hocr"), encoding="latin1") is None
+
+        with pytest.raises(ValueError):
+            DiskCache(str(tmpdir.join("cache")), key="foo")
+
+    def test_eviction(self, tmpdir):
+        cache = DiskCache(str(tmpdir.join("cache")))
+        paths = [self.copy(tmpdir, f"{i}.hocr") for i in range(3)]
+        for i, path in enumerate(paths):
+            cache.open(path)
+            # make sure modification times differ
+            os.utime(cache._path(path, "utf-8"), (i + 10, i + 10))
+        entry_size = cache.size() // 3
+
+        cache.max_size = 2 * entry_size
+        cache.evict()
+
+        # the least recently used entry was removed
+        assert cache.size() == 2 * entry_size
+        assert cache.get(paths[0]) is None
+        assert cache.get(paths[2]) is not None
+
+        # broken entries are removed
+        with open(cache._path(paths[2], "utf-8"), "wb") as f:
+            f.write(b"foo")
+        assert cache.get(paths[2]) is None
+        assert cache.size() == entry_size
+
+        cache.clear()
+        assert cache.size() == 0
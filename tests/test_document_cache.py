@@ -0,0 +1,100 @@
+from hocr_parser.bbox import BBox
+from hocr_parser.document_cache import DocumentCache
+from hocr_parser.hocr_document import HOCRDocument
+from hocr_parser.hocr_node import HOCRNode
+
+from .base import BaseTestClass
+
+
+class TestDocumentCache(BaseTestClass):
+    def test_of(self):
+        # nodes of a document tree find the cache of the document
+        doc = self.get_document("node_test_bbox.hocr")
+        node = doc.body.get_element_by_id("valid_bbox")
+        assert DocumentCache.of(node) is doc.cache
+
+        # nodes of a tree without cache
+        node = HOCRNode.fromstring("<p title='bbox 1 2 3 4'>foo</p>")
+        assert DocumentCache.of(node) is None
+
+        # cache is unregistered as soon as it is garbage collected
+        cache = DocumentCache(node.getroottree().getroot())
+        assert DocumentCache.of(node) is cache
+        del cache
+        assert DocumentCache.of(node) is None
+
+    def test_lifetime(self):
+        # the cache lives as long as the document, not as long as its nodes
+        path = self.get_testfile_path("node_test_bbox.hocr")
+        doc = HOCRDocument(path)
+        node = doc.body.get_element_by_id("valid_bbox")
+        assert DocumentCache.of(node) is doc.cache
+        del doc
+        assert DocumentCache.of(node) is None
+
+        # the node still works, just without caching
+        assert node.bbox == BBox((103, 215, 194, 247))
+        assert DocumentCache.of(node) is None
+
+    def test_get(self):
+        node = HOCRNode.fromstring("<p>foo</p>")
+        cache = DocumentCache(node)
+        calls = []
+
+        def compute(element):
+            calls.append(element)
+            return len(calls)
+
+        # value is only computed once
+        assert cache.get(node, "foo", compute) == 1
+        assert cache.get(node, "foo", compute) == 1
+        assert len(calls) == 1
+
+        # different keys are computed separately
+        assert cache.get(node, "bar", compute) == 2
+        assert len(cache) == 1
+
+    def test_properties_are_cached(self):
+        doc = self.get_document("node_test_bbox.hocr")
+        node = doc.body.get_element_by_id("valid_bbox")
+
+        assert node.bbox == BBox((103, 215, 194, 247))
+        assert len(doc.cache) == 1
+
+        # returned properties are copies and don't alter the cache
+        node.ocr_properties["bbox"] = "1 2 3 4"
+        assert node.bbox == BBox((103, 215, 194, 247))
+
+    def test_invalidate(self):
+        doc = self.get_document("node_test_bbox.hocr")
+        node = doc.body.get_element_by_id("valid_bbox")
+        assert node.bbox == BBox((103, 215, 194, 247))
+
+        # setting the title drops the cached properties
+        node.set("title", "bbox 1 2 3 4")
+        assert node.bbox == BBox((1, 2, 3, 4))
+
+        # modifying attrib requires explicit invalidation
+        node.attrib["title"] = "bbox 5 6 7 8"
+        assert node.bbox == BBox((1, 2, 3, 4))
+        node.invalidate()
+        assert node.bbox == BBox((5, 6, 7, 8))
+
+        # invalidating the whole cache
+        node.attrib["title"] = "bbox 9 9 9 9"
+        doc.cache.invalidate()
+        assert len(doc.cache) == 0
+        assert node.bbox == BBox((9, 9, 9, 9))
+
+    def test_put_peek_discard(self):
+        node = HOCRNode.fromstring("<p>foo</p>")
+        cache = DocumentCache(node)
+        assert cache.peek(node, "foo") is None
+
+        cache.put(node, "foo", 1)
+        assert cache.peek(node, "foo") == 1
+        assert cache.get(node, "foo", lambda element: 2) == 1
+
+        cache.discard(node, "foo")
+        cache.discard(node, "bar")
+        assert cache.peek(node, "foo") is None
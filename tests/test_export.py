@@ -0,0 +1,162 @@
+import io
+import json
+import os
+
+import lxml.etree
+
+from hocr_parser.export import (
+    ALTO_NS,
+    PAGE_NS,
+    page_to_dict,
+    to_alto,
+    to_json,
+    to_page_xml,
+)
+from hocr_parser.hocr_document import HOCRDocument
+from hocr_parser.writer import HOCRWriter
+
+from .base import BaseTestClass
+
+
+class TestExport(BaseTestClass):
+    @staticmethod
+    def write_source(path: str) -> str:
+        with HOCRWriter(path, ocr_system="test-engine 1.0") as writer:
+            with writer.page((0, 0, 200, 100), image="scan_1.png", ppageno=0):
+                with writer.area((10, 10, 190, 50)):
+                    with writer.paragraph((10, 10, 190, 50)):
+                        with writer.line((10, 10, 190, 30)):
+                            writer.word("Hello", (10, 10, 60, 30), confidence=96)
+                            writer.word("wörld", (70, 10, 190, 30), confidence=50.5)
+                        with writer.line((10, 30, 100, 50)):
+                            writer.word("<&>", (10, 30, 100, 50))
+            # lines outside of areas form an implicit block
+            with writer.page((0, 0, 200, 100), id="second"):
+                with writer.line((20, 20, 80, 40)):
+                    writer.word("x", (20, 20, 40, 40), confidence=100)
+                with writer.line((20, 50, 120, 70)):
+                    pass
+        return path
+
+    def test_json(self, tmp_path):
+        path = self.write_source(str(tmp_path / "source.hocr"))
+        output = str(tmp_path / "out.json")
+        assert to_json(path, output) == 2
+
+        with open(output, encoding="utf-8") as f:
+            data = json.load(f)
+        assert data["metadata"]["system"] == "test-engine 1.0"
+        first, second = data["pages"]
+        assert first["id"] == "page_1"
+        assert first["bbox"] == [0, 0, 200, 100]
+        assert first["image"] == "scan_1.png"
+        assert first["ppageno"] == 0
+
+        (block,) = first["blocks"]
+        assert block["id"] == "block_1_1"
+        assert [len(line["words"]) for line in block["lines"]] == [2, 1]
+        assert block["lines"][0]["words"][1] == {
+            "id": "word_1_2",
+            "text": "wörld",
+            "bbox": [70, 10, 190, 30],
+            "confidence": 50.5,
+        }
+        assert "confidence" not in block["lines"][1]["words"][0]
+
+        (implicit,) = second["blocks"]
+        assert "id" not in implicit
+        assert implicit["bbox"] == [20, 20, 120, 70]
+        assert implicit["lines"][1]["words"] == []
+
+        # an open document gives the same result
+        stream = io.StringIO()
+        to_json(HOCRDocument(path), stream)
+        assert json.loads(stream.getvalue()) == data
+        page = next(HOCRDocument.iterpages(path))
+        assert page_to_dict(page) == first
+
+    def test_alto(self, tmp_path):
+        path = self.write_source(str(tmp_path / "source.hocr"))
+        output = io.BytesIO()
+        assert to_alto(path, output) == 2
+
+        ns = {"a": ALTO_NS}
+        root = lxml.etree.fromstring(output.getvalue())
+        assert root.tag == f"{{{ALTO_NS}}}alto"
+        assert root.findtext("a:Description/a:MeasurementUnit", namespaces=ns) == (
+            "pixel"
+        )
+        assert root.findtext(".//a:fileName", namespaces=ns) == "scan_1.png"
+        assert root.findtext(".//a:softwareName", namespaces=ns) == "test-engine 1.0"
+
+        pages = root.findall("a:Layout/a:Page", namespaces=ns)
+        assert [p.get("ID") for p in pages] == ["page_1", "second"]
+        assert [p.get("PHYSICAL_IMG_NR") for p in pages] == ["1", "2"]
+        assert pages[0].get("WIDTH") == "200"
+
+        strings = pages[0].findall(".//a:String", namespaces=ns)
+        assert [s.get("CONTENT") for s in strings] == ["Hello", "wörld", "<&>"]
+        hello = strings[0]
+        assert (hello.get("HPOS"), hello.get("VPOS")) == ("10", "10")
+        assert (hello.get("WIDTH"), hello.get("HEIGHT")) == ("50", "20")
+        assert hello.get("WC") == "0.96"
+        assert strings[2].get("WC") is None
+        line = pages[0].find(".//a:TextLine", namespaces=ns)
+        assert [c.tag.split("}")[1] for c in line] == ["String", "SP", "String"]
+
+        blocks = pages[1].findall(".//a:TextBlock", namespaces=ns)
+        assert [b.get("ID") for b in blocks] == ["block_2_1"]
+        assert blocks[0].get("VPOS") == "20"
+
+    def test_page_xml(self, tmp_path):
+        path = self.write_source(str(tmp_path / "source.hocr"))
+        directory = str(tmp_path / "page")
+        paths = to_page_xml(path, directory, created="2020-01-01T00:00:00")
+        assert [os.path.basename(p) for p in paths] == [
+            "page_00001.xml",
+            "page_00002.xml",
+        ]
+
+        ns = {"p": PAGE_NS}
+        root = lxml.etree.parse(paths[0]).getroot()
+        assert root.get("pcGtsId") == "page_1"
+        assert lxml.etree.parse(paths[1]).getroot().get("pcGtsId") == "second"
+        assert root.findtext("p:Metadata/p:Creator", namespaces=ns) == (
+            "test-engine 1.0"
+        )
+        assert root.findtext("p:Metadata/p:Created", namespaces=ns) == (
+            "2020-01-01T00:00:00"
+        )
+        page = root.find("p:Page", namespaces=ns)
+        assert page.get("imageFilename") == "scan_1.png"
+        assert page.get("imageWidth") == "200"
+
+        region = page.find("p:TextRegion", namespaces=ns)
+        assert region.get("id") == "block_1_1"
+        assert region.find("p:Coords", namespaces=ns).get("points") == (
+            "10,10 190,10 190,50 10,50"
+        )
+        lines = region.findall("p:TextLine", namespaces=ns)
+        assert [x.findtext("p:TextEquiv/p:Unicode", namespaces=ns) for x in lines] == [
+            "Hello wörld",
+            "<&>",
+        ]
+        word = lines[0].find("p:Word", namespaces=ns)
+        assert word.get("id") == "word_1_1"
+        assert word.find("p:TextEquiv", namespaces=ns).get("conf") == "0.96"
+        assert region.findtext("p:TextEquiv/p:Unicode", namespaces=ns) == (
+            "Hello wörld\n<&>"
+        )
+
+    def test_page_xml_ids_are_not_paths(self, tmp_path):
+        source = str(tmp_path / "source.hocr")
+        with HOCRWriter(source) as writer:
+            with writer.page((0, 0, 10, 10), id="../../outside"):
+                pass
+
+        directory = str(tmp_path / "a" / "b")
+        (path,) = to_page_xml(source, directory)
+        assert os.path.dirname(path) == directory
+        assert sorted(os.listdir(str(tmp_path))) == ["a", "source.hocr"]
+        root = lxml.etree.parse(path).getroot()
+        assert root.get("pcGtsId") == "../../outside"
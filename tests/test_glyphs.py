@@ -0,0 +1,71 @@
+import math
+
+import numpy
+import pytest
+
+from hocr_parser.glyphs import Glyphs
+
+from .base import BaseTestClass
+
+
+class TestGlyphs(BaseTestClass):
+    def test_from_node(self):
+        doc = self.get_document("node_test_glyphs.hocr")
+        glyphs = doc.glyphs(0)
+
+        assert glyphs.text == "Ocrisfun"
+        assert glyphs.word_ids == ["cinfo", "x_bboxes", "short_x_bboxes"]
+        assert list(glyphs.word_starts) == [0, 3, 5, 8]
+        assert glyphs.span_of(1) == (3, 5)
+        assert [glyphs.word_of(i) for i in range(len(glyphs))] == list(glyphs["word"])
+
+        # text of every word is aligned to its ocr_text, but glyph elements
+        # are joined without separator
+        for i, word in enumerate(doc.body.pages[0].words):
+            start, end = glyphs.span_of(i)
+            assert glyphs.text[start:end] == word.ocr_text.replace("\n", "")
+
+        # ocrx_cinfo elements, x_bboxes and x_confs of words; characters of
+        # words without enough boxes get none
+        assert list(glyphs["x1"]) == [10, 40, 70, 120, 150, 200, -1, -1]
+        assert list(glyphs["y1"]) == [10, 12, 10, 10, 10, 10, -1, -1]
+        assert list(glyphs["x2"]) == [40, 70, 100, 150, 180, 250, -1, -1]
+        assert list(glyphs["y2"]) == [40, 40, 40, 40, 40, 40, -1, -1]
+        confidences = list(glyphs["confidence"])
+        assert confidences[:5] == [99.5, 80, 91.25, 70, 60]
+        assert all(math.isnan(c) for c in confidences[5:])
+
+        with pytest.raises(IndexError):
+            glyphs.word_of(8)
+
+    def test_document(self):
+        doc = self.get_document("node_test_glyphs.hocr")
+        assert doc.glyphs().text == "Ocrisfunok"
+        assert doc.glyphs(doc.body.pages[1]).text == "ok"
+
+        # the word confidence doesn't belong to its characters
+        glyphs = doc.get_element_by_id("no_glyphs").glyphs()
+        assert list(glyphs["x1"]) == [-1, -1]
+        assert all(math.isnan(c) for c in glyphs["confidence"])
+
+        # ocr_text of words with ocrx_cinfo elements is unchanged
+        assert doc.get_element_by_id("cinfo").ocr_text == "O\nc\nr"
+
+    def test_separators(self):
+        node = self.get_node_from_string(
+            "<span class='ocrx_word' title='x_bboxes 1 1 2 2 3 3 4 4'>"
+            "a<span class='ocr_line'>b</span></span>"
+        )
+        glyphs = node.glyphs()
+        assert glyphs.text == "a\nb"
+        assert list(glyphs["x1"]) == [1, -1, 3]
+
+    def test_to_numpy(self):
+        doc = self.get_document("node_test_glyphs.hocr")
+        glyphs = doc.glyphs(0)
+        records = glyphs.to_numpy()
+        assert len(records) == len(glyphs)
+        assert records["x1"].tolist() == list(glyphs["x1"])
+        assert records["word"].dtype == numpy.int64
+
+        assert len(Glyphs().to_numpy()) == 0
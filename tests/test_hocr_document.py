@@ -1,7 +1,13 @@
+import codecs
+import io
+import warnings
+
 import pytest
 
 from hocr_parser.bbox import BBox
+from hocr_parser.hocr_document import HOCRDocument
 from hocr_parser.hocr_node import HOCRNode
+from hocr_parser.page_index import PageIndex
 from hocr_parser.exceptions import (
     EmptyDocumentException,
     EncodingError,
@@ -11,6 +17,10 @@ from hocr_parser.exceptions import (
 from .base import BaseTestClass
 
 
+def ids(elements):
+    return [e.get("id") for e in elements]
+
+
 class TestOCRDocument(BaseTestClass):
     def test_init(self):
         # test empty file
@@ -67,6 +77,20 @@ class TestOCRDocument(BaseTestClass):
         expected = "tesseract 4.0.0-beta.1"
         assert doc.ocr_system == expected
 
+        # meta tags outside of the head count as well, names are case
+        # sensitive, and the first tag wins even without content
+        doc = HOCRDocument.frombytes(
+            b"<html><head><meta name='OCR-SYSTEM' content='upper'></head>"
+            b"<body><meta name='ocr-system' content='body'>"
+            b"<meta name='ocr-capabilities'>"
+            b"<meta name='ocr-capabilities' content='ocr_page'></body></html>"
+        )
+        assert doc.ocr_system == "body"
+        assert "ocr-system" not in doc.metadata.fields
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            assert doc.ocr_capabilities == []
+
     def test_ocr_capabilities(self):
         # no meta tag
         doc = self.get_document("document_test_ocr_capabilities_no_tag.hocr")
@@ -94,3 +118,206 @@ class TestOCRDocument(BaseTestClass):
         doc = self.get_document("document_test_bbox_overlapping_boxes.hocr")
         expected = BBox((25, 25, 1175, 650))
         assert doc.bbox == expected
+
+    def test_iterpages(self):
+        # empty file
+        filename = self.get_testfile_path("document_test_init_empty_file.hocr")
+        with pytest.raises(EmptyDocumentException):
+            next(HOCRDocument.iterpages(filename))
+
+        # wrong encoding
+        filename = self.get_testfile_path("document_test_file_encodings_utf16le.hocr")
+        with pytest.raises(EncodingError):
+            list(HOCRDocument.iterpages(filename))
+
+        # pages are yielded in order and behave like regular nodes
+        filename = self.get_testfile_path("document_test_pages.hocr")
+        doc = HOCRDocument(filename)
+        pages = HOCRDocument.iterpages(filename)
+        for expected in doc.body.pages:
+            page = next(pages)
+            assert isinstance(page, HOCRNode)
+            assert page.id == expected.id
+            assert page.bbox == expected.bbox
+            assert page.ocr_text == expected.ocr_text
+            assert [w.confidence for w in page.words] == [
+                w.confidence for w in expected.words
+            ]
+
+        # consumed pages are cleared and removed from the tree
+        body = page.getparent()
+        assert len(body) == 2
+        assert body[0].id is None and len(body[0]) == 0
+        with pytest.raises(StopIteration):
+            next(pages)
+        assert page.id is None
+
+    def test_frombytes(self, mocker):
+        # empty input
+        with pytest.raises(EmptyDocumentException):
+            HOCRDocument.frombytes(b"")
+
+        # wrong encoding
+        path = self.get_testfile_path("document_test_file_encodings_utf16le.hocr")
+        with open(path, "rb") as f:
+            data = f.read()
+        with pytest.raises(EncodingError):
+            HOCRDocument.frombytes(data)
+
+        # correct encoding
+        doc = HOCRDocument.frombytes(data, encoding="utf-16le")
+        assert doc.body.ocr_text == "fööbär"
+
+        # bytes-like objects other than bytes
+        path = self.get_testfile_path("document_test_pages.hocr")
+        with open(path, "rb") as f:
+            data = f.read()
+        expected = HOCRDocument(path)
+        for buffer in (data, bytearray(data), memoryview(data)):
+            doc = HOCRDocument.frombytes(buffer)
+            assert doc.body == expected.body
+
+        # an invalid byte at the very end is still found, without decoding
+        # the input in Python
+        spy = mocker.spy(codecs, "getincrementaldecoder")
+        invalid = data.replace(b"</body>", b"\xff</body>")
+        for buffer in (invalid, bytearray(invalid)):
+            with pytest.raises(EncodingError):
+                HOCRDocument.frombytes(buffer)
+        assert spy.call_count == 0
+
+    def test_fromfile(self):
+        path = self.get_testfile_path("document_test_pages.hocr")
+        with open(path, "rb") as f:
+            doc = HOCRDocument.fromfile(f)
+        assert doc.body == HOCRDocument(path).body
+
+        path = self.get_testfile_path("document_test_init_empty_file.hocr")
+        with open(path, "rb") as f:
+            with pytest.raises(EmptyDocumentException):
+                HOCRDocument.fromfile(f)
+
+    def test_frommmap(self):
+        path = self.get_testfile_path("document_test_pages.hocr")
+        doc = HOCRDocument.frommmap(path)
+        assert doc.body == HOCRDocument(path).body
+
+        path = self.get_testfile_path("document_test_init_empty_file.hocr")
+        with pytest.raises(EmptyDocumentException):
+            HOCRDocument.frommmap(path)
+
+        path = self.get_testfile_path("document_test_file_encodings_utf16le.hocr")
+        with pytest.raises(EncodingError):
+            HOCRDocument.frommmap(path)
+        doc = HOCRDocument.frommmap(path, encoding="utf-16le")
+        assert doc.body.ocr_text == "fööbär"
+
+    def test_write_text(self):
+        doc = self.get_document("document_test_pages.hocr")
+        f = io.StringIO()
+        doc.write_text(f)
+        assert f.getvalue() == doc.body.ocr_text
+
+        doc = self.get_document("document_test_body_no_body_tag.hocr")
+        assert doc.write_text(io.StringIO()) == 0
+
+    def test_build_index(self, mocker):
+        doc = self.get_document("document_test_pages.hocr")
+        assert doc.index is None
+        without_index = [ids(line.words) for line in doc.body.lines]
+        assert doc.get_element_by_id("word_2_4").ocr_text == "Hund"
+
+        index = doc.build_index()
+        assert doc.index is index
+
+        # accessors use the index instead of searching the tree
+        spy = mocker.spy(HOCRNode, "find_class")
+        assert [ids(line.words) for line in doc.body.lines] == without_index
+        assert [ids(page.paragraphs) for page in doc.body.pages] == [
+            ["par_1_1"],
+            ["par_2_1", "par_2_2"],
+            [],
+        ]
+        assert ids(doc.body.areas) == ["block_1_1", "block_2_1", "block_2_2"]
+        assert doc.get_element_by_id("word_2_4").ocr_text == "Hund"
+        assert doc.get_element_by_id("foo") is None
+        assert spy.call_count == 0
+
+        # changing the class of an element drops the index
+        doc.get_element_by_id("word_2_4").set("class", "ocr_line")
+        assert doc.index is None
+        assert "word_2_4" in ids(doc.body.lines)
+
+        doc.build_index()
+        doc.drop_index()
+        assert doc.index is None
+
+    def test_trust_capabilities(self, mocker):
+        doc = self.get_document("document_test_pages.hocr")
+        expected = ids(doc.body.words)
+
+        # classes that aren't declared are not searched for
+        doc.body.pages[0].set("class", "ocr_page ocr_photo")
+        assert doc.trust_capabilities()
+        spy = mocker.spy(HOCRNode, "find_class")
+        assert doc.body._find_ocr_class("ocr_photo") == []
+        assert spy.call_count == 0
+        assert ids(doc.body.words) == expected
+
+        # glyph elements are only looked for if declared
+        doc = self.get_document("node_test_glyphs.hocr")
+        word = doc.get_element_by_id("cinfo")
+        assert list(word.glyphs()["x1"]) == [10, 40, 70]
+        assert doc.trust_capabilities()
+        assert list(word.glyphs()["x1"]) == [-1, -1, -1]
+
+        assert not doc.trust_capabilities(False)
+        assert list(word.glyphs()["x1"]) == [10, 40, 70]
+
+        # not enabled without ocr-capabilities field
+        doc = self.get_document("document_test_ocr_capabilities_no_tag.hocr")
+        assert not doc.trust_capabilities()
+        assert doc.cache.capabilities is None
+
+    def test_save(self, tmp_path, mocker):
+        path = tmp_path / "book.hocr"
+        original = open(self.get_testfile_path("document_test_pages.hocr"), "rb").read()
+        path.write_bytes(original)
+
+        doc = HOCRDocument(str(path))
+        doc.get_element_by_id("word_2_4").set_text("Katze")
+        size = doc.save()
+        data = path.read_bytes()
+        assert size == len(data)
+
+        # only the modified page is serialised, the rest is copied
+        start = original.index(b"<div class='ocr_page' id='page_2'")
+        end = original.index(b"<div class='ocr_page' id='page_3'")
+        assert data[:start] == original[:start]
+        assert data.endswith(original[end:])
+        assert b"Katze" in data[start:]
+        assert b"Hund" not in data
+        assert HOCRDocument(str(path)).body == doc.body
+        assert doc.dirty_pages == []
+
+        # the offsets of the written file are known without scanning it again
+        spy = mocker.spy(PageIndex, "from_file")
+        doc.get_element_by_id("word_1_1").set_confidence(12)
+        doc.save()
+        assert spy.call_count == 0
+        assert doc._page_index.starts == PageIndex.from_file(str(path)).starts
+        assert HOCRDocument(str(path)).get_element_by_id("word_1_1").confidence == 12
+
+        # modifications outside of pages serialise the whole tree
+        doc.body.set("lang", "de")
+        doc.body.mark_dirty()
+        other = tmp_path / "other.hocr"
+        doc.save(str(other))
+        assert HOCRDocument(str(other)).body.get("lang") == "de"
+
+        # documents without file need a filename
+        doc = HOCRDocument.frombytes(original)
+        with pytest.raises(ValueError):
+            doc.save()
+        doc.save(str(other))
+        assert HOCRDocument(str(other)).body == doc.body
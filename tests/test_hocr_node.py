@@ -1,9 +1,12 @@
+import io
 import math
 
 import lxml.html
 import lxml.etree
 import pytest
 
+import hocr_parser.hocr_node
+
 from hocr_parser.bbox import BBox
 from hocr_parser.exceptions import EmptyDocumentException, MalformedOCRException
 from hocr_parser.hocr_node import HOCRNode
@@ -11,6 +14,10 @@ from hocr_parser.hocr_node import HOCRNode
 from .base import BaseTestClass
 
 
+def ids(elements):
+    return [e.get("id") for e in elements]
+
+
 class TestOCRNode(BaseTestClass):
     def test_fromstring_structure(self):
         # test empty string
@@ -96,6 +103,21 @@ class TestOCRNode(BaseTestClass):
         assert node.ocr_text == "日本語"
         assert node.getroottree().docinfo.encoding == "utf-16le"
 
+    def test_frombytes(self):
+        # test empty input
+        with pytest.raises(EmptyDocumentException):
+            HOCRNode.frombytes(b"")
+
+        # bytes are handled like strings
+        node = HOCRNode.frombytes("<p>fööbär</p>".encode("utf-16le"), "utf-16le")
+        assert node.tostring() == HOCRNode.fromstring("<p>fööbär</p>").tostring()
+
+        # other buffers are always parsed as documents
+        s = "<html><body><p>fööbär</p></body></html>"
+        node = HOCRNode.frombytes(bytearray(s.encode("utf-8")))
+        assert node.tag == "html"
+        assert node.ocr_text == "fööbär"
+
     def test_equality(self):
         # different type should not be equal
         body = self.get_body("node_test_equality.hocr")
@@ -222,6 +244,34 @@ class TestOCRNode(BaseTestClass):
         with pytest.raises(MalformedOCRException):
             _ = node.ocr_properties
 
+        # semicolons in quoted values
+        node = self.get_node_from_string(
+            """<p title='image "a;b.png"; ppageno 7'>Foo</p>"""
+        )
+        assert node.ocr_properties == {"image": '"a;b.png"', "ppageno": "7"}
+
+    def test_typed_properties(self, mocker):
+        doc = self.get_document("document_test_pages.hocr")
+        word = doc.body.words[0]
+        properties = word.typed_properties
+        assert properties["bbox"] == word.bbox
+        assert properties["x_wconf"] == word.confidence
+
+        # parsed once per node, copies are returned
+        spy = mocker.spy(hocr_parser.hocr_node, "parse_properties")
+        properties.clear()
+        assert word.typed_properties["bbox"] == word.bbox
+        assert spy.call_count == 0
+
+        word.set("title", "bbox 1 2 3 4; x_confs 10 20")
+        assert word.typed_properties["bbox"] == BBox((1, 2, 3, 4))
+        assert list(word.typed_properties["x_confs"]) == [10, 20]
+        assert spy.call_count == 1
+
+        # nodes without cache
+        node = self.get_node_from_string("<p title='x_size 12.5'>Foo</p>")
+        assert node.typed_properties == {"x_size": 12.5}
+
     def test_bbox(self):
         body = self.get_body("node_test_bbox.hocr")
 
@@ -389,3 +439,211 @@ class TestOCRNode(BaseTestClass):
             print(case["id"])
             node = body.get_element_by_id(case["id"])
             assert node.ocr_text == case["expected"]
+
+    def test_ocr_text_glyphs(self):
+        # glyph elements are separated like any other element
+        body = self.get_body("node_test_glyphs.hocr")
+        assert body.get_element_by_id("cinfo").ocr_text == "O\nc\nr"
+        assert body.get_element_by_id("line_1").ocr_text == "O\nc\nr is fun"
+
+    def test_ocr_text_comments(self):
+        # comments don't contribute text, but their tail does
+        s = "<div>foo<!-- comment -->bar<span class='ocrx_word'>baz</span></div>"
+        node = self.get_node_from_string(s)
+        assert node.ocr_text == "foo\nbar baz"
+
+    def test_ocr_text_deep_tree(self):
+        # deeper than the recursion limit
+        node = HOCRNode.fromstring("<div></div>")
+        element = node
+        for _ in range(5000):
+            element = lxml.etree.SubElement(element, "div")
+        element.text = "foo"
+        assert node.ocr_text == "foo"
+
+    def test_write_text(self):
+        body = self.get_body("node_test_ocr_text.hocr")
+        f = io.StringIO()
+        assert body.write_text(f) == len(body.ocr_text)
+        assert f.getvalue() == body.ocr_text
+
+    def test_equality_without_serialising(self, mocker):
+        body = self.get_body("node_test_equality.hocr")
+        spy = mocker.spy(lxml.etree, "tostring")
+        nodes = body.cssselect("#whitespace_between_tags div")
+        assert nodes[0] == nodes[1]
+        assert spy.call_count == 0
+
+        # equal trees with duplicate ids
+        nodes = body.cssselect("#same span")
+        nodes[0].set("id", "foo")
+        nodes[1].set("id", "foo")
+        assert nodes[0] == nodes[1]
+
+    def test_fingerprint(self):
+        body = self.get_body("node_test_equality.hocr")
+
+        for div in body.iterchildren("div"):
+            nodes = list(div.iterchildren())
+            assert (nodes[0] == nodes[1]) == (
+                nodes[0].fingerprint() == nodes[1].fingerprint()
+            )
+
+        # same fingerprint in a tree without cache
+        node = body.cssselect("#repeated_space span")[1]
+        other = HOCRNode.fromstring("<span>Foo Bar</span>")
+        assert node.fingerprint() == other.fingerprint()
+
+    def test_fingerprint_cache(self, mocker):
+        doc = self.get_document("document_test_pages.hocr")
+        body = doc.body
+        spy = mocker.spy(hocr_parser.hocr_node, "fingerprints")
+
+        # fingerprints of all descendants are cached in one pass
+        fingerprint = body.fingerprint()
+        word = doc.get_element_by_id("word_1_1")
+        word_fingerprint = word.fingerprint()
+        assert body.fingerprint() == fingerprint
+        assert spy.call_count == 1
+
+        # equality doesn't rely on cached fingerprints, which go stale when
+        # the tree is modified without set
+        other = doc.get_element_by_id("word_1_2")
+        other.fingerprint()
+        assert not word == other
+        copy = self.get_document("document_test_pages.hocr").get_element_by_id(
+            "word_1_1"
+        )
+        copy.fingerprint()
+        for name, value in other.attrib.items():
+            copy.attrib[name] = value
+        copy.text = other.text
+        assert copy == other
+
+        # other attributes than title, class and id need invalidate
+        copy.set("lang", "en")
+        copy.invalidate()
+        assert copy.fingerprint() != other.fingerprint()
+
+        # modifying a node drops its fingerprint and those of its ancestors
+        word.set("title", "bbox 0 0 1 1")
+        assert word.fingerprint() != word_fingerprint
+        assert body.fingerprint() != fingerprint
+
+    def test_parent_bbox_cache(self, mocker):
+        doc = self.get_document("node_test_rel_bbox.hocr")
+        node = doc.get_element_by_id("bbox_on_node_and_distant_ancestor")
+        expected = node.parent_bbox
+
+        # the result is cached for the node and the ancestors on the way up
+        spy = mocker.spy(HOCRNode, "_parse_bbox")
+        assert node.parent_bbox == expected
+        assert node.parent.parent_bbox == expected
+        assert spy.call_count == 0
+
+        # changing the title of an ancestor drops the cached values
+        ancestor = node.parent
+        while ancestor.bbox is None:
+            ancestor = ancestor.parent
+        ancestor.set("title", "bbox 1 2 3 4")
+        assert node.parent_bbox == BBox((1, 2, 3, 4))
+
+    def test_rel_bboxes(self):
+        for name in ("node_test_rel_bbox.hocr", "document_test_pages.hocr"):
+            doc = self.get_document(name)
+            rel_bboxes = doc.rel_bboxes()
+            nodes = [n for n in doc.body.iter() if isinstance(n, HOCRNode)]
+            expected = [(n.id, n.rel_bbox) for n in nodes if n.bbox is not None]
+            assert [(n.id, b) for n, b in rel_bboxes] == expected
+
+        words = doc.rel_bboxes("ocrx_word")
+        assert len(words) == 9
+        assert words[0][1] == doc.body.words[0].rel_bbox
+
+        # subtree of a node without cache
+        node = doc.body.pages[1].areas[1]
+        tree = HOCRNode.fromstring(lxml.etree.tostring(node, encoding=str))
+        assert [b for _, b in tree.rel_bboxes()][1:] == [
+            b for _, b in node.rel_bboxes()
+        ][1:]
+
+    def test_edit(self):
+        doc = self.get_document("document_test_pages.hocr")
+        word = doc.get_element_by_id("word_1_2")
+        assert doc.dirty_pages == []
+
+        # other properties are kept in their order
+        word.set("title", "bbox 220 100 400 140; x_wconf 91; x_confs 90 92")
+        word.set_bbox(BBox((1, 2, 3, 4)))
+        word.set_confidence(50.5)
+        assert word.get("title") == "bbox 1 2 3 4; x_wconf 50.5; x_confs 90 92"
+        word.set_bbox(None)
+        word.set_confidence(None)
+        assert word.get("title") == "x_confs 90 92"
+        assert word.bbox is None
+        assert word.confidence == 91
+
+        # character properties are dropped if the length changes
+        word.set_text("quack")
+        assert word.get("title") == "x_confs 90 92"
+        word.set_text("quick!")
+        assert word.ocr_text == "quick!"
+        # the title is removed with its last property
+        assert word.get("title") is None
+        assert word.parent.ocr_text.startswith("The quick! brown")
+
+        # only the page of the edited nodes is marked as modified
+        assert ids(doc.dirty_pages) == ["page_1"]
+        # other attributes than title, class and id aren't tracked
+        doc.body.set("lang", "en")
+        assert ids(doc.dirty_pages) == ["page_1"]
+        doc.body.mark_dirty()
+        assert doc.dirty_pages == [doc.root]
+
+    def test_merge_split(self):
+        doc = self.get_document("document_test_pages.hocr")
+        line = doc.get_element_by_id("line_1_1")
+        first, second = line.words[:2]
+
+        first.merge(second)
+        assert ids(line.words) == ["word_1_1", "word_1_3"]
+        assert first.ocr_text == "Thequick"
+        assert first.bbox == BBox((100, 100, 400, 140))
+        assert first.confidence == 91
+        assert line.ocr_text == "Thequick brown"
+
+        new = first.split(3)
+        assert ids(line.words) == ["word_1_1", "word_1_1_2", "word_1_3"]
+        assert (first.ocr_text, new.ocr_text) == ("The", "quick")
+        assert first.bbox == BBox((100, 100, 212, 140))
+        assert new.bbox == BBox((212, 100, 400, 140))
+        assert new.confidence == 91
+        assert line.ocr_text == "The quick brown"
+        assert ids(doc.dirty_pages) == ["page_1"]
+
+        # boxes of the characters are used if available
+        word = self.get_node_from_string(
+            "<span class='ocrx_word' title='bbox 0 0 30 10; "
+            "x_bboxes 0 0 9 10 10 2 19 10 20 0 30 8'>abc</span>"
+        )
+        new = word.split(1)
+        assert (word.bbox, new.bbox) == (BBox((0, 0, 9, 10)), BBox((10, 0, 30, 10)))
+
+        with pytest.raises(ValueError):
+            new.split(0)
+        with pytest.raises(ValueError):
+            line.merge(first)
+        # only the next sibling of the same ocr class can be merged
+        first, second, third = line.words
+        with pytest.raises(ValueError):
+            first.merge(third)
+        with pytest.raises(ValueError):
+            second.merge(first)
+        second.set("class", "ocr_line")
+        with pytest.raises(ValueError):
+            first.merge(second)
+        assert [w.ocr_text for w in (first, second, third)] == [
+            "The",
+            "quick",
+            "brown",
+        ]
@@ -0,0 +1,73 @@
+import pytest
+
+from hocr_parser.exceptions import EmptyDocumentException, EncodingError
+from hocr_parser.hocr_document import HOCRDocument
+from hocr_parser.metadata import Metadata
+
+from .base import BaseTestClass
+
+
+class TestMetadata(BaseTestClass):
+    def test_fields(self):
+        doc = self.get_document("metadata_test_all_fields.hocr")
+        metadata = doc.metadata
+
+        # the first of repeated fields wins
+        assert metadata.system == "tesseract 4.1.1 & friends"
+        assert metadata.capabilities == [
+            "ocr_page",
+            "ocr_carea",
+            "ocr_par",
+            "ocr_line",
+            "ocrx_word",
+        ]
+        assert metadata.number_of_pages == 2
+        assert metadata.langs == ["de", "en"]
+        assert metadata.scripts == ["Latn"]
+        assert "content-type" not in metadata.fields
+
+        # cached until the cache is invalidated
+        assert doc.metadata is metadata
+        doc.cache.invalidate()
+        assert doc.metadata is not metadata
+        assert doc.metadata == metadata
+
+        # missing and invalid fields
+        metadata = Metadata({"ocr-number-of-pages": "many"})
+        assert metadata.system is None
+        assert metadata.capabilities == metadata.langs == metadata.scripts == []
+        assert metadata.number_of_pages is None
+
+    def test_from_file(self, tmp_path):
+        for name in (
+            "metadata_test_all_fields.hocr",
+            "document_test_ocr_system_no_meta_tag.hocr",
+            "document_test_ocr_capabilities_with_tag.hocr",
+        ):
+            path = self.get_testfile_path(name)
+            assert HOCRDocument.read_metadata(path) == self.get_document(name).metadata
+
+        # only the head is read; the body may even be undecodable
+        path = self.get_testfile_path("metadata_test_all_fields.hocr")
+        with open(path, "rb") as f:
+            data = f.read()
+        broken = tmp_path / "broken.hocr"
+        broken.write_bytes(data.replace("Ö".encode("utf-8"), b"\xff"))
+        with pytest.raises(EncodingError):
+            HOCRDocument(str(broken))
+        assert Metadata.from_file(str(broken)).number_of_pages == 2
+
+        # the end of the head is found across chunk boundaries
+        head, _, body = data.partition(b"</head>")
+        padded = tmp_path / "padded.hocr"
+        padded.write_bytes(b" " * (1 << 14) + head[:-3] + b" " * 20000 + b"</head>")
+        assert Metadata.from_file(str(padded)).system == "tesseract 4.1.1 & friends"
+
+        # other encodings
+        utf16 = tmp_path / "utf16.hocr"
+        utf16.write_bytes(data.decode("utf-8").encode("utf-16le"))
+        assert Metadata.from_file(str(utf16), "utf-16le").langs == ["de", "en"]
+
+        empty = self.get_testfile_path("document_test_init_empty_file.hocr")
+        with pytest.raises(EmptyDocumentException):
+            Metadata.from_file(empty)
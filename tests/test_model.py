@@ -0,0 +1,85 @@
+import gc
+import weakref
+
+from hocr_parser.model import DocumentModel, Element, Line, Page, Word
+from hocr_parser.text import get_ocr_class
+
+from .base import BaseTestClass
+
+
+class TestModel(BaseTestClass):
+    def assert_same(self, item, node):
+        assert item.id == node.id
+        assert item.ocr_class == node.ocr_class
+        assert item.bbox == node.bbox
+        assert item.rel_bbox == node.rel_bbox
+        assert item.confidence == node.confidence
+        assert item.ocr_text == node.ocr_text
+
+    def test_from_document(self):
+        for name in (
+            "document_test_pages.hocr",
+            "node_test_rel_bbox.hocr",
+            "node_test_ocr_text.hocr",
+            "node_test_find_words.hocr",
+        ):
+            doc = self.get_document(name)
+            model = doc.to_model()
+            nodes = [n for n in doc.body.iter() if get_ocr_class(n) is not None]
+
+            assert len(model) == len(nodes)
+            for item, node in zip(model.iter(), nodes):
+                self.assert_same(item, node)
+            assert model.ocr_text == doc.body.ocr_text
+
+    def test_structure(self):
+        model = self.get_document("document_test_pages.hocr").to_model()
+        assert [p.id for p in model.pages] == ["page_1", "page_2", "page_3"]
+        assert all(type(p) is Page for p in model.children)
+
+        page = model.pages[1]
+        assert [w.ocr_text for w in page.words] == ["over", "the", "lazy", "Hund"]
+        assert [p.id for p in page.paragraphs] == ["par_2_1", "par_2_2"]
+        assert len(page.areas) == 2
+        assert isinstance(page.lines[0], Line)
+
+        word = model.words[-1]
+        assert isinstance(word, Word)
+        assert word.parent.parent.id == "par_2_2"
+        assert word.parent.children == [word]
+        assert word.confidence == 70
+        assert "word_2_4" in repr(word)
+
+        assert len(model.areas) == 3
+        assert len(model.paragraphs) == 3
+        assert len(model.lines) == 4
+
+    def test_independent_of_tree(self):
+        doc = self.get_document("document_test_pages.hocr")
+        model = doc.to_model()
+        body = weakref.ref(doc.body)
+        del doc
+        gc.collect()
+
+        assert body() is None
+        assert model.words[0].ocr_text == "The"
+
+    def test_other_elements(self):
+        node = self.get_body_from_string(
+            "<html><body><div title='bbox 10 10 100 100'>"
+            "<span class='ocr_line ocr_foo' title='bbox 20 20 50 50'>"
+            "<span class='ocrx_block'>foo</span></span></div></body></html>"
+        )
+        model = DocumentModel.from_node(node)
+        line, block = model.elements
+
+        # rel_bbox is relative to the div, which isn't part of the model
+        assert line.rel_bbox == node.find("div")[0].rel_bbox
+        assert type(block) is Element
+        assert block.bbox is None
+        assert block.ocr_class == "ocrx_block"
+
+        assert (
+            len(self.get_document("document_test_body_no_body_tag.hocr").to_model())
+            == 0
+        )
@@ -0,0 +1,163 @@
+import os
+
+import pytest
+
+from hocr_parser.document_cache import DocumentCache
+from hocr_parser.exceptions import EmptyDocumentException
+from hocr_parser.hocr_document import HOCRDocument
+from hocr_parser.page_index import LazyDocument, PageIndex
+
+from .base import BaseTestClass
+
+
+class TestPageIndex(BaseTestClass):
+    def test_from_file(self):
+        path = self.get_testfile_path("document_test_pages.hocr")
+        index = PageIndex.from_file(path)
+        assert len(index) == 3
+        assert index.ids == ["page_1", "page_2", "page_3"]
+        assert index.size == os.path.getsize(path)
+        assert index.number_of("page_2") == 1
+        with pytest.raises(KeyError):
+            index.number_of("foo")
+
+        # every range contains exactly one page
+        with open(path, "rb") as f:
+            data = f.read()
+        for number in range(len(index)):
+            start, end = index[number]
+            page = data[start:end]
+            assert page.startswith(b"<div class='ocr_page'")
+            assert page.endswith(b"</div>")
+            assert page.count(b"ocr_page") == 1
+
+        empty = self.get_testfile_path("document_test_init_empty_file.hocr")
+        with pytest.raises(EmptyDocumentException):
+            PageIndex.from_file(empty)
+
+    def test_build(self):
+        data = (
+            b"<html><body>"
+            b"<DIV CLASS=ocr_page id=p1><div><div>a</div></div></DIV>"
+            b'<span class="foo ocr_page"><span>b</span>'
+            b"<p class='ocr_pages'>c</p>"
+            b"<div id='p3' class='ocr_page'><div>d</div>"
+            b"</body></html>"
+        )
+        index = PageIndex.build(data)
+        assert index.ids == ["p1", None, "p3"]
+
+        # pages with missing end tags end at the next page or the body
+        pages = [data[start:end] for start, end in zip(index.starts, index.ends)]
+        assert pages[0].endswith(b"</DIV>")
+        assert pages[1].endswith(b"<p class='ocr_pages'>c</p>")
+        assert pages[2].endswith(b"<div>d</div>")
+
+        assert len(PageIndex.build(b"<html></html>")) == 0
+
+        # class and id must be attributes of their own, and self-closing tags
+        # don't open elements
+        data = (
+            b"<html><body>"
+            b"<div data-class='ocr_page' data-id='x'>a</div>"
+            b"<div title='x' class='ocr_page' data-id='x'><div/>b</div>"
+            b"<div class='ocr_page' id='p2'/>"
+            b"</body></html>"
+        )
+        index = PageIndex.build(data)
+        assert index.ids == [None, "p2"]
+        pages = [data[start:end] for start, end in zip(index.starts, index.ends)]
+        assert pages == [
+            b"<div title='x' class='ocr_page' data-id='x'><div/>b</div>",
+            b"<div class='ocr_page' id='p2'/>",
+        ]
+
+    def test_encoding(self, tmpdir):
+        # ids are decoded with the encoding of the document
+        data = "<body><div class='ocr_page' id='seite_ä'></div></body>"
+        index = PageIndex.build(data.encode("latin-1"), encoding="latin-1")
+        assert index.number_of("seite_ä") == 0
+        assert PageIndex.build(data.encode("utf-8")).ids == ["seite_ä"]
+
+        path = str(tmpdir.join("book.hocr"))
+        with open(path, "wb") as f:
+            f.write(data.encode("utf-8"))
+        # sidecars written for another encoding aren't used
+        PageIndex.for_file(path, sidecar=True, encoding="latin-1")
+        assert PageIndex.for_file(path, sidecar=True).ids == ["seite_ä"]
+
+        # the scan needs ASCII compatible encodings
+        with pytest.raises(ValueError):
+            PageIndex.build(data.encode("utf-16"), encoding="utf-16")
+        with pytest.raises(ValueError):
+            LazyDocument(path, encoding="utf-16")
+
+    def test_sidecar(self, tmpdir):
+        path = str(tmpdir.join("book.hocr"))
+        with open(self.get_testfile_path("document_test_pages.hocr"), "rb") as f:
+            data = f.read()
+        with open(path, "wb") as f:
+            f.write(data)
+
+        index = PageIndex.for_file(path, sidecar=True)
+        assert os.path.exists(path + ".pageindex")
+
+        loaded = PageIndex.for_file(path, sidecar=True)
+        assert loaded.starts == index.starts
+        assert loaded.is_current(path)
+
+        # outdated or broken sidecars are rebuilt
+        with open(path, "ab") as f:
+            f.write(b"\n")
+        assert not loaded.is_current(path)
+        assert PageIndex.for_file(path, sidecar=True).size == len(data) + 1
+
+        sidecar = str(tmpdir.join("index.json"))
+        with open(sidecar, "w") as f:
+            f.write("foo")
+        assert len(PageIndex.for_file(path, sidecar=sidecar)) == 3
+        assert PageIndex.load(sidecar).ids == index.ids
+
+
+class TestLazyDocument(BaseTestClass):
+    def test_page(self, mocker):
+        path = self.get_testfile_path("document_test_pages.hocr")
+        document = HOCRDocument(path)
+        book = HOCRDocument.lazy(path, cache_size=2)
+        assert isinstance(book, LazyDocument)
+        assert len(book) == 3
+
+        for page, expected in zip(book, document.body.pages):
+            assert page == expected
+            assert page.ocr_text == expected.ocr_text
+            assert DocumentCache.of(page) is not None
+
+        assert book[-1].id == "page_3"
+        assert book.page_by_id("page_2").words[-1].ocr_text == "Hund"
+        with pytest.raises(IndexError):
+            book.page(3)
+
+        # the least recently used page is dropped
+        assert list(book.cached_pages()) == [2, 1]
+        spy = mocker.spy(book, "_parse")
+        book.page(1)
+        book.page(0)
+        assert spy.call_count == 1
+        assert list(book.cached_pages()) == [1, 0]
+
+    def test_changed_file(self, tmpdir):
+        path = str(tmpdir.join("book.hocr"))
+        with open(self.get_testfile_path("document_test_pages.hocr"), "rb") as f:
+            data = f.read()
+        with open(path, "wb") as f:
+            f.write(data)
+
+        book = LazyDocument(path)
+        assert book.page(0).id == "page_1"
+
+        # the index is rebuilt when the file changes
+        with open(path, "wb") as f:
+            f.write(
+                data.replace(b"page_1", b"page_0", 1).replace(b"<body>", b"<body>\n")
+            )
+        assert book.page(0).id == "page_0"
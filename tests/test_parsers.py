@@ -0,0 +1,65 @@
+import threading
+
+from hocr_parser import hocr_node
+from hocr_parser.hocr_document import HOCRDocument
+from hocr_parser.hocr_node import HOCRNode
+from hocr_parser.parsers import decoding_failed, get_parser
+
+from .base import BaseTestClass
+
+
+class TestParsers(BaseTestClass):
+    def test_get_parser(self):
+        # parsers are reused for the same configuration
+        parser = get_parser(HOCRNode, "utf-8")
+        assert get_parser(HOCRNode, "utf-8") is parser
+
+        # but not for a different one
+        assert get_parser(HOCRNode, "utf-16le") is not parser
+        assert get_parser(HOCRNode, "utf-8", huge_tree=True) is not parser
+
+        # every thread gets its own parsers
+        other = []
+        thread = threading.Thread(
+            target=lambda: other.append(get_parser(HOCRNode, "utf-8"))
+        )
+        thread.start()
+        thread.join()
+        assert other[0] is not parser
+
+    def test_decoding_failed(self):
+        parser = get_parser(HOCRNode, "utf-8")
+        HOCRNode.frombytes("<p>fööbär</p>".encode("latin-1"))
+        assert decoding_failed(parser)
+
+        # the error log is reset by the next parse
+        HOCRNode.frombytes("<p>fööbär</p>".encode("utf-8"))
+        assert not decoding_failed(parser)
+
+    def test_parser_options(self, mocker):
+        spy = mocker.spy(hocr_node, "get_parser")
+
+        # options are passed on to get_parser
+        HOCRNode.fromstring("<p>foo</p>", remove_blank_text=True)
+        spy.assert_called_with(
+            HOCRNode,
+            encoding="utf-8",
+            remove_blank_text=True,
+            huge_tree=False,
+            collect_ids=True,
+        )
+
+        # also by HOCRDocument
+        path = self.get_testfile_path("document_test_pages.hocr")
+        doc = HOCRDocument(path, huge_tree=True, collect_ids=False)
+        spy.assert_called_with(
+            HOCRNode,
+            encoding="utf-8",
+            remove_blank_text=False,
+            huge_tree=True,
+            collect_ids=False,
+        )
+        assert doc.body.ocr_text == HOCRDocument(path).body.ocr_text
+
+        pages = HOCRDocument.iterpages(path, huge_tree=True)
+        assert next(pages).id == "page_1"
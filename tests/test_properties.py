@@ -0,0 +1,90 @@
+from array import array
+
+import pytest
+
+from hocr_parser.bbox import BBox
+from hocr_parser.exceptions import MalformedOCRException
+from hocr_parser.properties import parse_properties, split_properties, tokenize
+
+
+class TestProperties:
+    def test_split_properties(self):
+        assert split_properties("bbox 1 2 3 4; x_wconf 93") == [
+            "bbox 1 2 3 4",
+            " x_wconf 93",
+        ]
+        # semicolons in quoted strings don't separate properties
+        assert split_properties('image "a;b.png"; ppageno 7') == [
+            'image "a;b.png"',
+            " ppageno 7",
+        ]
+        assert split_properties('image "a\\";b"') == ['image "a\\";b"']
+        assert split_properties("") == [""]
+
+    def test_tokenize(self):
+        assert tokenize("") == []
+        assert tokenize("bbox 1 2 3 4;x_wconf  93 ;") == [
+            ("bbox", [("1", False), ("2", False), ("3", False), ("4", False)]),
+            ("x_wconf", [("93", False)]),
+        ]
+        assert tokenize('image "scan 1;2.png"; x_source "a\\"b" c') == [
+            ("image", [("scan 1;2.png", True)]),
+            ("x_source", [('a"b', True), ("c", False)]),
+        ]
+
+        # property without name
+        with pytest.raises(MalformedOCRException):
+            tokenize("; bbox 1 2 3 4")
+        with pytest.raises(MalformedOCRException):
+            tokenize('"foo" bar')
+
+    def test_parse_properties(self):
+        title = (
+            'image "/scans/page 1.png"; bbox 0 0 2480 3508; ppageno 0; '
+            "baseline 0.015 -18; x_size 39.5; x_fsize 10; scan_res 300 300; "
+            "textangle 90; x_wconf 93; x_confs 90 80.5; "
+            "x_bboxes 1 2 3 4 5 6 7 8; cuts 12 20,5 31; x_font Times New Roman; "
+            "x_source a.png b.png; foo bar baz"
+        )
+        properties = parse_properties(title)
+        assert properties == {
+            "image": "/scans/page 1.png",
+            "bbox": BBox((0, 0, 2480, 3508)),
+            "ppageno": 0,
+            "baseline": (0.015, -18.0),
+            "x_size": 39.5,
+            "x_fsize": 10,
+            "scan_res": (300, 300),
+            "textangle": 90.0,
+            "x_wconf": 93.0,
+            "x_confs": array("d", [90, 80.5]),
+            "x_bboxes": array("q", [1, 2, 3, 4, 5, 6, 7, 8]),
+            "cuts": [(12,), (20, 5), (31,)],
+            "x_font": "Times New Roman",
+            "x_source": ["a.png", "b.png"],
+            "foo": "bar baz",
+        }
+        assert type(properties["x_fsize"]) is int
+        assert parse_properties("x_fsize 10.5") == {"x_fsize": 10.5}
+        assert parse_properties('ppageno "iv"') == {"ppageno": "iv"}
+        assert parse_properties("") == {}
+
+        # last one wins
+        assert parse_properties("x_wconf 1; x_wconf 2") == {"x_wconf": 2.0}
+
+    def test_parse_properties_malformed(self):
+        malformed = (
+            "bbox",
+            "bbox 1 2 3",
+            "bbox 1 2 3 a",
+            "x_wconf foo",
+            "x_wconf 1 2",
+            "x_confs 1 a",
+            "x_bboxes 1 2 3 4 5",
+            "baseline 1",
+            "ppageno x",
+            "cuts 1,a",
+        )
+        for title in malformed:
+            with pytest.raises(MalformedOCRException):
+                parse_properties(title)
@@ -0,0 +1,112 @@
+import math
+import random
+
+import pytest
+
+from hocr_parser.bbox import BBox
+from hocr_parser.spatial_index import SpatialIndex
+
+from .base import BaseTestClass
+
+
+class TestSpatialIndex(BaseTestClass):
+    def get_index(self):
+        doc = self.get_document("document_test_pages.hocr")
+        return doc, doc.spatial_index(0)
+
+    def test_document_spatial_index(self):
+        doc, index = self.get_index()
+
+        # the page itself isn't part of the index
+        assert len(index) == 1 + 1 + 2 + 5
+        assert doc.body.pages[0] not in index.elements
+
+        # index is cached, also when the page node is given
+        assert doc.spatial_index(doc.body.pages[0]) is index
+
+        # and rebuilt after invalidation
+        doc.body.pages[0].invalidate()
+        assert doc.spatial_index(0) is not index
+
+        with pytest.raises(IndexError):
+            doc.spatial_index(5)
+
+    def test_query_rect(self):
+        _, index = self.get_index()
+
+        # words intersecting the rect
+        words = index.query_rect(BBox((150, 90, 230, 150)), ocr_class="ocrx_word")
+        assert [w.id for w in words] == ["word_1_1", "word_1_2"]
+
+        # only words completely inside
+        words = index.query_rect(
+            BBox((90, 90, 410, 150)), ocr_class="ocrx_word", contained=True
+        )
+        assert [w.id for w in words] == ["word_1_1", "word_1_2"]
+
+        # all classes, in document order
+        nodes = index.query_rect(BBox((110, 170, 120, 180)))
+        assert [n.id for n in nodes] == ["block_1_1", "par_1_1", "line_1_2", "word_1_4"]
+
+        # nothing there
+        assert index.query_rect(BBox((950, 750, 990, 790))) == []
+        assert index.query_rect(BBox((0, 0, 10, 10)), ocr_class="ocr_foo") == []
+
+    def test_query_point(self):
+        _, index = self.get_index()
+
+        lines = index.query_point(300, 180, ocr_class="ocr_line")
+        assert [line.id for line in lines] == ["line_1_2"]
+
+        # border counts as inside
+        words = index.query_point(200, 120, ocr_class="ocrx_word")
+        assert [w.id for w in words] == ["word_1_1"]
+
+        assert index.query_point(900, 700) == []
+
+    def test_nearest(self):
+        _, index = self.get_index()
+
+        words = index.nearest(210, 120, k=2, ocr_class="ocrx_word")
+        assert [w.id for w in words] == ["word_1_1", "word_1_2"]
+
+        assert index.nearest(210, 120, k=0) == []
+        assert len(index.nearest(0, 0, k=100)) == len(index)
+
+    def test_nearest_random(self):
+        # compare with brute force search on random boxes
+        rng = random.Random(42)
+        nodes = []
+        for i in range(300):
+            x, y = rng.randint(0, 2000), rng.randint(0, 2000)
+            w, h = rng.randint(1, 80), rng.randint(1, 40)
+            s = f"<span class='ocrx_word' title='bbox {x} {y} {x + w} {y + h}'>{i}</span>"
+            node = self.get_node_from_string(s)
+            nodes.append((node, node.bbox))
+        index = SpatialIndex(nodes)
+
+        def distance(box, x, y):
+            dx = max(box.x1 - x, 0, x - box.x2)
+            dy = max(box.y1 - y, 0, y - box.y2)
+            return math.hypot(dx, dy)
+
+        for _ in range(50):
+            x, y = rng.randint(-500, 2500), rng.randint(-500, 2500)
+            expected = sorted(
+                range(len(nodes)), key=lambda i: distance(nodes[i][1], x, y)
+            )
+            result = index.nearest(x, y, k=5)
+            result_distances = [distance(node.bbox, x, y) for node in result]
+            expected_distances = [distance(nodes[i][1], x, y) for i in expected[:5]]
+            assert result_distances == expected_distances
+
+            rect = BBox((x, y, x + 300, y + 300))
+            expected = [
+                n
+                for n, b in nodes
+                if b.x1 <= rect.x2
+                and b.x2 >= rect.x1
+                and b.y1 <= rect.y2
+                and b.y2 >= rect.y1
+            ]
+            assert index.query_rect(rect) == expected
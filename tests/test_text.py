@@ -0,0 +1,34 @@
+from hocr_parser.text import END, START, TEXT, iter_text, iter_text_events
+
+from .base import BaseTestClass
+
+
+class TestText(BaseTestClass):
+    def test_iter_text(self):
+        body = self.get_body("node_test_ocr_text.hocr")
+
+        # chunks of every node join to its ocr_text
+        for node in body.iter():
+            assert "".join(iter_text(node)) == node.ocr_text
+
+        # comments only contribute their tail
+        s = "<div>foo<!-- comment -->bar<span class='ocrx_word'>baz</span></div>"
+        node = self.get_node_from_string(s)
+        assert "".join(iter_text(node)) == "foo\nbar baz"
+
+    def test_iter_text_events(self):
+        body = self.get_body("node_test_ocr_text.hocr")
+        text = "".join(iter_text(body))
+
+        started = []
+        for event in iter_text_events(body):
+            if event[0] is START:
+                started.append(event[1])
+            elif event[0] is END:
+                _, element, start, end = event
+                assert element is started.pop()
+                assert text[start:end] == element.ocr_text
+            else:
+                assert event[0] is TEXT
+
+        assert started == []
@@ -0,0 +1,203 @@
+import io
+
+import pytest
+
+from hocr_parser.bbox import BBox
+from hocr_parser.hocr_document import HOCRDocument
+from hocr_parser.properties import format_properties, parse_properties
+from hocr_parser.writer import CAPABILITIES, HOCRWriter, write
+
+from .base import BaseTestClass
+
+
+class _Recorder(io.RawIOBase):
+    """Binary stream remembering what was written, like a socket file"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def getvalue(self):
+        return b"".join(self.chunks)
+
+
+class TestWriter(BaseTestClass):
+    def test_format_properties(self):
+        properties = {
+            "bbox": BBox((0, 0, 10, 20)),
+            "image": 'scans/a;b "c".png',
+            "ppageno": 3,
+            "baseline": (0.015, -8),
+            "x_bboxes": [(1, 2, 3, 4), (5, 6, 7, 8)],
+            "x_confs": [90.5, 87],
+            "cuts": [(12,), (20, 5, 31)],
+            "x_font": "Times New Roman",
+            "x_source": ["a b", "c"],
+            "x_wconf": None,
+        }
+        title = format_properties(properties)
+        assert title.startswith("bbox 0 0 10 20; image ")
+        assert "x_wconf" not in title
+        assert "cuts 12 20,5,31" in title
+
+        parsed = parse_properties(title)
+        del properties["x_wconf"]
+        assert list(parsed) == list(properties)
+        assert parsed["image"] == properties["image"]
+        assert parsed["baseline"] == (0.015, -8.0)
+        assert list(parsed["x_bboxes"]) == [1, 2, 3, 4, 5, 6, 7, 8]
+        assert list(parsed["x_confs"]) == [90.5, 87.0]
+        assert parsed["cuts"] == properties["cuts"]
+        assert parsed["x_font"] == "Times New Roman"
+        assert parsed["x_source"] == ["a b", "c"]
+
+    def test_round_trip(self, tmp_path):
+        path = str(tmp_path / "out.hocr")
+        capabilities = CAPABILITIES + ("ocr_header",)
+        with HOCRWriter(
+            path,
+            ocr_system="test-engine 1.0",
+            capabilities=capabilities,
+            number_of_pages=2,
+            langs=["deu"],
+        ) as writer:
+            with writer.page((0, 0, 200, 100), image="a;b.png", ppageno=0) as page:
+                assert page == "page_1"
+                with writer.area((10, 10, 190, 40)):
+                    with writer.paragraph((10, 10, 190, 40), lang="deu"):
+                        with writer.line((10, 10, 190, 30), baseline=(0.01, -2)):
+                            boxes = [
+                                (10 + 10 * k, 10, 20 + 10 * k, 30) for k in range(4)
+                            ]
+                            writer.word(
+                                "Grüß",
+                                (10, 10, 50, 30),
+                                confidence=91.5,
+                                x_bboxes=boxes,
+                                x_confs=[90, 91, 92, 93],
+                            )
+                            word = writer.word("<&>", (60, 10, 90, 30), confidence=80)
+                            assert word == "word_1_2"
+            with writer.page((0, 0, 200, 100), id="second"):
+                with writer.line(ocr_class="ocr_header"):
+                    writer.word("x", id="only")
+        assert writer.pages == 2
+
+        doc = HOCRDocument(path)
+        metadata = doc.metadata
+        assert metadata.system == "test-engine 1.0"
+        assert metadata.number_of_pages == 2
+        assert metadata.langs == ["deu"]
+        assert metadata.capabilities == list(capabilities)
+
+        assert [p.get("id") for p in HOCRDocument.iterpages(path)] == [
+            "page_1",
+            "second",
+        ]
+
+        words = doc.body.words
+        assert [w.get("id") for w in words] == ["word_1_1", "word_1_2", "only"]
+        assert [w.ocr_text for w in words] == ["Grüß", "<&>", "x"]
+        assert words[0].bbox == BBox((10, 10, 50, 30))
+        assert words[0].confidence == 91.5
+        assert words[2].bbox is None
+
+        page = doc.body[0]
+        assert page.typed_properties["image"] == "a;b.png"
+        assert page.typed_properties["ppageno"] == 0
+        line = words[0].parent
+        assert line.get("id") == "line_1_1"
+        assert line.typed_properties["baseline"] == (0.01, -2.0)
+        assert line.parent.get("lang") == "deu"
+        assert line.ocr_text == "Grüß <&>"
+        assert words[2].parent.ocr_class == "ocr_header"
+
+        glyphs = doc.glyphs(0)
+        assert list(glyphs["x1"][:4]) == [10, 20, 30, 40]
+        assert list(glyphs["confidence"][:4]) == [90, 91, 92, 93]
+
+    def test_streaming(self):
+        output = _Recorder()
+        writer = HOCRWriter(output)
+        writer.open()
+        with writer.page((0, 0, 10, 10)):
+            with writer.line():
+                writer.word("first")
+        # the finished page is flushed before the next one starts
+        data = output.getvalue()
+        assert b"first</span></span>" in data
+        assert b"</body>" not in data
+
+        with writer.page((0, 0, 10, 10)):
+            pass
+        writer.close()
+        assert output.getvalue().endswith(b"</html>")
+        assert not output.closed
+
+    def test_write(self):
+        pages = (
+            {
+                "bbox": (0, 0, 100, 100),
+                "areas": [
+                    {
+                        "bbox": (0, 0, 100, 50),
+                        "paragraphs": [
+                            {"lines": [{"words": [{"text": "a"}, {"text": "b"}]}]}
+                        ],
+                    }
+                ],
+            },
+            {"bbox": (0, 0, 100, 100), "lines": [{"words": [{"text": "c"}]}]},
+        )
+        output = io.BytesIO()
+        write(output, iter(pages), ocr_system="dicts")
+        doc = HOCRDocument.frombytes(output.getvalue())
+        assert doc.metadata.system == "dicts"
+        assert [w.ocr_text for w in doc.body.words] == ["a", "b", "c"]
+        assert [w.get("id") for w in doc.body.words] == [
+            "word_1_1",
+            "word_1_2",
+            "word_2_1",
+        ]
+        assert doc.body[0][0].ocr_class == "ocr_carea"
+
+    def test_errors(self):
+        writer = HOCRWriter(io.BytesIO())
+        with pytest.raises(ValueError):
+            # not open
+            with writer.page((0, 0, 1, 1)):
+                pass
+
+        with writer:
+            with pytest.raises(ValueError):
+                writer.word("outside of a line")
+            with pytest.raises(ValueError):
+                with writer.line():
+                    pass
+            with writer.page((0, 0, 1, 1)):
+                with pytest.raises(ValueError):
+                    with writer.page((0, 0, 1, 1)):
+                        pass
+                with pytest.raises(ValueError):
+                    # not declared in the capabilities
+                    with writer.line(ocr_class="ocr_caption"):
+                        pass
+                with pytest.raises(ValueError):
+                    writer.close()
+        assert writer.pages == 1
+
+        # without capabilities, every class can be written
+        output = io.BytesIO()
+        with HOCRWriter(output, capabilities=None) as writer:
+            with writer.page((0, 0, 1, 1)):
+                with writer.line(ocr_class="ocr_caption"):
+                    writer.word("x", ocr_class="ocr_cinfo")
+        doc = HOCRDocument.frombytes(output.getvalue())
+        assert doc.metadata.capabilities == []
+        assert doc.body.ocr_text == "x"